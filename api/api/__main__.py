@@ -19,6 +19,8 @@ from uvicorn import Server
 
 # Geo:N:G imports
 import api
+from api import config
+from api import workers
 from geong_common import log
 
 # Handle environment variables
@@ -44,14 +46,14 @@ def parse_cli():
         raise SystemExit()
 
     # Set up server
-    server = Server(
-        Config(
-            "api.main:app",
-            host="0.0.0.0",
-            log_level=level_num,
-            port=5000,
-            proxy_headers=True,
-        ),
+    num_workers = config.api.server.workers
+    server_config = Config(
+        "api.main:app",
+        host="0.0.0.0",
+        log_level=level_num,
+        port=5000,
+        proxy_headers=True,
+        workers=num_workers,
     )
 
     # Set up logging last, to make sure no library overwrites it (they
@@ -59,7 +61,10 @@ def parse_cli():
     log.init(LOG_LEVEL)
 
     # Start server
-    server.run()
+    if num_workers > 1:
+        workers.run(server_config, LOG_LEVEL)
+    else:
+        Server(server_config).run()
 
 
 if __name__ == "__main__":
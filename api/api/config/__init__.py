@@ -9,3 +9,22 @@ from geong_common.config import config
 # Read API configuration from file
 with resources.path(__package__, "") as config_dir:
     api = config.read("api", config_dir)
+
+# Add information from environment variables
+api.update_from_env(
+    {
+        "COMPRESSION_MINIMUM_SIZE": ("compression", "minimum_size"),
+        "COMPRESSION_ENCODINGS": ("compression", "encodings"),
+        "API_WORKERS": ("server", "workers"),
+        "SNAPSHOT_PATH": ("snapshots", "path"),
+        "REFRESH_INTERVAL": ("refresh", "interval"),
+        "CACHE_MAX_BYTES": ("cache", "max_bytes"),
+    },
+    converters={
+        "COMPRESSION_MINIMUM_SIZE": "int",
+        "COMPRESSION_ENCODINGS": "list",
+        "API_WORKERS": "int",
+        "REFRESH_INTERVAL": "float",
+        "CACHE_MAX_BYTES": "int",
+    },
+)
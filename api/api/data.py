@@ -1,14 +1,29 @@
 # Standard library imports
+import asyncio
 import pathlib
 from enum import Enum
+from typing import Awaitable
+from typing import Callable
+from typing import Tuple
 
 # Third party imports
 import pandas as pd
+from azure.core import MatchConditions
 from azure.core.credentials import AccessToken
-from azure.storage.blob import BlobServiceClient
+from azure.core.exceptions import ResourceModifiedError
+from starlette.concurrency import run_in_threadpool
 
 # Geo:N:G imports
+from api import config
 from api.config.validators import BlobSettings
+from api.utils import metrics
+from api.utils import snapshots
+from api.utils.singleflight import SingleFlight
+from geong_common.data import models
+from geong_common.data import schema
+from geong_common.data.cache import FrameCache
+from geong_common.data.indexed import IndexedTable
+from geong_common.log import logger
 
 
 class DatasetName(str, Enum):
@@ -29,6 +44,18 @@ TABLE_FILE_MAPPING = {
 }
 
 
+# Latest version of each table and model, keyed by dataset and table or "model"
+_CACHE = FrameCache(
+    max_bytes=config.api.cache.max_bytes, name="data", on_change=metrics.cache_stats
+)
+
+# Downloads and model fits in progress, keyed by dataset, table and version
+_single_flight = SingleFlight()
+
+# Times a table is loaded again if its blob changes while it is downloaded
+_LOAD_RETRIES = 2
+
+
 class CustomTokenCredential(object):
     def __init__(self, token: str):
         self.__token = token
@@ -37,26 +64,246 @@ class CustomTokenCredential(object):
         return AccessToken(self.__token, 1)
 
 
-def get_blob(storage_url: str, container: str, filepath: str, token: str) -> bytes:
-    """Download blob from Azure"""
+def get_blob_client(storage_url: str, container: str, filepath: str, token: str):
+    """Connect to one blob in Azure, importing the slow Azure storage library"""
+    # Third party imports
+    from azure.storage.blob import BlobServiceClient
+
     credential = CustomTokenCredential(token)
     blob_service_client = BlobServiceClient(storage_url, credential)
-    blob_client = blob_service_client.get_blob_client(container, filepath)
-
-    return blob_client.download_blob().readall()
+    return blob_service_client.get_blob_client(container, filepath)
 
 
-def get_dataframe_from_blob(
+async def get_indexed_table(
     dataset: DatasetName,
     table: TableName,
     token: str,
     blob_settings: BlobSettings,
+) -> IndexedTable:
+    """Read from the data lake, reuse the table while the blob is unchanged"""
+    _, indexed_table = await get_versioned_table(dataset, table, token, blob_settings)
+    return indexed_table
+
+
+async def get_model(
+    dataset: DatasetName, token: str, blob_settings: BlobSettings
 ) -> pd.DataFrame:
-    """Read from the data lake"""
-    filepath = str(
+    """Calculate the models for a dataset, reuse them while elements are unchanged"""
+    _, model = await get_versioned_model(dataset, token, blob_settings)
+    return model
+
+
+async def get_versioned_model(
+    dataset: DatasetName, token: str, blob_settings: BlobSettings
+) -> Tuple[str, pd.DataFrame]:
+    """Calculate the models for a dataset, together with the version of elements"""
+    version, elements = await get_versioned_table(
+        dataset, TableName.elements, token, blob_settings
+    )
+    cached_version, cached_model = _CACHE.get((dataset, "model"), (None, None))
+    metrics.cache_lookup("model", hit=cached_version == version)
+    if cached_version == version:
+        return version, cached_model
+
+    model = await _single_flight.run(
+        (dataset, "model", version), _calculate_model, elements.data, dataset
+    )
+    _CACHE.put((dataset, "model"), (version, model))
+    return version, model
+
+
+async def refresh(token: str, blob_settings: BlobSettings) -> None:
+    """Load new versions of all tables and precompute models, then swap them in
+
+    New tables are indexed and new models are calculated before any of them are
+    used. All new tables and models of a dataset are then swapped in together.
+    Requests already using the old versions finish with them. Snapshots of older
+    versions are removed once the current version of a table is cached.
+    """
+    for dataset in DatasetName:
+        tables = {}
+        current_versions = {}
+        for table in TableName:
+            blob_client = _get_table_client(dataset, table, token, blob_settings)
+            version = await _get_version(blob_client)
+            cached_version, _ = _CACHE.get((dataset, table), (None, None))
+            if cached_version == version:
+                current_versions[table] = version
+                continue
+
+            version, indexed_table = await _load_version(
+                dataset, table, blob_client, version
+            )
+            await run_in_threadpool(
+                indexed_table.build_indexes, config.api.refresh.index_columns
+            )
+            tables[(dataset, table)] = (version, indexed_table)
+            current_versions[table] = version
+
+        models = {}
+        if (dataset, TableName.elements) in tables:
+            version, elements = tables[(dataset, TableName.elements)]
+            model = await _single_flight.run(
+                (dataset, "model", version), _calculate_model, elements.data, dataset
+            )
+            models[(dataset, "model")] = (version, model)
+
+        for key, value in {**tables, **models}.items():
+            _CACHE.put(key, value)
+        for table, version in current_versions.items():
+            await run_in_threadpool(
+                _remove_old_snapshots, f"{dataset.value}/{table.value}", version
+            )
+        if tables:
+            metrics.DATASET_REFRESHES.labels(dataset.value, "updated").inc()
+            names = ", ".join(table.value for _, table in tables)
+            logger.info(f"Refreshed {dataset.value} data: {names}, {_CACHE.stats()}")
+        else:
+            metrics.DATASET_REFRESHES.labels(dataset.value, "unchanged").inc()
+
+
+async def refresh_periodically(
+    get_token: Callable[[], Awaitable[str]],
+    blob_settings: BlobSettings,
+    interval: float,
+) -> None:
+    """Check for new versions of the data, run as a background task"""
+    while True:
+        try:
+            await refresh(await get_token(), blob_settings)
+        except Exception as e:
+            metrics.DATASET_REFRESHES.labels("all", "failed").inc()
+            logger.error(f"Could not refresh data: {e!r}")
+        await asyncio.sleep(interval)
+
+
+async def get_versioned_table(
+    dataset: DatasetName,
+    table: TableName,
+    token: str,
+    blob_settings: BlobSettings,
+) -> Tuple[str, IndexedTable]:
+    """Read one table and its version from the data lake
+
+    The blob properties are read with the user's token on every call, so that
+    access is checked for each user even if the table is cached or already being
+    downloaded for someone else. The ETag of the blob is used as the version of
+    the table. Concurrent requests for a version that is not cached share one
+    download, and other worker processes attach to the same snapshot.
+    """
+    blob_client = _get_table_client(dataset, table, token, blob_settings)
+    version = await _get_version(blob_client)
+    cached_version, cached_table = _CACHE.get((dataset, table), (None, None))
+    metrics.cache_lookup("table", hit=cached_version == version)
+    if cached_version == version:
+        return version, cached_table
+
+    version, indexed_table = await _load_version(dataset, table, blob_client, version)
+    _CACHE.put((dataset, table), (version, indexed_table))
+    return version, indexed_table
+
+
+def _get_table_client(
+    dataset: DatasetName, table: TableName, token: str, blob_settings: BlobSettings
+):
+    """Connect to the blob storing one table"""
+    return get_blob_client(
+        blob_settings.storage_url,
+        blob_settings.container,
+        blob_filepath(dataset, table, blob_settings),
+        token,
+    )
+
+
+async def _get_version(blob_client) -> str:
+    """Use the ETag of a blob as the version of its table"""
+    with metrics.stage("blob_properties"):
+        properties = await run_in_threadpool(blob_client.get_blob_properties)
+    return properties.etag
+
+
+async def _load_version(
+    dataset: DatasetName, table: TableName, blob_client, version: str
+) -> Tuple[str, IndexedTable]:
+    """Load one version of a table, sharing the work with concurrent callers
+
+    Downloads only succeed if the blob still has the given version. If the blob
+    has changed since its version was read, the new version is loaded instead.
+    Returns the version that was loaded, and the table.
+    """
+    for attempt in range(_LOAD_RETRIES + 1):
+        try:
+            indexed_table = await _single_flight.run(
+                (dataset, table, version),
+                _load_table,
+                blob_client,
+                f"{dataset.value}/{table.value}",
+                version,
+            )
+            return version, indexed_table
+        except ResourceModifiedError:
+            if attempt == _LOAD_RETRIES:
+                raise
+            logger.info(f"{dataset.value}/{table.value} changed while downloading")
+            version = await _get_version(blob_client)
+
+
+def _load_table(blob_client, name: str, version: str) -> IndexedTable:
+    """Load one table, from a shared snapshot if snapshots are enabled"""
+    with metrics.COMPUTATIONS_IN_FLIGHT.track_inprogress():
+        snapshot_dir = config.api.snapshots.path
+        if not snapshots.is_enabled(snapshot_dir, config.api.server.workers):
+            return IndexedTable(_download_table(blob_client, version))
+
+        with metrics.stage("snapshot_load"):
+            data = snapshots.load_or_publish(
+                snapshot_dir,
+                name,
+                version,
+                lambda: _download_table(blob_client, version),
+            )
+        return IndexedTable(data)
+
+
+def _remove_old_snapshots(name: str, version: str) -> None:
+    """Remove snapshots of older versions of a table, once a new one is cached"""
+    snapshot_dir = config.api.snapshots.path
+    if snapshots.is_enabled(snapshot_dir, config.api.server.workers):
+        snapshots.remove_other_versions(snapshot_dir, name, version)
+
+
+def _download_table(blob_client, version: str) -> pd.DataFrame:
+    """Download and parse one version of a table
+
+    Raises ResourceModifiedError if the blob no longer has the given version.
+    """
+    logger.info(f"Downloading {blob_client.blob_name}")
+    with metrics.stage("blob_download"):
+        blob = blob_client.download_blob(
+            etag=version, match_condition=MatchConditions.IfNotModified
+        ).readall()
+    with metrics.stage("json_parse"):
+        return _read_json(blob)
+
+
+def _calculate_model(elements: pd.DataFrame, dataset: DatasetName) -> pd.DataFrame:
+    """Fit and evaluate the models for one dataset"""
+    with metrics.COMPUTATIONS_IN_FLIGHT.track_inprogress():
+        with metrics.stage("models_calculate"):
+            return models.calculate(elements, dataset)
+
+
+def blob_filepath(
+    dataset: DatasetName, table: TableName, blob_settings: BlobSettings
+) -> str:
+    """Path to the blob storing the given table"""
+    return str(
         pathlib.PurePosixPath(blob_settings.folder_name)
         / dataset.value
         / TABLE_FILE_MAPPING[table]
     )
-    blob = get_blob(blob_settings.storage_url, blob_settings.container, filepath, token)
-    return pd.read_json(blob.decode("UTF-8"), orient="split")
+
+
+def _read_json(blob: bytes) -> pd.DataFrame:
+    """Convert a JSON blob to a dataframe"""
+    return schema.normalize(pd.read_json(blob.decode("UTF-8"), orient="split"))
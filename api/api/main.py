@@ -1,12 +1,19 @@
+# Standard library imports
+import asyncio
+
 # Third party imports
 from fastapi import FastAPI
 
 # Geo:N:G imports
 from api import __version__
+from api import config
+from api import data
 from api import routes
 from api.config.validators import get_blob_settings
 from api.config.validators import get_log_settings
 from api.config.validators import get_oauth_settings
+from api.utils import metrics
+from api.utils.compression import CompressionMiddleware
 from geong_common.log import logger
 
 # Call these here to trigger potential error at startup
@@ -16,6 +23,8 @@ get_log_settings()
 
 
 app = FastAPI()
+app.add_middleware(CompressionMiddleware, **config.api.compression.as_dict())
+app.middleware("http")(metrics.record_request)
 
 
 @app.middleware("http")
@@ -29,6 +38,46 @@ async def log_x_real_ip(request, call_next):
 app.include_router(routes.router)
 
 
+@app.on_event("startup")
+async def start_oidc_refresh():
+    """Load OIDC configuration and keep signing keys up to date in the background
+
+    Requests needing authentication wait until the configuration is loaded.
+    """
+    app.state.oidc_refresh = asyncio.create_task(
+        routes.oidc_provider.refresh_periodically()
+    )
+
+
+@app.on_event("shutdown")
+async def stop_oidc_refresh():
+    app.state.oidc_refresh.cancel()
+
+
+@app.on_event("startup")
+async def start_data_refresh():
+    """Check for new data in the background, so that requests find it prepared"""
+    interval = config.api.refresh.interval
+    app.state.data_refresh = None
+    if interval > 0:
+        app.state.data_refresh = asyncio.create_task(
+            data.refresh_periodically(
+                routes.oauth.client_credentials, get_blob_settings(), interval
+            )
+        )
+
+
+@app.on_event("shutdown")
+async def stop_data_refresh():
+    if app.state.data_refresh is not None:
+        app.state.data_refresh.cancel()
+
+
+@app.on_event("shutdown")
+async def remove_live_metrics():
+    metrics.mark_process_dead()
+
+
 @app.get("/health")
 async def health():
     return ""
@@ -37,3 +86,8 @@ async def health():
 @app.get("/version")
 async def version():
     return __version__
+
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.metrics_response()
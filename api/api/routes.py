@@ -1,18 +1,20 @@
 # Standard library imports
-import sys
-from functools import lru_cache
 from typing import Dict
 from typing import List
 from typing import Optional
 
 # Third party imports
+import pyarrow as pa
 import requests
 from azure.core.exceptions import ResourceNotFoundError
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
 from fastapi import Query
+from fastapi import Response
 from fastapi import Security
+from starlette.concurrency import run_in_threadpool
 
 # Geo:N:G imports
 from api import config
@@ -22,34 +24,49 @@ from api.config.validators import get_log_settings
 from api.config.validators import get_oauth_settings
 from api.data import DatasetName
 from api.data import TableName
-from api.data import get_dataframe_from_blob
+from api.data import get_versioned_model
+from api.data import get_versioned_table
+from api.utils import metrics
 from api.utils import oidc
 from api.utils.auth import Oauth
-from geong_common.data import models
+from api.utils.department import DepartmentLog
+from geong_common.data import encoding
 from geong_common.log import logger
 
 router = APIRouter()
 
 
-@lru_cache
-def get_oidc():
-    try:
-        return oidc.get_config(
-            f"{get_oauth_settings().authority}/.well-known/openid-configuration"
-        )
-    except oidc.OidcError as e:
-        sys.exit(f"{e}")
-
-
 def as_dict(keyvalues: List[str] = Query(default=[])) -> Dict[str, str]:
     """Parse a list of strings on the form ['key1=value1', ...] into a dictionary"""
     return dict(kv.split("=", maxsplit=1) for kv in keyvalues if "=" in kv)
 
 
-oauth = Oauth(get_oidc(), get_oauth_settings())
+oidc_provider = oidc.OidcProvider(
+    f"{get_oauth_settings().authority}/.well-known/openid-configuration",
+    **config.api.auth.oidc.as_dict(),
+)
+oauth = Oauth(
+    oidc_provider,
+    get_oauth_settings(),
+    cache_size=config.api.auth.verification_cache_size,
+)
+
+
+def table_response(data, accept: Optional[str]) -> Response:
+    """Encode a table using the media type negotiated with the Accept header"""
+    media_type = encoding.negotiate(accept)
+    with metrics.stage("serialization"):
+        try:
+            content = encoding.encode(data, media_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.warning(f"Could not encode table as {media_type}, using JSON: {e}")
+            media_type = encoding.JSON
+            content = encoding.encode(data, media_type)
 
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
 
-async def _user_department(token, url):
+
+def _user_department(token, url):
     r = requests.get(
         url,
         headers={"Authorization": f"Bearer {token}"},
@@ -60,15 +77,25 @@ async def _user_department(token, url):
         logger.error(f"user_department {url=}: {r.status_code}")
 
 
+async def _lookup_department(token):
+    user_token = await oauth.obo(token, scope="User.Read")
+    return await run_in_threadpool(
+        _user_department, user_token, config.api.ms_graph.url
+    )
+
+
+departments = DepartmentLog(
+    _lookup_department,
+    ttl=config.api.ms_graph.cache_ttl,
+    failure_ttl=config.api.ms_graph.failure_ttl,
+)
+
+
 async def log_dep(token, session_id):
+    """Log the department of the user, without waiting for it to be looked up"""
     if not get_log_settings().log_user_info:
         return
-    user_token = await oauth.obo(token, scope="User.Read")
-    dep = await _user_department(user_token, config.api.ms_graph.url)
-    if dep is not None:
-        logger.insights(f"Department: {dep}, SessionID: {session_id}")
-
-    return None
+    departments.log(token, session_id)
 
 
 @router.get("/data/{dataset}/{table}")
@@ -77,13 +104,31 @@ async def get_table(
     table: TableName,
     session_id: Optional[str] = "",
     filters: List[str] = Query(default=[]),
+    columns: List[str] = Query(default=[]),
+    sort: List[str] = Query(default=[]),
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=0),
     token: Optional[str] = Security(oauth),
     blob_settings: BlobSettings = Depends(get_blob_settings),
+    accept: Optional[str] = Header(default=None),
+    if_match: Optional[str] = Header(default=None),
 ):
+    """Get Geo:N:G data from a given dataset and table
+
+    Filters are given as key=value, where keys may use predicates like
+    column__in=a,b or column__lt=100. Only the given columns are returned, or all
+    columns if none are given.
+
+    Rows are sorted by the sort columns, prefixed with - for descending order.
+    Use offset and limit to get one page of the sorted rows. The total number of
+    rows matching the filters is returned in the X-Total-Count header, and the
+    version of the table in the ETag header. Clients reading several pages can
+    send that tag in If-Match, and get 412 Precondition Failed if the table has
+    changed since the first page.
+    """
     await log_dep(token, session_id)
-    """Get Geo:N:G data from a given dataset and table"""
     try:
-        geong_data = get_dataframe_from_blob(
+        version, geong_data = await get_versioned_table(
             dataset,
             table,
             await oauth.obo(token),
@@ -91,7 +136,28 @@ async def get_table(
         )
     except ResourceNotFoundError:
         raise HTTPException(status_code=500)
-    return models.filter_data(geong_data, as_dict(filters)).to_dict(orient="split")
+
+    etag = entity_tag(version)
+    if if_match is not None and not etag_matches(etag, if_match):
+        raise HTTPException(status_code=412, detail="The table has changed")
+
+    try:
+        with metrics.stage("filter_data"):
+            data, total = geong_data.page(
+                as_dict(filters),
+                columns=columns or None,
+                sort=sort,
+                offset=offset,
+                limit=limit,
+            )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid filters, columns or sort: {e}"
+        )
+    response = table_response(data, accept)
+    response.headers["X-Total-Count"] = str(total)
+    response.headers["ETag"] = etag
+    return response
 
 
 @router.get("/model/{dataset}")
@@ -100,16 +166,42 @@ async def run_model(
     session_id: Optional[str] = "",
     blob_settings: BlobSettings = Depends(get_blob_settings),
     token: Optional[str] = Security(oauth),
+    accept: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None),
 ):
-    """Run the model on the given dataset"""
+    """Run the model on the given dataset
+
+    The model is tagged with the version of the elements it is fitted to. Clients
+    sending that tag in If-None-Match get 304 Not Modified while it is current.
+    """
     await log_dep(token, session_id)
     try:
-        geong_data = get_dataframe_from_blob(
-            dataset,
-            TableName.elements,
-            await oauth.obo(token),
-            blob_settings,
+        version, model = await get_versioned_model(
+            dataset, await oauth.obo(token), blob_settings
         )
     except ResourceNotFoundError:
         raise HTTPException(status_code=500)
-    return models.calculate(geong_data, dataset).to_dict(orient="split")
+
+    etag = entity_tag(version)
+    if if_none_match is not None and etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+    response = table_response(model, accept)
+    response.headers["ETag"] = etag
+    return response
+
+
+def entity_tag(version: str) -> str:
+    """Represent a version as a quoted entity tag"""
+    version = version.strip('"')
+    return f'"{version}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Check if an entity tag is listed in an If-None-Match or If-Match header"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in (etag, "*"):
+            return True
+    return False
@@ -1,3 +1,12 @@
+# Standard library imports
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Tuple
+
 # Third party imports
 import jwt
 import requests
@@ -5,24 +14,102 @@ from fastapi import HTTPException
 from fastapi import Request
 from fastapi import status
 from fastapi.security import HTTPBearer
+from starlette.concurrency import run_in_threadpool
 
 # Geo:N:G imports
+from api.utils import metrics
 from geong_common.log import logger
 
 
+class UnknownKeyError(HTTPException):
+    """The token is signed with a key that is not known"""
+
+
+class _Verified(NamedTuple):
+    """A successfully verified token, valid until it expires"""
+
+    expires: float
+    kid: str
+    key: Any
+
+
+class VerificationCache:
+    """Remember verified tokens until they expire, dropping the least recently used
+
+    Tokens are stored by their hash, together with the key that verified them. A
+    cached verification is only used if the same key is still published for the
+    token's key ID, so that keys removed or replaced in the JWKS are re-checked.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, _Verified]" = OrderedDict()
+
+    def get(self, token, public_keys):
+        """Check if a token has already been verified with a current key"""
+        token_hash = _hash(token)
+        entry = self._entries.get(token_hash)
+        if entry is None:
+            return False
+        if entry.expires <= time.time() or public_keys.get(entry.kid) is not entry.key:
+            del self._entries[token_hash]
+            return False
+
+        self._entries.move_to_end(token_hash)
+        return True
+
+    def add(self, token, expires, kid, key):
+        """Remember that a token has been verified"""
+        if self.maxsize <= 0:
+            return
+        token_hash = _hash(token)
+        self._entries[token_hash] = _Verified(expires=expires, kid=kid, key=key)
+        self._entries.move_to_end(token_hash)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _hash(token):
+    """Hash tokens so that they are not kept in memory"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 class Oauth(HTTPBearer):
-    def __init__(self, oid_config, oauth_settings):
+    def __init__(self, oid_config, oauth_settings, cache_size=4096):
         super().__init__()
         self.oid_config = oid_config
         self.oauth_settings = oauth_settings
+        self.verified = VerificationCache(maxsize=cache_size)
+        self._app_tokens: Dict[str, Tuple[str, float]] = {}
 
     async def __call__(self, request: Request):
         ac = await super().__call__(request)
         token = ac.credentials
-        self.verify(token)
+        with metrics.stage("jwt_verify"):
+            try:
+                self.verify(token)
+            except UnknownKeyError:
+                # Signing keys may have been rotated or not loaded yet, refresh
+                # them and try again
+                refresh_keys = getattr(self.oid_config, "refresh_keys", None)
+                if refresh_keys is None:
+                    raise
+                await refresh_keys()
+                if not self.oid_config.is_loaded:
+                    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+                self.verify(token)
         return token
 
     def verify(self, token, decode=jwt.decode):
+        public_keys = getattr(self.oid_config, "public_keys", {})
+        is_cached = self.verified.get(token, public_keys)
+        metrics.cache_lookup("jwt", hit=is_cached)
+        if is_cached:
+            return
+
         try:
             jwt_header = jwt.get_unverified_header(token)
         except jwt.exceptions.DecodeError as e:
@@ -35,9 +122,9 @@ class Oauth(HTTPBearer):
         key = self.oid_config.public_keys.get(kid)
         if key is None:
             logger.warning(f"{key=}")
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+            raise UnknownKeyError(status_code=status.HTTP_403_FORBIDDEN)
         try:
-            decode(
+            claims = decode(
                 jwt=token,
                 key=key,
                 issuer=self.oid_config.issuer,
@@ -48,6 +135,11 @@ class Oauth(HTTPBearer):
             logger.warning(f"JWT decoding error: {e}")
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
+        # Only tokens that expire are cached
+        expires = claims.get("exp") if isinstance(claims, dict) else None
+        if isinstance(expires, (int, float)):
+            self.verified.add(token, expires=expires, kid=kid, key=key)
+
     async def obo(self, token, scope="https://storage.azure.com/user_impersonation"):
 
         data = (
@@ -58,12 +150,42 @@ class Oauth(HTTPBearer):
             + f"&scope={scope}"
             + "&requested_token_use=on_behalf_of"
         )
-        headers = {"content-type": "application/x-www-form-urlencoded"}
-        r = requests.post(
-            self.oid_config.token_endpoint,
-            str.encode(data),
-            headers=headers,
+        json = await self._request_token(data, stage="obo")
+        return json["access_token"]
+
+    async def client_credentials(self, scope="https://storage.azure.com/.default"):
+        """Get a token for the API itself, used for work done outside of requests
+
+        The token is reused until a minute before it expires.
+        """
+        access_token, expires = self._app_tokens.get(scope, (None, 0.0))
+        if access_token is not None and expires > time.time() + 60:
+            return access_token
+
+        if not getattr(self.oid_config, "is_loaded", True):
+            await self.oid_config.refresh_keys()
+        data = (
+            "grant_type=client_credentials"
+            + f"&client_id={self.oauth_settings.client_id}"
+            + f"&client_secret={self.oauth_settings.client_secret}"
+            + f"&scope={scope}"
         )
+        json = await self._request_token(data, stage="client_credentials")
+        access_token = json["access_token"]
+        expires = time.time() + float(json.get("expires_in", 0))
+        self._app_tokens[scope] = (access_token, expires)
+        return access_token
+
+    async def _request_token(self, data, stage):
+        """Request a token from the token endpoint of the OIDC provider"""
+        headers = {"content-type": "application/x-www-form-urlencoded"}
+        with metrics.stage(stage):
+            r = await run_in_threadpool(
+                requests.post,
+                self.oid_config.token_endpoint,
+                str.encode(data),
+                headers=headers,
+            )
         if r.status_code != 200:
             logger.error(r.text)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
@@ -78,4 +200,4 @@ class Oauth(HTTPBearer):
             logger.error("missing access_token")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-        return access_token
+        return json
@@ -0,0 +1,164 @@
+"""Compress responses based on the Accept-Encoding request header
+
+Supports gzip and, if the zstandard package is installed, zstd. Responses
+smaller than a minimum size are sent uncompressed.
+"""
+
+# Standard library imports
+import zlib
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+
+# Third party imports
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+try:
+    # Third party imports
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def available_encodings() -> Sequence[str]:
+    """List content encodings supported in the current environment"""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """Choose the content encoding to use, based on the Accept-Encoding header
+
+    The client's quality values are respected. Ties are broken by the order of
+    encodings, which is the server's preference.
+    """
+    quality_by_encoding: Dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, *params = [p.strip().lower() for p in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        quality_by_encoding[name] = quality
+
+    candidates = [
+        (quality_by_encoding.get(e, quality_by_encoding.get("*", 0.0)), -idx, e)
+        for idx, e in enumerate(encodings)
+    ]
+    quality, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
+
+
+def compressor(encoding: str, gzip_level: int = 6, zstd_level: int = 3):
+    """Create a streaming compressor object for the given encoding"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=zstd_level).compressobj()
+    return zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: Sequence[str] = ("zstd", "gzip"),
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [e for e in encodings if e in available_encodings()]
+        self.levels = {"gzip_level": gzip_level, "zstd_level": zstd_level}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+            encoding = choose_encoding(accept_encoding, self.encodings)
+            if encoding is not None:
+                responder = _CompressionResponder(
+                    self.app,
+                    encoding=encoding,
+                    minimum_size=self.minimum_size,
+                    **self.levels,
+                )
+                await responder(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+class _CompressionResponder:
+    """Compress one response, based on starlette.middleware.gzip"""
+
+    def __init__(self, app, encoding, minimum_size, **levels):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.levels = levels
+        self.send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.compress = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Don't send the initial message until we know the size of the body
+            self.initial_message = message
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            self.compress = "Content-Encoding" not in headers and (
+                more_body or len(body) >= self.minimum_size
+            )
+            if not self.compress:
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.compressor = compressor(self.encoding, **self.levels)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Stream the response, the final size is not known yet
+                del headers["Content-Length"]
+                message["body"] = self.compressor.compress(body)
+            else:
+                body = self.compressor.compress(body) + self.compressor.flush()
+                message["body"] = body
+                headers["Content-Length"] = str(len(message["body"]))
+
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if self.compress:
+            message["body"] = self.compressor.compress(body)
+            if not more_body:
+                message["body"] += self.compressor.flush()
+
+        await self.send(message)
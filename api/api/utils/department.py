@@ -0,0 +1,101 @@
+"""Log the department of users, looked up in the background
+
+Looking up a department needs an OBO exchange and a call to MS Graph. The lookup
+runs as a background task outside the request, and the result is cached per user
+for a while, so each user is looked up at most once per period. Failed lookups
+are only remembered for a short while, so that a passing MS Graph error does not
+hide the department for the whole period.
+"""
+
+# Standard library imports
+import asyncio
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+
+# Third party imports
+import jwt
+
+# Geo:N:G imports
+from geong_common.log import logger
+
+
+class _Department(NamedTuple):
+    """Department of one user, None while the lookup is running or if it failed"""
+
+    expires: float
+    name: Optional[str]
+
+
+class DepartmentLog:
+    """Log departments of users, cached per token subject"""
+
+    def __init__(
+        self,
+        lookup: Callable[[str], Awaitable[Optional[str]]],
+        ttl: float = 3600,
+        failure_ttl: float = 60,
+        maxsize: int = 10_000,
+    ):
+        self.lookup = lookup
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.maxsize = maxsize
+        self._departments: Dict[str, _Department] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def log(self, token: str, session_id: str) -> None:
+        """Log the department of the user, start a lookup if it is not known"""
+        subject = _subject(token)
+        department = self._departments.get(subject)
+        if department is not None and department.expires > time.monotonic():
+            if department.name is not None:
+                _log_department(department.name, session_id)
+            return
+
+        self._prune()
+        self._departments[subject] = _Department(time.monotonic() + self.ttl, None)
+        task = asyncio.create_task(self._lookup_and_log(token, subject, session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _lookup_and_log(self, token, subject, session_id):
+        """Look up the department of one user and log it"""
+        try:
+            name = await self.lookup(token)
+        except Exception as e:
+            logger.error(f"Could not look up department: {e}")
+            name = None
+
+        ttl = self.failure_ttl if name is None else self.ttl
+        self._departments[subject] = _Department(time.monotonic() + ttl, name)
+        if name is not None:
+            _log_department(name, session_id)
+
+    def _prune(self):
+        """Remove expired departments when the cache is full"""
+        if len(self._departments) < self.maxsize:
+            return
+        now = time.monotonic()
+        for subject, department in list(self._departments.items()):
+            if department.expires <= now:
+                del self._departments[subject]
+        while len(self._departments) >= self.maxsize:
+            del self._departments[next(iter(self._departments))]
+
+
+def _subject(token):
+    """Find the subject of a token that has already been verified"""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.exceptions.PyJWTError:
+        return token
+    return str(claims.get("oid") or claims.get("sub") or token)
+
+
+def _log_department(name, session_id):
+    logger.insights(f"Department: {name}, SessionID: {session_id}")
@@ -0,0 +1,185 @@
+"""Prometheus metrics for the API
+
+Request latencies are recorded per route and status code. Stages inside requests,
+like verifying tokens, downloading blobs and fitting models, are timed with
+`stage()`. The stage timings of each request are also sent to the client in a
+Server-Timing header. Cache lookups are counted per cache and result, so that hit
+ratios can be calculated as
+
+    rate(geong_api_cache_lookups_total{result="hit"}[5m])
+        / rate(geong_api_cache_lookups_total[5m])
+
+When the API runs several worker processes, PROMETHEUS_MULTIPROC_DIR is set and
+metrics are aggregated across workers.
+"""
+
+# Standard library imports
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+# Third party imports
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+# Geo:N:G imports
+from geong_common.data.cache import CacheStats
+
+REQUEST_LATENCY = Histogram(
+    "geong_api_request_duration_seconds",
+    "Time spent handling requests",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "geong_api_requests_in_flight",
+    "Number of requests currently being handled",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+STAGE_LATENCY = Histogram(
+    "geong_api_stage_duration_seconds",
+    "Time spent in stages of request handling",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+CACHE_LOOKUPS = Counter(
+    "geong_api_cache_lookups_total",
+    "Number of lookups in caches",
+    ["cache", "result"],
+)
+CACHE_SIZE = Gauge(
+    "geong_api_cache_size_bytes",
+    "Memory used by entries in memory-budgeted caches",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+CACHE_ENTRIES = Gauge(
+    "geong_api_cache_entries",
+    "Number of entries in memory-budgeted caches",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+CACHE_EVICTIONS = Counter(
+    "geong_api_cache_evictions_total",
+    "Number of entries evicted from memory-budgeted caches",
+    ["cache"],
+)
+DATASET_REFRESHES = Counter(
+    "geong_api_dataset_refreshes_total",
+    "Number of background checks for new data, by dataset and result",
+    ["dataset", "result"],
+)
+COMPUTATIONS_IN_FLIGHT = Gauge(
+    "geong_api_computations_in_flight",
+    "Number of downloads and model fits currently running",
+    multiprocess_mode="livesum",
+)
+
+
+# Evictions already counted, by cache
+_evictions: Dict[str, int] = {}
+
+# Seconds spent in each stage of the current request
+_stage_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "stage_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one stage of request handling, use as a context manager"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_LATENCY.labels(name).observe(seconds)
+        timings = _stage_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """Count one cache lookup"""
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def cache_stats(stats: CacheStats) -> None:
+    """Record the size of a memory-budgeted cache, used as its on_change callback"""
+    CACHE_SIZE.labels(stats.name).set(stats.size_bytes)
+    CACHE_ENTRIES.labels(stats.name).set(stats.entries)
+    new_evictions = stats.evictions - _evictions.get(stats.name, 0)
+    if new_evictions > 0:
+        CACHE_EVICTIONS.labels(stats.name).inc(new_evictions)
+    _evictions[stats.name] = stats.evictions
+
+
+def route_name(request: Request) -> str:
+    """Find the route template handling a request, like /data/{dataset}/{table}
+
+    Templates are used instead of paths to keep the number of labels bounded.
+    """
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """Format stage timings as a Server-Timing header, durations in milliseconds"""
+    metrics = [*timings.items(), ("total", total)]
+    return ", ".join(f"{name};dur={1000 * seconds:.1f}" for name, seconds in metrics)
+
+
+async def record_request(request: Request, call_next) -> Response:
+    """Middleware recording latency and the number of requests in flight
+
+    Stage timings are reported to the client in the Server-Timing header.
+    """
+    route = route_name(request)
+    status = 500
+    timings: Dict[str, float] = {}
+    _stage_timings.set(timings)
+    start = time.perf_counter()
+    with REQUESTS_IN_FLIGHT.labels(route).track_inprogress():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            seconds = time.perf_counter() - start
+            REQUEST_LATENCY.labels(request.method, route, status).observe(seconds)
+
+    response.headers["Server-Timing"] = server_timing(timings, seconds)
+    return response
+
+
+def metrics_response() -> Response:
+    """Expose all metrics in the Prometheus text format"""
+    if _is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    """Remove live gauges of a worker process that is shutting down"""
+    if _is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _is_multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
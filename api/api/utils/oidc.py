@@ -1,6 +1,9 @@
 # Standard library imports
+import asyncio
 import json
+import time
 from collections import namedtuple
+from typing import Optional
 
 # Third party imports
 import jwt
@@ -8,6 +11,10 @@ import requests
 from pydantic import BaseModel
 from pydantic import parse_obj_as
 from pydantic.error_wrappers import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+# Geo:N:G imports
+from geong_common.log import logger
 
 
 class OidcError(Exception):
@@ -25,6 +32,16 @@ class Oid(BaseModel):
 
 
 def get_config(url: str) -> dict:
+    m = get_discovery(url)
+    Oidc = namedtuple("Oidc", ["public_keys", "token_endpoint", "issuer"])
+    return Oidc(
+        public_keys=get_public_keys(m.jwks_uri),
+        token_endpoint=m.token_endpoint,
+        issuer=m.issuer,
+    )
+
+
+def get_discovery(url: str) -> Oid:
     try:
         r = requests.get(url)
     except requests.exceptions.ConnectionError:
@@ -34,21 +51,140 @@ def get_config(url: str) -> dict:
             f"Could not get config from oidc server: {url=} {r.status_code=}"
         )
     try:
-        m = parse_obj_as(Oid, r.json())
+        return parse_obj_as(Oid, r.json())
     except ValidationError as e:
         raise OidcError(str(e))
 
-    jwks = requests.get(m.jwks_uri)
+
+def get_public_keys(jwks_uri: str) -> dict:
+    try:
+        jwks = requests.get(jwks_uri)
+    except requests.exceptions.ConnectionError:
+        raise OidcError(f"Could not connect to jwks endpoint: {jwks_uri=}")
     if not jwks:
-        raise RuntimeError("Could not get jwks")
+        raise OidcError(f"Could not get jwks: {jwks_uri=} {jwks.status_code=}")
 
     public_keys = {}
     keys = [key for key in jwks.json()["keys"] if key["kty"] == "RSA"]
     for jwk in keys:
         kid = jwk["kid"]
         public_keys[kid] = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
+    return public_keys
 
-    Oidc = namedtuple("Oidc", ["public_keys", "token_endpoint", "issuer"])
-    return Oidc(
-        public_keys=public_keys, token_endpoint=m.token_endpoint, issuer=m.issuer
-    )
+
+def _keep_unchanged_keys(old_keys: dict, new_keys: dict) -> dict:
+    """Use the old key objects for keys that have not changed
+
+    Verified tokens are cached together with the key object that verified them,
+    so keeping the objects keeps the cache valid across refreshes.
+    """
+    return {
+        kid: old_keys[kid] if _same_key(old_keys.get(kid), key) else key
+        for kid, key in new_keys.items()
+    }
+
+
+def _same_key(old_key, new_key) -> bool:
+    """Check if two public keys have the same key material"""
+    if old_key is None:
+        return False
+    return old_key.public_numbers() == new_key.public_numbers()
+
+
+class OidcProvider:
+    """OIDC configuration and signing keys, loaded and refreshed in the background
+
+    Discovery and key requests run in a threadpool, so they don't block the event
+    loop. Failed requests are retried with exponential backoff. Until the
+    configuration is loaded, `is_loaded` is False.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        retries: int = 5,
+        retry_delay: float = 1.0,
+        refresh_interval: float = 3600,
+        min_refresh_interval: float = 60,
+    ):
+        self.url = url
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+
+        self.public_keys: dict = {}
+        self.token_endpoint: Optional[str] = None
+        self.issuer: Optional[str] = None
+        self.jwks_uri: Optional[str] = None
+        self._refreshed_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.jwks_uri is not None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Lock created lazily, so that it belongs to the running event loop"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def load(self) -> None:
+        """Read the discovery document and signing keys, with retries"""
+        m = await self._retry(get_discovery, self.url)
+        public_keys = await self._retry(get_public_keys, m.jwks_uri)
+        self.token_endpoint, self.issuer = m.token_endpoint, m.issuer
+        self.jwks_uri, self.public_keys = m.jwks_uri, public_keys
+        self._refreshed_at = time.monotonic()
+        logger.info(f"Loaded OIDC configuration with {len(public_keys)} keys")
+
+    async def refresh_keys(self, force: bool = False) -> bool:
+        """Refresh signing keys, at most once every min_refresh_interval seconds
+
+        Used when a token refers to an unknown key ID. The full configuration is
+        loaded if necessary. Concurrent calls wait for the same refresh. Returns
+        True if the keys were refreshed.
+        """
+        async with self.lock:
+            since_refresh = time.monotonic() - self._refreshed_at
+            if not force and since_refresh < self.min_refresh_interval:
+                return False
+            try:
+                if not self.is_loaded:
+                    await self.load()
+                else:
+                    public_keys = await run_in_threadpool(
+                        get_public_keys, self.jwks_uri
+                    )
+                    self.public_keys = _keep_unchanged_keys(
+                        self.public_keys, public_keys
+                    )
+                    self._refreshed_at = time.monotonic()
+                    logger.info(f"Refreshed {len(self.public_keys)} OIDC keys")
+            except (OidcError, requests.exceptions.RequestException) as e:
+                logger.error(f"Could not refresh OIDC keys: {e}")
+                self._refreshed_at = time.monotonic()
+                return False
+            return True
+
+    async def refresh_periodically(self) -> None:
+        """Load configuration and keep keys up to date, run as a background task"""
+        while True:
+            await self.refresh_keys(force=True)
+            delay = self.refresh_interval if self.is_loaded else self.retry_delay
+            await asyncio.sleep(delay)
+
+    async def _retry(self, func, *args):
+        """Call a blocking function in a threadpool, retry with backoff on errors"""
+        delay = self.retry_delay
+        for attempt in range(1, self.retries + 1):
+            try:
+                return await run_in_threadpool(func, *args)
+            except (OidcError, requests.exceptions.RequestException) as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"{e}, retrying in {delay} seconds")
+                await asyncio.sleep(delay)
+                delay *= 2
@@ -0,0 +1,47 @@
+"""Coalesce concurrent identical computations
+
+When several requests need the same expensive result at the same time, like
+downloading a table or fitting the models, only the first one starts the
+computation. The others wait for the result of the computation already in
+flight.
+"""
+
+# Standard library imports
+import asyncio
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+
+# Third party imports
+from starlette.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time"""
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function in a threadpool, or join the call in flight
+
+        All callers using the same key while the function is running get the same
+        result, or the same exception. Cancelling one caller does not cancel the
+        computation for the others.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        return await asyncio.shield(future)
+
+    def in_flight(self) -> int:
+        """Number of computations currently running"""
+        return len(self._in_flight)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        """Remove a finished computation, so the next call starts a new one"""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
@@ -0,0 +1,143 @@
+"""Share parsed tables between worker processes through memory-mapped files
+
+The first worker needing a version of a table publishes it as an uncompressed
+Arrow IPC file, typically under /dev/shm. Other workers memory-map the same file
+instead of downloading and parsing the table again. Numeric columns without
+missing values are used directly from the mapped memory. Other columns, like
+strings, are converted to pandas objects in each worker.
+
+Publishing is guarded by an exclusive file lock, so that only one worker creates
+each snapshot. Files are written to a temporary name and renamed when complete, so
+workers never see partial snapshots. Snapshots are mapped while holding a shared
+lock, and older versions of a table are only removed under the exclusive lock,
+once the background refresh has cached a new version. Workers already using an
+old version keep their mappings.
+
+With only one worker there is nothing to share, and snapshots are not used. All
+snapshots are removed when the workers start and stop, so that files left by
+earlier runs do not fill up the memory-backed file system.
+"""
+
+# Standard library imports
+import fcntl
+import hashlib
+import os
+import pathlib
+from contextlib import contextmanager
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+
+# Third party imports
+import pandas as pd
+import pyarrow as pa
+
+# Geo:N:G imports
+from geong_common.log import logger
+
+SUFFIX = ".arrow"
+TMP_SUFFIX = ".tmp"
+LOCK_NAME = ".lock"
+
+
+def is_enabled(directory: Optional[str], workers: int) -> bool:
+    """Snapshots are used by several workers, if the directory can be created"""
+    if not directory or workers <= 1:
+        return False
+    path = pathlib.Path(directory)
+    if path.is_dir():
+        return os.access(path, os.W_OK)
+    return path.parent.is_dir() and os.access(path.parent, os.W_OK)
+
+
+def snapshot_path(directory: str, name: str, version: str) -> pathlib.Path:
+    """Path to the snapshot of one version of a table"""
+    version_hash = hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+    return pathlib.Path(directory) / name / f"{version_hash}{SUFFIX}"
+
+
+def load_or_publish(
+    directory: str, name: str, version: str, create: Callable[[], pd.DataFrame]
+) -> pd.DataFrame:
+    """Attach to the snapshot of a table, create and publish it if necessary
+
+    Tables that can not be stored in Arrow format are returned without being
+    published.
+    """
+    path = snapshot_path(directory, name, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.parent / LOCK_NAME
+    with _file_lock(lock_path, shared=True):
+        if path.exists():
+            return load(path)
+
+    with _file_lock(lock_path):
+        if not path.exists():
+            data = create()
+            try:
+                _publish(path, data)
+            except pa.ArrowException as e:
+                logger.warning(f"Could not publish snapshot {path}: {e}")
+                return data
+        return load(path)
+
+
+def remove_other_versions(directory: str, name: str, version: str) -> None:
+    """Remove snapshots of a table, except the one of the given version"""
+    path = snapshot_path(directory, name, version)
+    if not path.parent.is_dir():
+        return
+    with _file_lock(path.parent / LOCK_NAME):
+        for old_path in path.parent.glob(f"*{SUFFIX}"):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+                logger.info(f"Removed snapshot {old_path}")
+
+
+def remove_all(directory: Optional[str]) -> None:
+    """Remove all snapshots, and their temporary and lock files
+
+    Only files created by this module are removed, as the directory may be shared
+    with other applications.
+    """
+    if not directory or not pathlib.Path(directory).is_dir():
+        return
+    num_removed = 0
+    for pattern in (f"*{SUFFIX}", f"*{TMP_SUFFIX}", LOCK_NAME):
+        for path in pathlib.Path(directory).rglob(pattern):
+            path.unlink(missing_ok=True)
+            num_removed += 1
+    if num_removed:
+        logger.info(f"Removed {num_removed} snapshot files from {directory}")
+
+
+def load(path: pathlib.Path) -> pd.DataFrame:
+    """Memory-map a snapshot, sharing memory with other workers where possible"""
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def _publish(path: pathlib.Path, data: pd.DataFrame) -> None:
+    """Write a snapshot atomically"""
+    table = pa.Table.from_pandas(data)
+    tmp_path = path.with_suffix(TMP_SUFFIX)
+    try:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    logger.info(f"Published snapshot {path} ({path.stat().st_size} bytes)")
+
+
+@contextmanager
+def _file_lock(path: pathlib.Path, shared: bool = False) -> Iterator[None]:
+    """Lock across processes, using an advisory lock on a file"""
+    with path.open(mode="a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
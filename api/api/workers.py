@@ -0,0 +1,52 @@
+"""Run the API in several worker processes sharing one socket
+
+Workers collect Prometheus metrics in a shared directory, so that /metrics reports
+totals for all workers whichever worker handles the request. Parsed tables are
+shared between workers through snapshots, see `api.utils.snapshots`.
+"""
+
+# Standard library imports
+import functools
+import os
+import shutil
+import tempfile
+
+# Third party imports
+from uvicorn import Config
+from uvicorn import Server
+from uvicorn.supervisors import Multiprocess
+
+# Geo:N:G imports
+from api import config
+from api.utils import snapshots
+from geong_common import log
+
+
+def run(server_config: Config, log_level: str) -> None:
+    """Start worker processes and supervise them until shut down"""
+    metrics_dir = None
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        metrics_dir = tempfile.mkdtemp(prefix="geong_api_metrics_")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    # Snapshots left by an earlier run are never used again
+    snapshots.remove_all(config.api.snapshots.path)
+
+    sock = server_config.bind_socket()
+    supervisor = Multiprocess(
+        server_config,
+        target=functools.partial(run_worker, server_config, log_level),
+        sockets=[sock],
+    )
+    try:
+        supervisor.run()
+    finally:
+        snapshots.remove_all(config.api.snapshots.path)
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def run_worker(server_config: Config, log_level: str, sockets=None) -> None:
+    """Run one worker process, logging is set up again in each process"""
+    log.init(log_level)
+    Server(server_config).run(sockets=sockets)
@@ -0,0 +1,60 @@
+"""Fixtures shared by the API tests"""
+
+# Standard library imports
+import os
+import subprocess
+import sys
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+# Third party imports
+import pytest
+
+
+def _import_time(
+    module: str, runs: int = 3, env: Optional[Dict[str, str]] = None
+) -> Tuple[float, Set[str]]:
+    """Fastest import time of a module in seconds, and the modules it imports
+
+    Imports are measured with `python -X importtime` in a fresh interpreter, like
+    when a server starts.
+    """
+    times = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            env=env,
+            text=True,
+        )
+        assert process.returncode == 0, process.stderr
+
+        imported = {}
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line.partition(":")[2].split("|")
+            imported[name.strip()] = int(cumulative) / 1_000_000
+        times.append(imported[module])
+    return min(times), set(imported)
+
+
+@pytest.fixture(scope="session")
+def import_time():
+    """Measure how long it takes to import a module"""
+    return _import_time
+
+
+@pytest.fixture(scope="session")
+def import_time_factor():
+    """Allowed slowdown compared to a developer machine, skips tests if not set
+
+    Set the CHECK_IMPORT_TIME environment variable to check import times against
+    their budgets, for instance to 2 on a runner twice as slow.
+    """
+    factor = os.environ.get("CHECK_IMPORT_TIME")
+    if not factor:
+        pytest.skip("Set CHECK_IMPORT_TIME to check import times")
+    return float(factor)
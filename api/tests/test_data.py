@@ -0,0 +1,243 @@
+# Standard library imports
+import asyncio
+import pathlib
+import time
+
+# Third party imports
+import pandas as pd
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ClientAuthenticationError
+from azure.core.exceptions import ResourceModifiedError
+
+# Geo:N:G imports
+from api import config
+from api import data
+from api.config.validators import BlobSettings
+from api.utils import snapshots
+from geong_common.data import schema
+from geong_common.data.cache import FrameCache
+
+TABLE = pd.DataFrame({"key": ["val0", "val1"], "num": [10, 20]})
+MODEL = pd.DataFrame({"key": ["val0"], "net_gross": [0.5]})
+
+
+def slow(seconds, return_value):
+    """Simulate slow downloads and model fits"""
+
+    def _slow(*args, **kwargs):
+        time.sleep(seconds)
+        return return_value
+
+    return _slow
+
+
+@pytest.fixture
+def blob_client(mocker, tmp_path):
+    mocker.patch.dict(config.api.snapshots.data, {"path": str(tmp_path / "shm")})
+    mocker.patch.object(data, "_CACHE", FrameCache(max_bytes=1_000_000))
+    client = mocker.MagicMock()
+    client.get_blob_properties.return_value.etag = "version-1"
+    client.download_blob.return_value.readall.side_effect = slow(
+        0.1, TABLE.to_json(orient="split").encode("UTF-8")
+    )
+    mocker.patch.object(data, "get_blob_client", return_value=client)
+    return client
+
+
+@pytest.fixture
+def calculate(mocker):
+    return mocker.patch.object(data.models, "calculate", side_effect=slow(0.1, MODEL))
+
+
+@pytest.fixture
+def blob_settings():
+    return BlobSettings(storage_url="http://storage", container="c", folder_name="f")
+
+
+def get_elements(blob_settings, token="token"):
+    return data.get_indexed_table(
+        data.DatasetName.deep, data.TableName.elements, token, blob_settings
+    )
+
+
+def test_table_is_cached(blob_client, blob_settings):
+    first = asyncio.run(get_elements(blob_settings))
+    second = asyncio.run(get_elements(blob_settings))
+
+    assert second is first
+    assert blob_client.get_blob_properties.call_count == 2
+    assert blob_client.download_blob.call_count == 1
+    expected = schema.normalize(TABLE).iloc[[1]]
+    pd.testing.assert_frame_equal(first.filter({"key": "val1"}), expected)
+
+
+def test_new_version_is_downloaded(blob_client, blob_settings):
+    first = asyncio.run(get_elements(blob_settings))
+    blob_client.get_blob_properties.return_value.etag = "version-2"
+    second = asyncio.run(get_elements(blob_settings))
+
+    assert second is not first
+    assert blob_client.download_blob.call_count == 2
+
+
+def test_download_is_pinned_to_version(mocker, blob_client, blob_settings):
+    properties = mocker.MagicMock(etag="version-1")
+    new_properties = mocker.MagicMock(etag="version-2")
+    blob_client.get_blob_properties.side_effect = [properties, new_properties]
+    download = blob_client.download_blob.return_value
+    blob_client.download_blob.side_effect = [
+        ResourceModifiedError("Blob changed"),
+        download,
+    ]
+    version, _ = asyncio.run(
+        data.get_versioned_table(
+            data.DatasetName.deep, data.TableName.elements, "token", blob_settings
+        )
+    )
+
+    assert version == "version-2"
+    assert [c.kwargs for c in blob_client.download_blob.call_args_list] == [
+        {"etag": "version-1", "match_condition": MatchConditions.IfNotModified},
+        {"etag": "version-2", "match_condition": MatchConditions.IfNotModified},
+    ]
+
+
+def test_concurrent_cold_requests_share_download_and_fit(
+    blob_client, calculate, blob_settings
+):
+    num_requests = 20
+
+    async def load():
+        return await asyncio.gather(
+            *[
+                data.get_model(data.DatasetName.deep, f"token-{idx}", blob_settings)
+                for idx in range(num_requests)
+            ]
+        )
+
+    results = asyncio.run(load())
+
+    assert all(result is MODEL for result in results)
+    assert blob_client.get_blob_properties.call_count == num_requests
+    assert blob_client.download_blob.call_count == 1
+    assert calculate.call_count == 1
+
+
+def test_authorization_is_checked_for_each_caller(mocker, blob_client, blob_settings):
+    denied = mocker.MagicMock()
+    denied.get_blob_properties.side_effect = ClientAuthenticationError("Denied")
+    mocker.patch.object(
+        data,
+        "get_blob_client",
+        side_effect=lambda *args: denied if args[-1] == "denied" else blob_client,
+    )
+
+    async def load():
+        return await asyncio.gather(
+            get_elements(blob_settings, token="allowed"),
+            get_elements(blob_settings, token="denied"),
+            get_elements(blob_settings, token="allowed"),
+            return_exceptions=True,
+        )
+
+    allowed, denied_result, allowed_again = asyncio.run(load())
+
+    assert isinstance(denied_result, ClientAuthenticationError)
+    assert allowed_again is allowed
+    assert blob_client.download_blob.call_count == 1
+
+
+def test_other_workers_attach_to_snapshot(mocker, blob_client, blob_settings):
+    mocker.patch.dict(config.api.server.data, {"workers": 2})
+    first = asyncio.run(get_elements(blob_settings))
+    data._CACHE.clear()  # Simulate another worker
+    second = asyncio.run(get_elements(blob_settings))
+
+    assert second is not first
+    assert blob_client.download_blob.call_count == 1
+    pd.testing.assert_frame_equal(second.data, first.data)
+
+
+def test_snapshots_can_be_disabled(mocker, blob_client, blob_settings):
+    mocker.patch.dict(config.api.server.data, {"workers": 2})
+    mocker.patch.dict(config.api.snapshots.data, {"path": ""})
+    asyncio.run(get_elements(blob_settings))
+    data._CACHE.clear()
+    asyncio.run(get_elements(blob_settings))
+
+    assert blob_client.download_blob.call_count == 2
+
+
+def test_snapshots_not_used_by_one_worker(mocker, blob_client, blob_settings):
+    mocker.patch.dict(config.api.server.data, {"workers": 1})
+    asyncio.run(get_elements(blob_settings))
+
+    assert not pathlib.Path(config.api.snapshots.path).exists()
+
+
+def refresh(blob_settings):
+    asyncio.run(data.refresh("service-token", blob_settings))
+
+
+def test_refresh_prepares_tables_and_models(
+    mocker, blob_client, calculate, blob_settings
+):
+    mocker.patch.dict(config.api.refresh.data, {"index_columns": ["key", "missing"]})
+    refresh(blob_settings)
+    model = asyncio.run(data.get_model(data.DatasetName.deep, "token", blob_settings))
+    elements = asyncio.run(get_elements(blob_settings))
+
+    assert model is MODEL
+    assert calculate.call_count == len(data.DatasetName)
+    num_tables = len(data.DatasetName) * len(data.TableName)
+    assert blob_client.download_blob.call_count == num_tables
+    assert list(elements._indexes) == ["key"]
+
+
+def test_refresh_skips_unchanged_tables(blob_client, calculate, blob_settings):
+    refresh(blob_settings)
+    refresh(blob_settings)
+
+    assert calculate.call_count == len(data.DatasetName)
+    num_tables = len(data.DatasetName) * len(data.TableName)
+    assert blob_client.download_blob.call_count == num_tables
+
+
+def test_refresh_swaps_in_new_version(blob_client, calculate, blob_settings):
+    refresh(blob_settings)
+    old_elements = asyncio.run(get_elements(blob_settings))
+    blob_client.get_blob_properties.return_value.etag = "version-2"
+    refresh(blob_settings)
+    new_elements = asyncio.run(get_elements(blob_settings))
+
+    assert new_elements is not old_elements
+    pd.testing.assert_frame_equal(old_elements.data, new_elements.data)
+    assert data._CACHE.get((data.DatasetName.deep, "model"))[0] == "version-2"
+    num_tables = len(data.DatasetName) * len(data.TableName)
+    assert blob_client.download_blob.call_count == 2 * num_tables
+
+
+def test_refresh_removes_old_snapshots(mocker, blob_client, calculate, blob_settings):
+    mocker.patch.dict(config.api.server.data, {"workers": 2})
+    refresh(blob_settings)
+    blob_client.get_blob_properties.return_value.etag = "version-2"
+    asyncio.run(get_elements(blob_settings))
+    snapshot_dir = config.api.snapshots.path
+
+    def exists(version):
+        return snapshots.snapshot_path(snapshot_dir, "deep/elements", version).exists()
+
+    assert exists("version-1") and exists("version-2")
+    refresh(blob_settings)
+    assert not exists("version-1") and exists("version-2")
+
+
+def test_cache_stays_within_budget(mocker, blob_client, calculate, blob_settings):
+    table_size = len(TABLE.to_json())  # Rough estimate, well below memory usage
+    mocker.patch.object(data, "_CACHE", FrameCache(max_bytes=10 * table_size))
+    asyncio.run(data.refresh("service-token", blob_settings))
+    stats = data._CACHE.stats()
+
+    assert stats.size_bytes <= stats.max_bytes
+    assert stats.evictions > 0
@@ -0,0 +1,52 @@
+"""Test that the API starts quickly
+
+Slow libraries should only be imported when first used. The import time is
+recorded in the test report. It is checked against the budget when the
+CHECK_IMPORT_TIME environment variable is set, with the budget multiplied by its
+value to allow for slower machines. The unit test workflow sets it.
+"""
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Seconds allowed for importing api.main on a developer machine, about 2.5 times
+# the time it takes today
+BUDGET = 1.5
+
+# Libraries that are slow to import, and not needed to start the API
+LAZY_MODULES = ["azure.storage.blob", "opencensus", "pptx", "statsmodels"]
+
+# Mandatory settings, checked when the API is imported
+SETTINGS = {
+    "AUTHORITY": "https://login.example.com/tenant",
+    "CLIENT_ID": "client",
+    "CLIENT_SECRET": "secret",
+    "AUDIENCE": "audience",
+    "STORAGE_URL": "https://storage.example.com",
+    "CONTAINER": "container",
+    "FOLDER_NAME": "folder",
+}
+
+
+@pytest.fixture(scope="module")
+def api_import(import_time):
+    return import_time("api.main", env={**os.environ, **SETTINGS})
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_slow_libraries_are_imported_lazily(api_import, module):
+    _, imported = api_import
+    assert module not in imported
+
+
+def test_import_time_is_recorded(api_import, record_property):
+    seconds, _ = api_import
+    record_property("import_time", seconds)
+
+
+def test_import_time_within_budget(api_import, import_time_factor):
+    seconds, _ = api_import
+    assert seconds < BUDGET * import_time_factor
@@ -1,9 +1,13 @@
 # Standard library imports
+import asyncio
+import time
 from collections import namedtuple
 from unittest.mock import Mock
 
 # Third party imports
+import jwt
 import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi.exceptions import HTTPException
 
 # Geo:N:G imports
@@ -65,3 +69,89 @@ def test_ok():
     mock.method.assert_called_with(
         jwt=some_token, key=key, audience=audience, algorithms=["RS256"], issuer=""
     )
+
+
+@pytest.fixture
+def signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def rs256_oauth(signing_key):
+    Oidc = namedtuple("_", ["public_keys", "token_endpoint", "issuer"])
+    oid_config = Oidc(
+        public_keys={"id": signing_key.public_key()}, token_endpoint="", issuer="iss"
+    )
+    oauth_settings = namedtuple("_", ["audience"])(audience="aud")
+    return auth.Oauth(oid_config=oid_config, oauth_settings=oauth_settings)
+
+
+def rs256_token(signing_key, expires_in=3600):
+    claims = {"iss": "iss", "aud": "aud", "exp": int(time.time()) + expires_in}
+    return jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": "id"})
+
+
+def test_verified_token_is_cached(rs256_oauth, signing_key):
+    decode = Mock(side_effect=jwt.decode)
+    token = rs256_token(signing_key)
+    rs256_oauth.verify(token, decode=decode)
+    rs256_oauth.verify(token, decode=decode)
+
+    assert decode.call_count == 1
+    assert len(rs256_oauth.verified) == 1
+
+
+def test_invalid_token_is_not_cached(rs256_oauth, signing_key):
+    token = rs256_token(signing_key, expires_in=-10)
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            rs256_oauth.verify(token)
+
+    assert len(rs256_oauth.verified) == 0
+
+
+def test_cached_token_expires(signing_key):
+    cache = auth.VerificationCache()
+    public_keys = {"id": signing_key.public_key()}
+    cache.add("token", expires=time.time() - 1, kid="id", key=public_keys["id"])
+
+    assert not cache.get("token", public_keys)
+    assert len(cache) == 0
+
+
+def test_rotated_key_is_rechecked(rs256_oauth, signing_key):
+    token = rs256_token(signing_key)
+    rs256_oauth.verify(token)
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    rs256_oauth.oid_config.public_keys["id"] = new_key.public_key()
+
+    with pytest.raises(HTTPException) as e:
+        rs256_oauth.verify(token)
+    assert e.value.status_code == 403
+
+
+def test_cache_is_bounded():
+    cache = auth.VerificationCache(maxsize=2)
+    public_keys = {"id": "key"}
+    for token in ("first", "second", "third"):
+        cache.add(token, expires=time.time() + 60, kid="id", key="key")
+
+    assert len(cache) == 2
+    assert not cache.get("first", public_keys)
+    assert cache.get("third", public_keys)
+
+
+def test_client_credentials_token_is_reused(mocker):
+    Oidc = namedtuple("_", ["public_keys", "token_endpoint", "issuer"])
+    oid_config = Oidc(public_keys={}, token_endpoint="http://token", issuer="")
+    oauth_settings = namedtuple("_", ["client_id", "client_secret"])("id", "secret")
+    oauth = auth.Oauth(oid_config=oid_config, oauth_settings=oauth_settings)
+    post = mocker.patch.object(auth.requests, "post")
+    post.return_value.status_code = 200
+    post.return_value.json.return_value = {"access_token": "app", "expires_in": 3600}
+
+    async def get_tokens():
+        return [await oauth.client_credentials() for _ in range(3)]
+
+    assert asyncio.run(get_tokens()) == ["app", "app", "app"]
+    assert post.call_count == 1
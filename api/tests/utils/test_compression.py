@@ -0,0 +1,90 @@
+# Third party imports
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+# Geo:N:G imports
+from api.utils import compression
+
+LARGE_BODY = b"Lobe Complex, Good 65-85% NG\n" * 1000
+SMALL_BODY = b"Lobe"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return Response(LARGE_BODY, media_type="text/plain")
+
+    @app.get("/small")
+    def small():
+        return Response(SMALL_BODY, media_type="text/plain")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([LARGE_BODY, LARGE_BODY]))
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, zstd", "zstd"),
+        ("zstd;q=0.5, gzip", "gzip"),
+        ("zstd;q=0, *", "gzip"),
+        ("*", "zstd"),
+        ("br", None),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    encodings = ["zstd", "gzip"]
+    assert compression.choose_encoding(accept_encoding, encodings) == expected
+
+
+def test_gzip(client):
+    r = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert int(r.headers["Content-Length"]) < len(LARGE_BODY) / 10
+    assert r.content == LARGE_BODY
+
+
+def test_zstd(client):
+    r = client.get("/large", headers={"Accept-Encoding": "zstd"})
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    assert r.headers["Content-Encoding"] == "zstd"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert decompressor.decompress(r.content) == LARGE_BODY
+
+
+def test_small_response_not_compressed(client):
+    r = client.get("/small", headers={"Accept-Encoding": "gzip, zstd"})
+
+    assert "Content-Encoding" not in r.headers
+    assert r.content == SMALL_BODY
+
+
+def test_no_accept_encoding(client):
+    r = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in r.headers
+    assert r.content == LARGE_BODY
+
+
+def test_streaming_response(client):
+    r = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in r.headers
+    assert r.content == 2 * LARGE_BODY
@@ -0,0 +1,96 @@
+# Standard library imports
+import asyncio
+
+# Third party imports
+import jwt
+import pytest
+
+# Geo:N:G imports
+from api.utils.department import DepartmentLog
+
+
+def token_for(subject):
+    return jwt.encode({"sub": subject}, "secret", algorithm="HS256")
+
+
+def test_lookup_once_per_user():
+    lookups = []
+
+    async def lookup(token):
+        lookups.append(token)
+        await asyncio.sleep(0.01)
+        return "Department"
+
+    async def run():
+        departments = DepartmentLog(lookup, ttl=60)
+        for _ in range(3):
+            departments.log(token_for("user"), session_id="session")
+        departments.log(token_for("other"), session_id="session")
+        await asyncio.sleep(0.05)
+        departments.log(token_for("user"), session_id="session")
+
+    asyncio.run(run())
+
+    assert lookups == [token_for("user"), token_for("other")]
+
+
+def test_log_does_not_wait_for_lookup():
+    finished = []
+
+    async def lookup(token):
+        await asyncio.sleep(0.05)
+        finished.append(token)
+        return "Department"
+
+    async def run():
+        departments = DepartmentLog(lookup, ttl=60)
+        departments.log(token_for("user"), session_id="session")
+        lookup_done_at_return = bool(finished)
+        await asyncio.sleep(0.1)
+        return lookup_done_at_return
+
+    assert asyncio.run(run()) is False
+
+
+def test_expired_department_is_looked_up_again():
+    lookups = []
+
+    async def lookup(token):
+        lookups.append(token)
+        return "Department"
+
+    async def run():
+        departments = DepartmentLog(lookup, ttl=0)
+        departments.log(token_for("user"), session_id="session")
+        await asyncio.sleep(0.01)
+        departments.log(token_for("user"), session_id="session")
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert len(lookups) == 2
+
+
+@pytest.mark.parametrize("error", [RuntimeError("MS Graph unavailable"), None])
+def test_failed_lookup_is_retried_after_failure_ttl(error):
+    lookups = []
+
+    async def lookup(token):
+        lookups.append(token)
+        if error is not None:
+            raise error
+        return None
+
+    async def run(failure_ttl):
+        departments = DepartmentLog(lookup, ttl=60, failure_ttl=failure_ttl)
+        departments.log(token_for("user"), session_id="session")
+        await asyncio.sleep(0.01)
+        departments.log(token_for("user"), session_id="session")
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run(failure_ttl=60))
+    assert len(lookups) == 1
+
+    lookups.clear()
+    asyncio.run(run(failure_ttl=0))
+    assert len(lookups) == 2
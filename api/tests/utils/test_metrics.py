@@ -0,0 +1,86 @@
+# Third party imports
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+# Geo:N:G imports
+from api.utils import metrics
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.middleware("http")(metrics.record_request)
+
+    @app.get("/data/{table}")
+    def data(table: str):
+        with metrics.stage("filter_data"):
+            metrics.cache_lookup("table", hit=table == "cached")
+        return table
+
+    @app.get("/metrics")
+    def get_metrics():
+        return metrics.metrics_response()
+
+    return TestClient(app)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_latency_per_route(client):
+    labels = {"method": "GET", "route": "/data/{table}", "status": "200"}
+    before = sample("geong_api_request_duration_seconds_count", **labels)
+    client.get("/data/elements")
+    client.get("/data/systems")
+
+    assert sample("geong_api_request_duration_seconds_count", **labels) == before + 2
+
+
+def test_unknown_routes_are_grouped(client):
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = sample("geong_api_request_duration_seconds_count", **labels)
+    client.get("/unknown/path")
+
+    assert sample("geong_api_request_duration_seconds_count", **labels) == before + 1
+
+
+def test_stages_and_cache_lookups(client):
+    stage_before = sample("geong_api_stage_duration_seconds_count", stage="filter_data")
+    hits_before = sample("geong_api_cache_lookups_total", cache="table", result="hit")
+    client.get("/data/cached")
+
+    assert (
+        sample("geong_api_stage_duration_seconds_count", stage="filter_data")
+        == stage_before + 1
+    )
+    assert (
+        sample("geong_api_cache_lookups_total", cache="table", result="hit")
+        == hits_before + 1
+    )
+
+
+def test_metrics_endpoint(client):
+    r = client.get("/metrics")
+
+    assert r.headers["Content-Type"].startswith("text/plain")
+    assert "geong_api_request_duration_seconds_bucket" in r.text
+    assert "geong_api_requests_in_flight" in r.text
+
+
+def test_server_timing_header(client):
+    r = client.get("/data/elements")
+    timings = dict(
+        metric.strip().split(";dur=")
+        for metric in r.headers["Server-Timing"].split(",")
+    )
+
+    assert list(timings) == ["filter_data", "total"]
+    assert float(timings["filter_data"]) <= float(timings["total"])
+
+
+def test_server_timing_format():
+    header = metrics.server_timing({"obo": 0.0123, "blob_download": 0.5}, total=0.6)
+    assert header == "obo;dur=12.3, blob_download;dur=500.0, total;dur=600.0"
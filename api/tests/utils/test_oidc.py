@@ -1,9 +1,24 @@
+# Standard library imports
+import asyncio
+import json
+import time
+from collections import namedtuple
+
 # Third party imports
+import jwt
 import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.exceptions import HTTPException
+from starlette.requests import Request
 
 # Geo:N:G imports
+from api.utils import auth
 from api.utils import oidc
 
+DISC_URL = "http://disc"
+JWKS_URL = "http://jwks"
+DISC_BODY = {"jwks_uri": JWKS_URL, "issuer": "iss", "token_endpoint": "endpoint"}
+
 
 def test_disc_body_invalid(requests_mock):
     disc_url = "http://disc"
@@ -41,3 +56,154 @@ def test_jwks(requests_mock):
     config = oidc.get_config(disc_url)
     for k in ["public_keys", "token_endpoint"]:
         assert k in config._asdict().keys()
+
+
+def jwks_body(*signing_keys):
+    keys = []
+    for kid, signing_key in signing_keys:
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(signing_key.public_key()))
+        keys.append({**jwk, "kid": kid})
+    return {"keys": keys}
+
+
+@pytest.fixture
+def signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def test_provider_retries_discovery(requests_mock, signing_key):
+    requests_mock.get(DISC_URL, [{"status_code": 503}, {"json": DISC_BODY}])
+    requests_mock.get(JWKS_URL, json=jwks_body(("id", signing_key)))
+    provider = oidc.OidcProvider(DISC_URL, retry_delay=0)
+    asyncio.run(provider.load())
+
+    assert provider.is_loaded
+    assert provider.token_endpoint == "endpoint"
+    assert list(provider.public_keys) == ["id"]
+
+
+def test_provider_gives_up_after_retries(requests_mock):
+    requests_mock.get(DISC_URL, status_code=503)
+    provider = oidc.OidcProvider(DISC_URL, retries=3, retry_delay=0)
+    with pytest.raises(oidc.OidcError):
+        asyncio.run(provider.load())
+
+    assert requests_mock.call_count == 3
+    assert not provider.is_loaded
+
+
+def test_provider_refresh_is_rate_limited(requests_mock, signing_key):
+    requests_mock.get(DISC_URL, json=DISC_BODY)
+    jwks = requests_mock.get(JWKS_URL, json=jwks_body(("id", signing_key)))
+    provider = oidc.OidcProvider(DISC_URL, min_refresh_interval=60)
+
+    async def refresh():
+        await provider.load()
+        return [await provider.refresh_keys(), await provider.refresh_keys(force=True)]
+
+    assert asyncio.run(refresh()) == [False, True]
+    assert jwks.call_count == 2
+
+
+def test_refresh_keeps_unchanged_keys(requests_mock, signing_key):
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    requests_mock.get(DISC_URL, json=DISC_BODY)
+    requests_mock.get(
+        JWKS_URL,
+        [
+            {"json": jwks_body(("same", signing_key), ("rotated", signing_key))},
+            {"json": jwks_body(("same", signing_key), ("rotated", new_key))},
+        ],
+    )
+    provider = oidc.OidcProvider(DISC_URL)
+
+    async def refresh():
+        await provider.load()
+        keys = dict(provider.public_keys)
+        await provider.refresh_keys(force=True)
+        return keys
+
+    old_keys = asyncio.run(refresh())
+    assert provider.public_keys["same"] is old_keys["same"]
+    assert provider.public_keys["rotated"] is not old_keys["rotated"]
+
+
+def test_cached_token_survives_refresh(requests_mock, signing_key):
+    requests_mock.get(DISC_URL, json=DISC_BODY)
+    requests_mock.get(JWKS_URL, json=jwks_body(("id", signing_key)))
+    provider = oidc.OidcProvider(DISC_URL)
+    oauth_settings = namedtuple("_", ["audience"])(audience="aud")
+    oauth = auth.Oauth(oid_config=provider, oauth_settings=oauth_settings)
+    claims = {"iss": "iss", "aud": "aud", "exp": int(time.time()) + 3600}
+    token = jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": "id"})
+
+    async def verify_and_refresh():
+        await provider.load()
+        oauth.verify(token)
+        await provider.refresh_keys(force=True)
+
+    asyncio.run(verify_and_refresh())
+    assert oauth.verified.get(token, provider.public_keys)
+
+
+def test_unknown_kid_refreshes_keys(requests_mock, signing_key):
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    requests_mock.get(DISC_URL, json=DISC_BODY)
+    requests_mock.get(
+        JWKS_URL,
+        [
+            {"json": jwks_body(("old", signing_key))},
+            {"json": jwks_body(("old", signing_key), ("new", new_key))},
+        ],
+    )
+    provider = oidc.OidcProvider(DISC_URL, min_refresh_interval=0)
+    oauth_settings = namedtuple("_", ["audience"])(audience="aud")
+    oauth = auth.Oauth(oid_config=provider, oauth_settings=oauth_settings)
+    claims = {"iss": "iss", "aud": "aud", "exp": int(time.time()) + 3600}
+    token = jwt.encode(claims, new_key, algorithm="RS256", headers={"kid": "new"})
+    request = Request(
+        {"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]}
+    )
+
+    async def authenticate():
+        await provider.load()
+        return await oauth(request)
+
+    assert asyncio.run(authenticate()) == token
+    assert list(provider.public_keys) == ["old", "new"]
+
+
+def test_unknown_kid_is_rejected_after_refresh(requests_mock, signing_key):
+    requests_mock.get(DISC_URL, json=DISC_BODY)
+    requests_mock.get(JWKS_URL, json=jwks_body(("old", signing_key)))
+    provider = oidc.OidcProvider(DISC_URL, min_refresh_interval=0)
+    oauth_settings = namedtuple("_", ["audience"])(audience="aud")
+    oauth = auth.Oauth(oid_config=provider, oauth_settings=oauth_settings)
+    claims = {"iss": "iss", "aud": "aud", "exp": int(time.time()) + 3600}
+    token = jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": "new"})
+    request = Request(
+        {"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]}
+    )
+
+    async def authenticate():
+        await provider.load()
+        return await oauth(request)
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(authenticate())
+    assert e.value.status_code == 403
+
+
+def test_unavailable_oidc_server(requests_mock):
+    requests_mock.get(DISC_URL, status_code=503)
+    provider = oidc.OidcProvider(DISC_URL, retries=1, min_refresh_interval=0)
+    oauth = auth.Oauth(oid_config=provider, oauth_settings=None)
+    token = """eyJhbGciOiJIUzI1NiIsImtpZCI6ImlkIn0\
+.e30.rHWCMy2sWIp8pohPfD5Tx5QhjlJqPYlR6WAhVB8pmOI"""
+    request = Request(
+        {"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]}
+    )
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(oauth(request))
+    assert e.value.status_code == 503
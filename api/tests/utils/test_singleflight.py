@@ -0,0 +1,66 @@
+# Standard library imports
+import asyncio
+import time
+
+# Third party imports
+import pytest
+
+# Geo:N:G imports
+from api.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_are_coalesced():
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        time.sleep(0.05)
+        return value * 2
+
+    async def run():
+        single_flight = SingleFlight()
+        results = await asyncio.gather(
+            *[single_flight.run("key", compute, 21) for _ in range(10)]
+        )
+        return results, single_flight.in_flight()
+
+    results, in_flight = asyncio.run(run())
+
+    assert results == [42] * 10
+    assert calls == [21]
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    async def run():
+        single_flight = SingleFlight()
+        return await asyncio.gather(
+            single_flight.run("a", lambda: "a"), single_flight.run("b", lambda: "b")
+        )
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+
+def test_exceptions_are_shared_and_forgotten():
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.05)
+        raise ValueError("Failed")
+
+    async def run():
+        single_flight = SingleFlight()
+        results = await asyncio.gather(
+            single_flight.run("key", fail),
+            single_flight.run("key", fail),
+            return_exceptions=True,
+        )
+        with pytest.raises(ValueError):
+            await single_flight.run("key", fail)
+        return results
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 2
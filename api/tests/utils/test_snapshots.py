@@ -0,0 +1,100 @@
+# Standard library imports
+import threading
+
+# Third party imports
+import pandas as pd
+import pytest
+
+# Geo:N:G imports
+from api.utils import snapshots
+
+TABLE = pd.DataFrame(
+    {"key": ["val0", "val1", None], "num": [10, 20, 30], "ratio": [0.1, 0.2, 0.3]}
+)
+
+
+@pytest.fixture
+def create(mocker):
+    return mocker.Mock(return_value=TABLE)
+
+
+def test_snapshot_is_published_once(tmp_path, create):
+    first = snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+    second = snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+
+    assert create.call_count == 1
+    pd.testing.assert_frame_equal(first, TABLE)
+    pd.testing.assert_frame_equal(second, TABLE)
+
+
+def test_numeric_columns_are_memory_mapped(tmp_path, create):
+    table = snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+
+    # Arrays backed by the memory-mapped file are read-only
+    assert not table["num"].to_numpy().flags.writeable
+    assert not table["ratio"].to_numpy().flags.writeable
+
+
+def test_versions_are_kept_when_publishing(tmp_path, create):
+    snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+    snapshots.load_or_publish(str(tmp_path), "deep/elements", "v2", create)
+    table = snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+
+    assert create.call_count == 2
+    pd.testing.assert_frame_equal(table, TABLE)
+
+
+def test_remove_other_versions(tmp_path, create):
+    snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+    snapshots.load_or_publish(str(tmp_path), "deep/elements", "v2", create)
+    snapshots.load_or_publish(str(tmp_path), "shallow/elements", "v1", create)
+    snapshots.remove_other_versions(str(tmp_path), "deep/elements", "v2")
+
+    assert not snapshots.snapshot_path(str(tmp_path), "deep/elements", "v1").exists()
+    assert snapshots.snapshot_path(str(tmp_path), "deep/elements", "v2").exists()
+    assert snapshots.snapshot_path(str(tmp_path), "shallow/elements", "v1").exists()
+
+
+def test_remove_other_versions_waits_for_loads(tmp_path, create):
+    path = snapshots.snapshot_path(str(tmp_path), "deep/elements", "v2")
+    snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+    with snapshots._file_lock(path.parent / snapshots.LOCK_NAME, shared=True):
+        remover = threading.Thread(
+            target=snapshots.remove_other_versions,
+            args=(str(tmp_path), "deep/elements", "v2"),
+        )
+        remover.start()
+        remover.join(timeout=0.2)
+        assert remover.is_alive()
+        assert snapshots.snapshot_path(str(tmp_path), "deep/elements", "v1").exists()
+    remover.join()
+
+    assert not snapshots.snapshot_path(str(tmp_path), "deep/elements", "v1").exists()
+
+
+def test_unsupported_table_is_not_published(tmp_path, mocker):
+    mixed = pd.DataFrame({"mixed": [1, "one"]})
+    create = mocker.Mock(return_value=mixed)
+    table = snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+
+    assert table is mixed
+    assert not snapshots.snapshot_path(str(tmp_path), "deep/elements", "v1").exists()
+
+
+def test_is_enabled(tmp_path):
+    assert snapshots.is_enabled(str(tmp_path / "snapshots"), workers=2)
+    assert not snapshots.is_enabled(str(tmp_path / "snapshots"), workers=1)
+    assert not snapshots.is_enabled("", workers=2)
+    assert not snapshots.is_enabled(str(tmp_path / "missing" / "snapshots"), workers=2)
+
+
+def test_remove_all(tmp_path, create):
+    snapshots.load_or_publish(str(tmp_path), "deep/elements", "v1", create)
+    snapshots.load_or_publish(str(tmp_path), "shallow/elements", "v1", create)
+    other_file = tmp_path / "other.txt"
+    other_file.write_text("Not a snapshot")
+    snapshots.remove_all(str(tmp_path))
+
+    assert not list(tmp_path.rglob(f"*{snapshots.SUFFIX}"))
+    assert not list(tmp_path.rglob(snapshots.LOCK_NAME))
+    assert other_file.exists()
@@ -0,0 +1,12 @@
+"""Hooks called by the Bokeh server when serving the app directory
+
+See https://docs.bokeh.org/en/2.4.3/docs/user_guide/server.html#lifecycle-hooks
+"""
+
+# Geo:N:G imports
+from app.assets import state
+
+
+def on_server_loaded(server_context):
+    """Read models when the server starts, if the reader can do so without users"""
+    state.warm_models()
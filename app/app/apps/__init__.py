@@ -6,6 +6,9 @@ app consists of several different views like instructions, workflow, data viewer
 etc.
 """
 
+# Standard library imports
+import functools
+
 # Third party imports
 import panel as pn
 import pyplugs
@@ -21,18 +24,21 @@ from geong_common.log import logger
 # Read configuration
 *_, PACKAGE = __name__.split(".")
 CFG = config.app[PACKAGE]
-
-# Initialize Panel
 _STYLE = config.app.style
-pn.extension(
-    raw_css=[
-        files.get_url_or_asset(css, local_assets="app.assets").read_text()
-        for css in _STYLE.raw_css
-    ]
-    # Workaround to apply header color to app header (Geo:N:G)
-    + [f".title {{color: {_STYLE.header_color} !important;}}"],
-    css_files=_STYLE.css_files,
-)
+
+
+@functools.lru_cache(maxsize=None)
+def init_panel():
+    """Initialize Panel with the app style, reading CSS files on first use"""
+    pn.extension(
+        raw_css=[
+            files.get_url_or_asset(css, local_assets="app.assets").read_text()
+            for css in _STYLE.raw_css
+        ]
+        # Workaround to apply header color to app header (Geo:N:G)
+        + [f".title {{color: {_STYLE.header_color} !important;}}"],
+        css_files=_STYLE.css_files,
+    )
 
 
 def get_view(app, view):
@@ -43,6 +49,7 @@ def get_view(app, view):
 
 def view():
     """The main layout of the Geo:N:G app"""
+    init_panel()
     layout = pn.template.BootstrapTemplate(
         title=CFG.title,
         theme=pn.template.theme.DefaultTheme,
@@ -23,7 +23,6 @@ def view():
             tables=CFG.tables,
             columns_per_table=CFG.columns.as_dict(),
             name=CFG.label,
-            pagination="remote",
             page_size=CFG.page_size,
             show_index=False,
             width=1000,
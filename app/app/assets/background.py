@@ -0,0 +1,57 @@
+"""Run slow work on threads, without blocking other sessions
+
+Bokeh serves all sessions of a process from one server thread. Slow work, like
+reading from the API, is run on a thread pool instead, while the session shows a
+loading indicator. The session's document is only changed on the server thread:
+the work is followed by a callback scheduled with `add_next_tick_callback()`,
+which is the one document method that is safe to use from other threads.
+"""
+
+# Standard library imports
+from concurrent.futures import ThreadPoolExecutor
+
+# Geo:N:G imports
+from app import config
+from geong_common import sessions
+from geong_common.log import logger
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=config.app.background.max_workers, thread_name_prefix="background"
+)
+
+
+def run(work, then=None, loading=()):
+    """Run work on a thread, then continue on the server thread
+
+    Panes in loading show a loading indicator while the work is done. Errors in
+    the work are logged, then is called in any case so that it can report the
+    error if the work is needed. Outside of a server, for instance in tests, the
+    work is done directly.
+    """
+    document = sessions.current_document()
+    if document is None or document.session_context is None:
+        _do(work, document)
+        if then is not None:
+            then()
+        return
+
+    for pane in loading:
+        pane.loading = True
+
+    def finish():
+        for pane in loading:
+            pane.loading = False
+        if then is not None:
+            then()
+
+    future = _EXECUTOR.submit(_do, work, document)
+    future.add_done_callback(lambda _: document.add_next_tick_callback(finish))
+
+
+def _do(work, document=None):
+    """Do work for the session of the document, logging any errors"""
+    try:
+        with sessions.for_document(document):
+            work()
+    except Exception as e:
+        logger.warning(f"Background work failed: {e}")
@@ -0,0 +1,229 @@
+"""Export tables from the data viewer to files
+
+Tables are read from the data service in chunks of `exports.chunk_rows` rows,
+and each chunk is written to the file before the next one is read, so that the
+memory used does not grow with the size of the table. Excel files are written
+with xlsxwriter's constant memory mode, which flushes each row to disk.
+
+Exports are stored in the `exports.path` directory, named by the version of the
+table and the columns, and reused by all sessions until the table changes. Every
+chunk is read from the same version of the table. If the table changes during an
+export, the export starts over with the new version. Exports of older versions
+are then removed, and sessions still offering them for download export the table
+again when the download is clicked.
+"""
+
+# Standard library imports
+import atexit
+import hashlib
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Geo:N:G imports
+from app import config
+from geong_common import readers
+from geong_common.exceptions import TableChangedError
+from geong_common.log import logger
+
+# File formats, with their file suffixes
+FORMATS = {"Excel": "xlsx", "CSV": "csv", "Parquet": "parquet"}
+
+# Same ordering as shown in the data viewer
+SORT = ["-ng_vsh40_pct"]
+
+# Times an export starts over if the table changes while it is exported
+_RETRIES = 2
+
+_lock = threading.Lock()
+_directory = None
+
+
+def export(dataset, table, columns, file_format):
+    """Export a table to a file with the given suffix, reuse earlier exports
+
+    Returns the path to the exported file.
+    """
+    for attempt in range(_RETRIES + 1):
+        version = readers.read_version(config.app.apps.reader, dataset, table)
+        try:
+            return _export_version(dataset, table, columns, file_format, version)
+        except TableChangedError:
+            if attempt == _RETRIES:
+                raise
+            logger.info(f"{dataset} {table} changed while exporting, starting over")
+
+
+def read_export(path, dataset, table, columns, file_format):
+    """Contents of an exported file, exported again if it has been removed
+
+    Exports are removed when the table changes, so the file may be gone when a
+    session downloads it. The current version of the table is then exported.
+    """
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        logger.info(f"{path.name} has been removed, exporting {dataset} {table} again")
+        return export(dataset, table, columns, file_format).read_bytes()
+
+
+def _export_version(dataset, table, columns, file_format, version):
+    """Export one version of a table, and remove exports of other versions"""
+    version_key = _hash(version)
+    path = export_directory() / (
+        f"{dataset}-{table}-{version_key}-{_hash(list(columns))}.{file_format}"
+    )
+    if path.exists():
+        return path
+
+    logger.info(f"Exporting {dataset} {table} version {version} to {path.name}")
+    fid, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fid)
+    tmp_path = pathlib.Path(tmp_name)
+    try:
+        _WRITERS[file_format](
+            tmp_path, _read_chunks(dataset, table, columns, version), table
+        )
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    # Remove exports of earlier versions, other column sets of this version may
+    # still be downloaded by other sessions
+    for old_path in path.parent.glob(f"{dataset}-{table}-*-*.*"):
+        if old_path.name.split("-")[2] != version_key:
+            old_path.unlink(missing_ok=True)
+    return path
+
+
+def _hash(value):
+    """Short hash of a value, used in file names"""
+    return hashlib.sha256(repr(value).encode()).hexdigest()[:16]
+
+
+def export_directory():
+    """Directory for exported files, a temporary directory if none is configured"""
+    global _directory
+
+    with _lock:
+        if _directory is None:
+            if config.app.exports.path:
+                _directory = pathlib.Path(config.app.exports.path)
+                _directory.mkdir(parents=True, exist_ok=True)
+            else:
+                _directory = pathlib.Path(tempfile.mkdtemp(prefix="geong-exports-"))
+                atexit.register(shutil.rmtree, _directory, ignore_errors=True)
+        return _directory
+
+
+def _read_chunks(dataset, table, columns, version):
+    """Read one version of a table in chunks, sorted like in the data viewer
+
+    The first chunk is returned even if the table is empty, so that the columns
+    are known. Raises TableChangedError if the table changes between chunks.
+    """
+    offset, total = 0, 1
+    while offset < total:
+        chunk, total = readers.read_page(
+            config.app.apps.reader,
+            dataset,
+            table,
+            columns=list(columns),
+            sort=SORT,
+            offset=offset,
+            limit=config.app.exports.chunk_rows,
+            version=version,
+        )
+        yield chunk
+        if chunk.empty:
+            break
+        offset += len(chunk)
+
+
+def _write_excel(path, chunks, table_name):
+    """Write chunks to one Excel sheet, flushing each row to disk"""
+    # Third party imports
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+    worksheet = workbook.add_worksheet(table_name.title())
+    header_format = workbook.add_format({"bold": True, "border": 1})
+
+    row_num = 1
+    for idx, chunk in enumerate(chunks):
+        if idx == 0:
+            worksheet.write_row(0, 0, [str(c) for c in chunk.columns], header_format)
+        for row in _rows(chunk):
+            worksheet.write_row(row_num, 0, row)
+            row_num += 1
+    workbook.close()
+
+
+def _write_csv(path, chunks, table_name):
+    """Write chunks to a CSV file, with a header before the first chunk"""
+    with path.open(mode="w", encoding="utf-8", newline="") as fid:
+        for idx, chunk in enumerate(chunks):
+            chunk.to_csv(fid, header=idx == 0, index=False)
+
+
+def _write_parquet(path, chunks, table_name):
+    """Write each chunk as a row group of a Parquet file
+
+    Chunks may be read with different data types, as they are normalized one by
+    one. All chunks are therefore converted to the widest types.
+    """
+    # Third party imports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(_widen(chunk), preserve_index=False)
+            if writer is None:
+                schema = pa.schema(
+                    [
+                        (
+                            field.with_type(pa.string())
+                            if pa.types.is_null(field.type)
+                            else field
+                        )
+                        for field in table.schema
+                    ]
+                )
+                writer = pq.ParquetWriter(str(path), schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {"xlsx": _write_excel, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def _rows(chunk):
+    """Rows of a chunk as Python values, with None for missing values"""
+    columns = [
+        [None if pd.isna(value) else value for value in chunk[column].tolist()]
+        for column in chunk.columns
+    ]
+    return zip(*columns)
+
+
+def _widen(chunk):
+    """Convert numbers to 64 bit types, and categories to their values"""
+    converted = {}
+    for column, values in chunk.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            converted[column] = values.astype(values.cat.categories.dtype)
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            converted[column] = values.astype(np.int64)
+        elif pd.api.types.is_float_dtype(values.dtype):
+            converted[column] = values.astype(np.float64)
+    return chunk.assign(**converted) if converted else chunk
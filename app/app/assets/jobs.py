@@ -0,0 +1,145 @@
+"""Run CPU heavy work, like rendering reports, in worker processes
+
+Work done on threads, like in app.assets.background, still holds the GIL and
+slows down all sessions served by the process. Rendering a report with
+python-pptx is instead submitted to a pool of `jobs.max_workers` processes,
+shared by all sessions. Sessions poll the status of their jobs every
+`jobs.poll_interval` milliseconds, and continue on the server thread when the
+job is done.
+
+Sessions remove their last report when they end, with remove_report(). A
+temporary report directory is removed when the server exits.
+
+Worker processes are started with spawn, so that they do not inherit the
+threads of the Panel server. Functions run in them, like render_report(), must
+be importable, and their arguments and results must be picklable.
+"""
+
+# Standard library imports
+import atexit
+import multiprocessing
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Third party imports
+import panel as pn
+
+# Geo:N:G imports
+from app import config
+from geong_common import reports
+from geong_common.log import logger
+
+_lock = threading.Lock()
+_executor = None
+_directory = None
+
+
+def submit(func, *args, **kwargs):
+    """Start work in a worker process, returns a future for the result"""
+    global _executor
+
+    with _lock:
+        for _ in range(2):
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=config.app.jobs.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            try:
+                return _executor.submit(func, *args, **kwargs)
+            except BrokenProcessPool:
+                # A worker died, for instance when running out of memory
+                logger.warning("Restarting broken pool of worker processes")
+                _executor = None
+        raise BrokenProcessPool("Could not start worker processes")
+
+
+def status(future):
+    """Status of a job: queued, running, done or failed"""
+    if not future.done():
+        return "running" if future.running() else "queued"
+    if future.cancelled() or future.exception() is not None:
+        return "failed"
+    return "done"
+
+
+def poll(future, on_status, then):
+    """Report the status of a job until it is done, then continue with the result
+
+    The status is reported when it changes, and then is called with the future
+    of the job, on the server thread. Outside of a server, for instance in tests,
+    this waits for the job to finish.
+    """
+    document = pn.state.curdoc
+    if document is None or document.session_context is None:
+        future.exception()  # Wait for the job
+        on_status(status(future))
+        then(future)
+        return
+
+    last_status = None
+
+    def check():
+        nonlocal last_status
+        current_status = status(future)
+        if current_status != last_status:
+            on_status(current_status)
+            last_status = current_status
+        if future.done():
+            callback.stop()
+            then(future)
+
+    callback = pn.state.add_periodic_callback(
+        check, period=config.app.jobs.poll_interval
+    )
+
+
+def report_directory():
+    """Directory for rendered reports, a temporary directory if none is configured"""
+    global _directory
+
+    with _lock:
+        if _directory is None:
+            if config.app.jobs.path:
+                _directory = pathlib.Path(config.app.jobs.path)
+                _directory.mkdir(parents=True, exist_ok=True)
+            else:
+                _directory = pathlib.Path(tempfile.mkdtemp(prefix="geong-reports-"))
+                atexit.register(shutil.rmtree, _directory, ignore_errors=True)
+        return _directory
+
+
+def remove_report(path):
+    """Remove a rendered report, if there is one"""
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def render_report(report, data, directory):
+    """Render a report in a worker process, returns the path to the report file"""
+    report_cfg = config.app.report[report]
+    fid, path = tempfile.mkstemp(
+        dir=directory, suffix=pathlib.Path(report_cfg.file_name).suffix
+    )
+    os.close(fid)
+    try:
+        reports.generate(
+            report_cfg.generator,
+            template_url=report_cfg.template,
+            cfg=report_cfg,
+            data=data,
+            output_path=path,
+        )
+    except Exception:
+        os.remove(path)
+        raise
+    return path
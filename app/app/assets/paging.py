@@ -0,0 +1,90 @@
+"""Show large tables one page at a time
+
+The Tabulator widget keeps the whole table on the server, even when it only sends
+one page at a time to the browser. PagedTabulator instead reads the page being
+shown, already filtered and sorted, each time the user changes page or sorting.
+The memory used by a session is then independent of the size of the table.
+
+Pages are read in the background, see app.assets.background, and shown when
+they arrive. The widget overrides internals of the Panel 0.12 Tabulator, so
+Panel is pinned in requirements.in, and PANEL_VERSIONS lists the versions it has
+been tested with.
+"""
+
+# Third party imports
+import panel as pn
+import param
+from bokeh.models import ColumnDataSource
+
+# Geo:N:G imports
+from app.assets import background
+
+# Panel versions with the Tabulator internals overridden by PagedTabulator
+PANEL_VERSIONS = ("0.12.",)
+
+
+class PagedTabulator(pn.widgets.Tabulator):
+    """A Tabulator showing pages read by a function
+
+    The function is called as read_page(sort=..., offset=..., limit=...), where
+    sort is a list of column names prefixed with - for descending order, and
+    should return a dataframe with the rows on the page together with the total
+    number of rows. The value of the widget is the page being shown.
+    """
+
+    pagination = param.ObjectSelector(default="remote", objects=["remote"])
+
+    def __init__(self, read_page, **params):
+        self._read_page = read_page
+        self._page_key = None
+        self._total = 0
+        super().__init__(value=None, **params)
+        self._request_page()
+
+    @property
+    def _length(self):
+        return self._total
+
+    @property
+    def _sort_keys(self):
+        """Sorters in the browser, as sort keys for read_page()"""
+        return [
+            f"-{s['field']}" if s["dir"] == "desc" else s["field"] for s in self.sorters
+        ]
+
+    @param.depends("page", "page_size", "sorters", watch=True)
+    def _request_page(self):
+        """Read the current page in the background, unless it has been read"""
+        sort = self._sort_keys
+        page_key = (tuple(sort), self.page, self.page_size)
+        if page_key == self._page_key:
+            return
+        self._page_key = page_key
+        offset, limit = (self.page - 1) * self.page_size, self.page_size
+        result = {}
+
+        def read():
+            result["page"] = self._read_page(sort=sort, offset=offset, limit=limit)
+
+        def show():
+            # Pages requested later replace this one, and failed reads are retried
+            if self._page_key != page_key:
+                return
+            if "page" not in result:
+                self._page_key = None
+                return
+            data, self._total = result["page"]
+            self.value = data.reset_index(drop=True)
+
+        background.run(read, then=show, loading=[self])
+
+    def _get_data(self):
+        if self.value is None:
+            return super()._get_data()
+        source = ColumnDataSource.from_df(self.value)
+        return self.value, {str(column): values for column, values in source.items()}
+
+    def _get_properties(self, source):
+        props = super()._get_properties(source)
+        props["max_page"] = max(1, -(-self._total // self.page_size))
+        return props
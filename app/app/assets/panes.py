@@ -5,7 +5,6 @@ import io
 import textwrap
 
 # Third party imports
-import pandas as pd
 import panel as pn
 import param
 from bokeh.models.widgets.tables import NumberFormatter
@@ -13,6 +12,9 @@ from pyconfs.configuration import Variables
 
 # Geo:N:G imports
 from app import config
+from app.assets import background
+from app.assets import exports
+from app.assets import paging
 from app.assets import state
 from geong_common import files
 from geong_common import readers
@@ -65,8 +67,13 @@ def popup(label, text="?", style=None):
     return f"[<abbr>{text}<span{style}>{popup_html}</span></abbr>]"
 
 
-def pipeline_button(app, text, trigger, button_type="success", width=125):
-    """Trigger a parameter on the pipeline"""
+def pipeline_button(app, text, trigger, button_type="success", width=125, prepare=None):
+    """Trigger a parameter on the pipeline
+
+    If prepare is given, it is run in the background before the parameter is
+    triggered, while the current stage shows a loading indicator. Use it to read
+    data needed by the next stage without blocking other sessions.
+    """
 
     def trigger_param(event):
         """Trigger a parameter"""
@@ -74,16 +81,25 @@ def pipeline_button(app, text, trigger, button_type="success", width=125):
         if not pipeline:
             raise ValueError("No pipeline is available")
 
-        pipeline.param.trigger(trigger)
+        if prepare is None:
+            pipeline.param.trigger(trigger)
+        else:
+            background.run(
+                prepare,
+                then=lambda: pipeline.param.trigger(trigger),
+                loading=[pipeline.stage],
+            )
 
     button = pn.widgets.Button(name=text, button_type=button_type, width=width)
     button.on_click(trigger_param)
     return button
 
 
-def next_stage_button(app, text="Next", button_type="success"):
-    """Trigger the next stage"""
-    return pipeline_button(app, text=text, trigger="next", button_type=button_type)
+def next_stage_button(app, text="Next", button_type="success", prepare=None):
+    """Trigger the next stage, optionally preparing data for it in the background"""
+    return pipeline_button(
+        app, text=text, trigger="next", button_type=button_type, prepare=prepare
+    )
 
 
 def previous_stage_button(app, text="Previous", button_type="default"):
@@ -200,18 +216,7 @@ def _division_slider_with_2_params(params, param_1, param_2):
     slider = pn.widgets.IntSlider.from_param(
         var_1, name="", tooltips=False, show_value=False, sizing_mode="stretch_width"
     )
-
-    @param.depends(var_2, watch=True)
-    def update_param_1(var_2):
-        """Update param_1 when param_2 changes"""
-        var_2 = min(max(0, var_2), 100)
-        params.set_param(**{param_1: 100 - var_2, param_2: var_2})
-
-    @param.depends(var_1, watch=True)
-    def update_param_2(var_1):
-        """Update param_2 when param_1 changes"""
-        var_1 = min(max(0, var_1), 100)
-        params.set_param(**{param_1: var_1, param_2: 100 - var_1})
+    _link_division(params, [param_1, param_2])
 
     return spinners, slider
 
@@ -239,44 +244,85 @@ def _division_slider_with_3_params(params, param_1, param_2, param_3):
         show_value=False,
         sizing_mode="stretch_width",
     )
-
-    @param.depends(var_1, var_2, watch=True)
-    def update_param_3(var_1, var_2):
-        var_1 = min(max(0, var_1), 100)
-        var_2 = min(max(0, var_2), 100)
-        var_3 = max(0, 100 - var_1 - var_2)
-        params.set_param(**{param_1: var_1, param_2: var_2, param_3: var_3})
-        slider.value = (var_1, var_1 + var_2)
-
-    @param.depends(var_1, var_3, watch=True)
-    def update_param_2(var_1, var_3):
-        var_1 = min(max(0, var_1), 100)
-        var_3 = min(max(0, var_3), 100)
-        var_2 = max(0, 100 - var_1 - var_3)
-        params.set_param(**{param_1: var_1, param_2: var_2, param_3: var_3})
-        slider.value = (var_1, var_1 + var_2)
-
-    @param.depends(var_2, var_3, watch=True)
-    def update_param_1(var_2, var_3):
-        var_2 = min(max(0, var_2), 100)
-        var_3 = min(max(0, var_3), 100)
-        var_1 = max(0, 100 - var_2 - var_3)
-        params.set_param(**{param_1: var_1, param_2: var_2, param_3: var_3})
-        slider.value = (var_1, var_1 + var_2)
-
-    @param.depends(slider.param.value, watch=True)
-    def update_from_slider(slider_value):
-        start, end = slider_value
-        var_1 = min(max(0, start), 100)
-        var_2 = min(max(0, end - var_1), 100)
-        var_3 = min(max(0, 100 - var_1 - var_2), 100)
-        params.set_param(**{param_1: var_1, param_2: var_2, param_3: var_3})
+    _link_division(params, [param_1, param_2, param_3], range_slider=slider)
 
     return spinners, slider
 
 
+def _link_division(params, names, range_slider=None):
+    """Keep params adding up to 100 when one of them changes
+
+    The other params are adjusted in one batch, so that watchers of all the
+    params, like the N:G estimate, are called once for each change by the user.
+    A range slider dividing 3 params is kept in sync with them.
+    """
+    updating = False
+
+    def set_values(new_values):
+        """Set all params in one batch, without reacting to the changes"""
+        nonlocal updating
+        updating = True
+        try:
+            params.set_param(**dict(zip(names, new_values)))
+            if range_slider is not None:
+                range_slider.value = (new_values[0], new_values[0] + new_values[1])
+        finally:
+            updating = False
+
+    def update_from_params(*events):
+        """Adjust the other params when one param changes"""
+        if updating:
+            return
+        values = dict(params.get_param_values())
+        set_values(
+            _divide_100(
+                [values[name] for name in names], changed=names.index(events[0].name)
+            )
+        )
+
+    params.watch(update_from_params, names)
+
+    if range_slider is not None:
+
+        @param.depends(range_slider.param.value, watch=True)
+        def update_from_slider(slider_value):
+            """Set all params from the ends of the range slider"""
+            if updating:
+                return
+            start, end = (min(max(0, v), 100) for v in slider_value)
+            set_values([start, max(0, end - start), 100 - max(start, end)])
+
+
+def _divide_100(values, changed):
+    """Adjust values so they add up to 100, keeping the changed value if possible
+
+    The last value absorbs the difference first, or the second to last value if
+    the last value changed. Other values are only adjusted if necessary.
+    """
+    values = [min(max(0, v), 100) for v in values]
+    last = len(values) - 1
+    first_absorber = last - 1 if changed == last else last
+    absorbers = [first_absorber] + [
+        idx
+        for idx in reversed(range(len(values)))
+        if idx not in (changed, first_absorber)
+    ]
+
+    fixed = values[changed]
+    for num, idx in enumerate(absorbers):
+        rest = sum(values[other] for other in absorbers[num + 1 :])
+        values[idx] = max(0, 100 - fixed - rest)
+        fixed += values[idx]
+    return values
+
+
 def data_viewer(dataset, tables, columns_per_table, **widget_args):
-    """Show all data in a downloadable table"""
+    """Show all data in a downloadable table
+
+    Only the page being shown is read, sorted by N:G unless the user chooses
+    another sorting. Downloads are exported on a background thread, and can be
+    downloaded when they are ready.
+    """
 
     formatters = {
         "ng_vsh40_pct": NumberFormatter(format="0 %"),
@@ -285,17 +331,8 @@ def data_viewer(dataset, tables, columns_per_table, **widget_args):
         "base_depth_mtvd": NumberFormatter(format="0.0"),
     }
 
-    def get_filename(table):
-        return f"{dataset}-{table}.xlsx"
-
-    def get_data(table_name):
-        columns = columns_per_table.get(table_name, {})
-        return (
-            readers.read_all(config.app.apps.reader, dataset, table_name)
-            .loc[:, columns.keys()]
-            .sort_values(by="ng_vsh40_pct", ascending=False)
-            .reset_index(drop=True)
-        )
+    def get_filename(table, file_format):
+        return f"{dataset}-{table}.{file_format}"
 
     table_name = pn.widgets.Select(
         name="Choose table",
@@ -303,18 +340,36 @@ def data_viewer(dataset, tables, columns_per_table, **widget_args):
         value=tables[0],
         size=1,
     )
+    file_format = pn.widgets.Select(
+        name="File format", options=exports.FORMATS, value="xlsx", size=1
+    )
     filename = pn.widgets.TextInput(
-        name="File name", value=get_filename(table_name.value)
+        name="File name", value=get_filename(table_name.value, file_format.value)
+    )
+    export_button = pn.widgets.Button(name="Prepare download", button_type="primary")
+    download_button = pn.widgets.FileDownload(
+        filename=filename.value, button_type="success", visible=False
     )
+    download = pn.Column(export_button, download_button)
 
     @pn.depends(table_name.param.value)
     def table(table_name):
-        data = get_data(table_name).assign(
-            ng_vsh40_pct=lambda d: d.ng_vsh40_pct / 100  # Show N:G as percent
-        )
+        def read_page(sort, offset, limit):
+            data, total = readers.read_page(
+                config.app.apps.reader,
+                dataset,
+                table_name,
+                columns=list(columns_per_table.get(table_name, {})),
+                sort=sort,
+                offset=offset,
+                limit=limit,
+            )
+            # Show N:G as percent
+            return data.assign(ng_vsh40_pct=lambda d: d.ng_vsh40_pct / 100), total
 
-        return pn.widgets.Tabulator(
-            data,
+        return paging.PagedTabulator(
+            read_page,
+            sorters=[{"field": "ng_vsh40_pct", "dir": "desc"}],
             disabled=True,
             titles=columns_per_table[table_name],
             formatters=formatters,
@@ -322,36 +377,48 @@ def data_viewer(dataset, tables, columns_per_table, **widget_args):
             **widget_args,
         )
 
-    @pn.depends(table_name.param.value, watch=True)
-    def update_filename(table_name):
-        filename.value = get_filename(table_name)
+    @pn.depends(table_name.param.value, file_format.param.value, watch=True)
+    def update_filename(table_name, file_format):
+        filename.value = get_filename(table_name, file_format)
+        download_button.visible = False
+
+    @pn.depends(filename.param.value, watch=True)
+    def update_download_filename(filename):
+        download_button.filename = filename
+
+    def prepare_download(event):
+        """Export the table in the background, then show the download button"""
+        exported = {}
+        export_args = dict(
+            dataset=dataset,
+            table=table_name.value,
+            columns=columns_per_table.get(table_name.value, {}),
+            file_format=file_format.value,
+        )
 
-    def download_file():
-        """Download data as an Excel file"""
-        output_bytes = io.BytesIO()
+        def export():
+            exported["path"] = exports.export(**export_args)
 
-        # Write data as Excel
-        excel_writer = pd.ExcelWriter(output_bytes, engine="xlsxwriter")
-        get_data(table_name.value).to_excel(
-            excel_writer, sheet_name=table_name.value.title(), index=False
-        )
-        excel_writer.save()
+        def read_export():
+            return io.BytesIO(exports.read_export(exported["path"], **export_args))
 
-        # Reset output stream and return it
-        output_bytes.seek(0)
-        return output_bytes
+        def show_download():
+            if "path" in exported:
+                download_button.param.set_param(
+                    callback=read_export, filename=filename.value, visible=True
+                )
 
-    @pn.depends(filename.param.value)
-    def download_button(filename):
-        return pn.widgets.FileDownload(
-            callback=download_file, filename=filename, button_type="success"
-        )
+        download_button.visible = False
+        background.run(export, then=show_download, loading=[download])
+
+    export_button.on_click(prepare_download)
 
     return pn.Row(
         pn.Column(
             table_name,
+            file_format,
             filename,
-            download_button,
+            download,
         ),
         pn.Column(table, sizing_mode="stretch_width"),
     )
@@ -0,0 +1,164 @@
+"""Preview N:G in the browser while users move sliders
+
+Models are compiled to coefficients by geong_common.data.compiled, and sent to
+the browser together with JavaScript callbacks on the sliders. The callbacks
+calculate the N:G and update the N:G indicator directly, so moving a slider
+does not need the server to run the model. The server calculates the N:G with
+the full model when the user moves to the next stage.
+"""
+
+# Standard library imports
+import re
+
+# Third party imports
+import panel as pn
+
+# Calculate the text of a Number indicator, like pn.indicators.Number does
+_NUMBER_TEXT_JS = """
+const numberText = (value) => {
+  let color = number.default_color
+  for (const [threshold, threshold_color] of number.colors.slice().reverse()) {
+    if (value <= threshold) {
+      color = threshold_color
+    }
+  }
+  const formatted = isNaN(value) ? number.nan_format : value.toFixed(number.digits)
+  const value_text = number.prefix + formatted + number.suffix
+  const div = (font_size, content) =>
+    `<div style="font-size: ${font_size}; color: ${color}">${content}</div>`
+  let text = div(number.font_size, value_text)
+  if (number.name) {
+    text = div(number.title_size, number.name) + "\\n" + text
+  }
+  return text
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;")
+    .replace(/'/g, "&#x27;")
+}
+"""
+
+_BUILDING_BLOCKS_JS = """
+const values = sliders.map((slider) => slider.value)
+const total = values.reduce((sum, value) => sum + value, 0)
+const net_gross = total == 100
+  ? values.reduce((sum, value, idx) => sum + value * coefficients[idx], 0)
+  : NaN
+indicator.text = numberText(net_gross)
+"""
+
+_FILTER_CLASSES_JS = """
+const clamp = (value) => Math.min(Math.max(0, value), 100)
+const divide = (value) => {
+  if (typeof value === "number") {
+    return [clamp(value), 100 - clamp(value)]
+  }
+  const [start, end] = value.map(clamp)
+  return [start, Math.max(0, end - start), 100 - Math.max(start, end)]
+}
+
+const ratios = table.coefficients.slice()
+table.filter_classes.forEach((filter_class, idx) => {
+  const weights = divide(divisions[idx].value)
+  const is_ignored = ignores[idx].active.indexOf(0) >= 0
+  filter_class.rows.forEach((row, row_idx) => {
+    const code = filter_class.codes[row_idx]
+    if (is_ignored) {
+      ratios[row] /= filter_class.num_values
+    } else if (code >= 0) {
+      ratios[row] *= (code < weights.length ? weights[code] : 0) / 100
+    }
+  })
+})
+indicator.text = numberText(ratios.reduce((sum, ratio) => sum + ratio, 0))
+"""
+
+
+def link_building_blocks(indicator, sliders, coefficients):
+    """Update the indicator in the browser when building block sliders move
+
+    Sliders are given by building block type, and can be layouts containing an
+    IntSlider, like the ones made by panes.element_slider().
+    """
+    widgets = [_find(slider, pn.widgets.IntSlider) for slider in sliders.values()]
+    _link(
+        indicator,
+        widgets,
+        code=_BUILDING_BLOCKS_JS,
+        array_args={"sliders": widgets},
+        coefficients=[coefficients.get(label, 0) for label in sliders],
+    )
+
+
+def link_filter_classes(indicator, divisions, table):
+    """Update the indicator in the browser when division sliders move
+
+    Divisions are given in the same order as the filter classes in the table,
+    and are layouts like the ones made by panes.division_slider(), with a
+    slider and a checkbox for ignoring the filter class.
+    """
+    sliders = [
+        _find(division, (pn.widgets.IntSlider, pn.widgets.IntRangeSlider))
+        for division in divisions
+    ]
+    checkboxes = [_find(division, pn.widgets.Checkbox) for division in divisions]
+    _link(
+        indicator,
+        sliders + checkboxes,
+        code=_FILTER_CLASSES_JS,
+        array_args={"divisions": sliders, "ignores": checkboxes},
+        table=table,
+    )
+
+
+def _link(indicator, widgets, code, array_args, **args):
+    """Add a callback to each widget, calculating the text of the indicator"""
+    widget_args = {}
+    declarations = []
+    for name, array in array_args.items():
+        names = [f"{name}_{idx}" for idx in range(len(array))]
+        widget_args.update(zip(names, array))
+        declarations.append(f"const {name} = [{', '.join(names)}]")
+
+    code = "\n".join(declarations) + _NUMBER_TEXT_JS + code
+    args = {
+        **args,
+        **widget_args,
+        "indicator": indicator,
+        "number": _number_format(indicator),
+    }
+    for widget in widgets:
+        widget.jscallback(args=args, value=code)
+
+
+def _find(layout, widget_type):
+    """Find the first widget of a given type in a layout"""
+    if isinstance(layout, widget_type):
+        return layout
+    widgets = layout.select(lambda obj: isinstance(obj, widget_type))
+    if not widgets:
+        raise ValueError(f"No {widget_type} found in {layout}")
+    return widgets[0]
+
+
+def _number_format(indicator):
+    """Formatting of a Number indicator, for calculating its text in the browser
+
+    Only formats showing the value with a fixed number of decimals are supported.
+    """
+    match = re.fullmatch(r"(.*){value:\.(\d+)f}(.*)", indicator.format, re.DOTALL)
+    if match is None:
+        raise ValueError(f"Format {indicator.format!r} is not supported")
+    prefix, digits, suffix = match.groups()
+    return {
+        "name": indicator.name,
+        "prefix": prefix,
+        "digits": int(digits),
+        "suffix": suffix,
+        "nan_format": indicator.nan_format,
+        "default_color": indicator.default_color,
+        "colors": [list(color) for color in indicator.colors or []],
+        "font_size": indicator.font_size,
+        "title_size": indicator.title_size,
+    }
@@ -6,11 +6,40 @@
 
 Try to persist state for a given user across sessions so that information is not
 lost by a simple reload.
+
+Models are shared by all sessions in pn.state.cache, together with their
+version. Each session still asks the reader for the model with its own access
+token before using it, sending the version so that an unchanged model is not
+read again. At most every `models.revalidate_interval` seconds, the session asks
+again in the background, and the model is replaced if there is a new version.
 """
 
+# Standard library imports
+import functools
+import threading
+import time
+import weakref
+
 # Third party imports
 import panel as pn
 
+# Geo:N:G imports
+from app import config
+from app.assets import background
+from geong_common import config as geong_config
+from geong_common import readers
+from geong_common import sessions
+from geong_common.exceptions import APIResponseError
+from geong_common.exceptions import MissingAccessTokenError
+from geong_common.log import logger
+
+_model_lock = threading.Lock()
+
+# When each session last checked each model, by document. Work done outside of
+# sessions, like warming models when the server starts, is kept separately.
+_session_checks = weakref.WeakKeyDictionary()
+_server_checks = {}
+
 
 def get_user_state():
     """Retrieve (a reference to) a dictionary that can persist user state"""
@@ -20,3 +49,91 @@ def get_user_state():
 def clear_user_state():
     """Clear state for the current user"""
     get_user_state().clear()
+
+
+def get_shared_state():
+    """Retrieve (a reference to) a dictionary shared by all sessions"""
+    return pn.state.cache
+
+
+def get_model(dataset):
+    """Get the model for a dataset, shared by all sessions
+
+    The model is only read, or checked, on this thread the first time the current
+    session uses it. Later checks are done in the background, and the current
+    model is used until they are done.
+    """
+    with _model_lock:
+        _, model = _models().get(dataset, (None, None))
+        checks = _checks()
+        checked_at = checks.get(dataset)
+        is_checked = model is not None and checked_at is not None
+        is_stale = (
+            is_checked
+            and time.monotonic() - checked_at >= config.app.models.revalidate_interval
+        )
+        if is_stale:
+            # Do not start more checks while this one is running
+            checks[dataset] = time.monotonic()
+
+    if is_stale:
+        background.run(functools.partial(_revalidate_in_background, dataset))
+    if is_checked:
+        return model
+    return _revalidate(dataset)
+
+
+def _models():
+    """Models and their versions, by dataset"""
+    return get_shared_state().setdefault("models", {})
+
+
+def _checks():
+    """When the current session last checked each model"""
+    document = sessions.current_document()
+    if document is None:
+        return _server_checks
+    return _session_checks.setdefault(document, {})
+
+
+def _revalidate(dataset):
+    """Read the model if it has changed, using the access of the current session"""
+    with _model_lock:
+        version, _ = _models().get(dataset, (None, None))
+
+    version, new_model = readers.read_versioned_model(
+        reader=config.app.apps.reader, dataset=dataset, version=version
+    )
+
+    with _model_lock:
+        if new_model is not None:
+            logger.info(f"Read {dataset} model, version {version}")
+            _models()[dataset] = (version, new_model)
+        _checks()[dataset] = time.monotonic()
+        return _models()[dataset][1]
+
+
+def _revalidate_in_background(dataset):
+    """Check for a new model, keep using the current one if the check fails
+
+    Sessions that are no longer allowed to read the model must read it again.
+    """
+    try:
+        _revalidate(dataset)
+    except Exception as e:
+        logger.warning(f"Could not check for new {dataset} model: {e}")
+        if isinstance(e, MissingAccessTokenError) or (
+            isinstance(e, APIResponseError) and e.status_code in (401, 403)
+        ):
+            with _model_lock:
+                _checks().pop(dataset, None)
+
+
+def warm_models():
+    """Read models for all apps, so that they are ready when users need them"""
+    datasets = [app for app in config.app.apps.apps if app in geong_config.geong.models]
+    for dataset in datasets:
+        try:
+            get_model(dataset)
+        except Exception as e:
+            logger.debug(f"Could not read {dataset} model: {e}")
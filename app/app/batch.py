@@ -0,0 +1,387 @@
+"""Geo:N:G - Batch runs
+
+Calculate N:G for many deep marine scenarios without clicking through the web
+app, and optionally create PowerPoint reports of them.
+
+Scenarios are read from a CSV or TOML file. Each scenario has a name, answers to
+the set up questions, and optionally a GeoX ID, building block weights, filter
+class weights and a porosity modifier. Weights that are not given are based on
+historical elements, like in the app. In a CSV file, weights are given in
+columns like `weights.Lobe` or `filter_classes.Lobe.spatial_position.Zone1`. In
+a TOML file, each scenario is a `[[scenario]]` table with the same keys.
+
+Version: {version}
+"""
+
+# Standard library imports
+import functools
+import itertools
+import math
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+# Third party imports
+import pandas as pd
+import typer
+from pyconfs import Configuration
+
+# Geo:N:G imports
+import app
+from app import config
+from geong_common import config as geong_config
+from geong_common import log
+from geong_common import readers
+from geong_common import reports
+from geong_common.data import compiled
+from geong_common.data import composition
+from geong_common.log import logger
+
+APP = "deep"
+MODEL_CFG = geong_config.geong.models[APP]
+
+# Set up questions, with the labels and values of their answers, as in the app
+SET_UP = {
+    "gross_geomorphology": (
+        "What is the gross geomorphology?",
+        {"Fan Shaped": "fan", "Channel Shaped": "channel"},
+    ),
+    "stratigraphic_scale": (
+        "What is the stratigraphic scale?",
+        {
+            "Complex (~10's m thickness)": "complexes",
+            "System (10's-100's m thickness)": "systems",
+        },
+    ),
+    "reservoir_quality": (
+        "What is the anticipated N:G quality bracket?",
+        {
+            "Poor (0 - 30%)": "Poor <30% NG",
+            "Moderate (30 - 65%)": "Moderate 30-65% NG",
+            "Good (65 - 85%)": "Good 65-85% NG",
+            "Exceptional (85 - 100%)": "Exceptional 85-100% NG",
+        },
+    ),
+}
+
+# Building blocks by stratigraphic scale and gross geomorphology
+BUILDING_BLOCKS = {
+    "complexes": {"fan": "Lobe Complex", "channel": "Channel Complex"},
+    "systems": {"fan": "Fan System", "channel": "Channel System"},
+}
+
+# Building block types, and the values of their filter classes
+ELEMENTS = [section.label for section in MODEL_CFG.sections]
+FILTER_CLASSES = {
+    (section.label, filter_class): (
+        section[filter_class].label,
+        list(section[filter_class]["values"]),
+    )
+    for section in MODEL_CFG.sections
+    for filter_class in section.factors
+}
+
+
+def main():
+    """Dispatch to typer"""
+    parse_cli.__doc__ = __doc__.format(version=app.__version__)
+    typer.run(parse_cli)
+
+
+def parse_cli(
+    scenario_path: pathlib.Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="CSV or TOML file with scenarios"
+    ),
+    results_path: pathlib.Path = typer.Option(
+        "results.csv", "--results", help="CSV or Parquet file for the results"
+    ),
+    report_dir: Optional[pathlib.Path] = typer.Option(
+        None, "--reports", help="Directory for reports, one for each GeoX ID"
+    ),
+    max_workers: int = typer.Option(
+        config.app.batch.max_workers, "--workers", help="Number of processes"
+    ),
+    batch_size: int = typer.Option(
+        config.app.batch.batch_size, help="Scenarios evaluated together"
+    ),
+):
+    """Calculate N:G for scenarios, and optionally create reports"""
+    log.init()
+    try:
+        scenarios = read_scenarios(scenario_path)
+        compositions = [scenario_composition(scenario) for scenario in scenarios]
+    except (KeyError, ValueError) as err:
+        raise typer.BadParameter(str(err), param_hint="SCENARIO_PATH")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = evaluate(
+            scenarios, compositions, batch_size=batch_size, executor=executor
+        )
+        write_results(results, results_path)
+        logger.info(f"Stored results of {len(results)} scenarios in {results_path}")
+
+        if report_dir is not None:
+            report_dir.mkdir(parents=True, exist_ok=True)
+            for path in render_reports(results, report_dir, executor=executor):
+                logger.info(f"Stored report in {path}")
+
+
+def read_scenarios(path):
+    """Read scenarios from a CSV or TOML file
+
+    Columns of CSV files are keys separated by dots, like in TOML files.
+    """
+    path = pathlib.Path(path)
+    if path.suffix == ".toml":
+        scenarios = Configuration.from_file(path).as_dict().get("scenario", [])
+    elif path.suffix == ".csv":
+        table = pd.read_csv(
+            path, dtype={"scenario_name": str, "geox_id": str}, skipinitialspace=True
+        )
+        scenarios = [_unflatten(row.dropna().to_dict()) for _, row in table.iterrows()]
+    else:
+        raise ValueError(f"Scenarios must be read from CSV or TOML, not {path.name}")
+
+    for num, scenario in enumerate(scenarios, start=1):
+        scenario.setdefault("scenario_name", f"Scenario {num}")
+        scenario["geox_id"] = str(scenario.get("geox_id", ""))
+        for question, (_, answers) in SET_UP.items():
+            if question not in scenario:
+                raise KeyError(f"{scenario['scenario_name']}: Missing {question!r}")
+            # Answers may be given as labels or values
+            answer = answers.get(scenario[question], scenario[question])
+            if answer not in answers.values():
+                raise ValueError(
+                    f"{scenario['scenario_name']}: Unknown {question} {answer!r}. "
+                    f"Choose between {', '.join(answers.values())}"
+                )
+            scenario[question] = answer
+
+    logger.info(f"Read {len(scenarios)} scenarios from {path}")
+    return scenarios
+
+
+def _unflatten(row):
+    """Nest values with keys separated by dots, like weights.Lobe"""
+    nested = {}
+    for key, value in row.items():
+        *sections, name = key.split(".")
+        section = nested
+        for section_name in sections:
+            section = section.setdefault(section_name, {})
+        section[name] = value
+    return nested
+
+
+def scenario_composition(scenario):
+    """Composition used by the model, with initial values for missing weights"""
+    initial = functools.partial(
+        initial_values,
+        *[scenario[question] for question in SET_UP],
+        reader=config.app.apps.reader,
+    )
+
+    weights = scenario.get("weights")
+    if weights is None:
+        weights = initial()["composition"]
+    weights = {element: weights.get(element, 0) for element in ELEMENTS}
+    if not math.isclose(sum(weights.values()), 100):
+        raise ValueError(
+            f"{scenario['scenario_name']}: Weights add up to "
+            f"{sum(weights.values())}%, not 100%"
+        )
+
+    result = {"building_block_type": weights}
+    for (element, filter_class), (label, values) in FILTER_CLASSES.items():
+        class_weights = scenario.get("filter_classes", {}).get(element, {})
+        if filter_class in class_weights:
+            class_weights = class_weights[filter_class]
+        else:
+            class_weights = initial()["filter_classes"][element][filter_class]
+        result.setdefault(element, {})[filter_class] = {
+            **{value: class_weights.get(value, 0) for value in values},
+            f"Ignore {label}": bool(class_weights.get("ignore", False)),
+        }
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def initial_values(gross_geomorphology, stratigraphic_scale, reservoir_quality, reader):
+    """Initial weights based on historical elements, as in the set up stage"""
+    elements = readers.read_elements(
+        reader=reader,
+        dataset=APP,
+        base_table=stratigraphic_scale,
+        columns=["building_block_type"] + sorted({fc for _, fc in FILTER_CLASSES}),
+        building_block_type=BUILDING_BLOCKS[stratigraphic_scale][gross_geomorphology],
+        descriptive_reservoir_quality=reservoir_quality,
+    )
+    return {
+        "composition": composition.calculate_composition_in_group(
+            elements=elements, column="building_block_type"
+        ),
+        "filter_classes": composition.calculate_filter_classes(
+            elements=elements, filter_classes=list(FILTER_CLASSES)
+        ),
+    }
+
+
+def evaluate(scenarios, compositions, batch_size, executor=None):
+    """Calculate N:G for scenarios, in batches run by the executor
+
+    Returns the scenarios with the same information as scenarios stored in the
+    app, which is used in reports.
+    """
+    model = readers.read_model(reader=config.app.apps.reader, dataset=APP)
+    batches = [
+        compositions[start : start + batch_size]
+        for start in range(0, len(compositions), batch_size)
+    ]
+    run = map if executor is None else executor.map
+    contributions = pd.concat(
+        run(compiled.evaluate_compositions, itertools.repeat(model), batches),
+        ignore_index=True,
+    )
+    mean_net_gross = (
+        model.astype({"building_block_type": str})
+        .groupby("building_block_type")["net_gross"]
+        .mean()
+    )
+
+    results = []
+    for scenario, scenario_composition, (_, contribution) in zip(
+        scenarios, compositions, contributions.iterrows()
+    ):
+        weights = scenario_composition["building_block_type"]
+        net_gross = contribution.sum()
+        porosity_modifier = min(scenario.get("porosity_modifier", 0), net_gross)
+        results.append(
+            {
+                "scenario_name": scenario["scenario_name"],
+                "geox_id": scenario["geox_id"],
+                "net_gross": net_gross,
+                "porosity_modifier": porosity_modifier,
+                "net_gross_modified": net_gross - porosity_modifier,
+                "set_up": {
+                    label: {v: k for k, v in answers.items()}[scenario[question]]
+                    for question, (label, answers) in SET_UP.items()
+                },
+                "weights": weights,
+                "element_net_gross": {
+                    element: (
+                        100 * contribution.get(element, 0) / weights[element]
+                        if weights[element]
+                        else mean_net_gross.get(element, float("nan"))
+                    )
+                    for element in ELEMENTS
+                },
+                "contribution": {
+                    element: contribution.get(element, 0) for element in ELEMENTS
+                },
+                **_report_filter_classes(scenario_composition),
+            }
+        )
+    return results
+
+
+def _report_filter_classes(scenario_composition):
+    """Filter class weights as shown in reports, like lobe_spatial"""
+    params = {}
+    for (element, filter_class), (label, values) in FILTER_CLASSES.items():
+        class_weights = scenario_composition[element][filter_class]
+        key = f"{element.lower()[:4]}_{filter_class.split('_')[0]}"
+        params[key] = {
+            value: (
+                100 / len(values)
+                if class_weights[f"Ignore {label}"]
+                else class_weights[value]
+            )
+            for value in values
+        }
+    return params
+
+
+def write_results(results, path):
+    """Write one row for each scenario to a CSV or Parquet file"""
+    path = pathlib.Path(path)
+    columns = [
+        "scenario_name",
+        "geox_id",
+        "net_gross",
+        "porosity_modifier",
+        "net_gross_modified",
+    ]
+    table = pd.DataFrame(
+        [
+            {
+                **{column: result[column] for column in columns},
+                **{
+                    f"{key}.{element}": result[key][element]
+                    for key in ("weights", "element_net_gross", "contribution")
+                    for element in ELEMENTS
+                },
+            }
+            for result in results
+        ],
+        columns=columns
+        + [
+            f"{key}.{element}"
+            for key in ("weights", "element_net_gross", "contribution")
+            for element in ELEMENTS
+        ],
+    )
+    if path.suffix == ".csv":
+        table.to_csv(path, index=False)
+    elif path.suffix == ".parquet":
+        table.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Results must be written to CSV or Parquet, not {path.name}")
+
+
+def render_reports(results, directory, executor=None):
+    """Create one report for each GeoX ID, returns the paths of the reports"""
+    by_geox_id = {}
+    for result in results:
+        by_geox_id.setdefault(result["geox_id"], []).append(result)
+
+    report_cfg = config.app.report[config.app.batch.report]
+    date = datetime.now()
+    jobs = []
+    for geox_id, scenarios in by_geox_id.items():
+        data = {
+            "date": date,
+            "geox_id": geox_id,
+            "scenario_list": "\n".join(s["scenario_name"] for s in scenarios),
+            "scenarios": [
+                {k: v for k, v in s.items() if k != "geox_id"} for s in scenarios
+            ],
+        }
+        file_name = report_cfg.replace("file_name", **data)
+        if geox_id:
+            file_name = f"{_FILE_NAME_UNSAFE.sub('_', geox_id)}_{file_name}"
+        jobs.append((data, pathlib.Path(directory) / file_name))
+
+    run = map if executor is None else executor.map
+    return list(run(_render_report, *zip(*jobs)))
+
+
+_FILE_NAME_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def _render_report(data, path):
+    """Render one report, in a worker process"""
+    report_cfg = config.app.report[config.app.batch.report]
+    reports.generate(
+        report_cfg.generator,
+        template_url=report_cfg.template,
+        cfg=report_cfg,
+        data=data,
+        output_path=path,
+    )
+    return path
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,8 @@ app.update_from_env(
         "HEADER_COLOR": ("style", "header_color"),
         "LOGO": ("style", "logo"),
         "READER": ("apps", "reader"),
+        "EXPORT_PATH": ("exports", "path"),
+        "REPORT_PATH": ("jobs", "path"),
     },
     converters={"RAW_CSS": "list", "CSS_FILES": "list"},
 )
@@ -5,12 +5,21 @@ This file is run when starting Geo:N:G with a command like
     $ panel serve app
 """
 
+# Third party imports
+import panel as pn
+
 # Geo:N:G imports
 from app import apps
 from app import config
+from app.assets import background
+from app.assets import state
 from geong_common import log
 
 # Serve main view of app
 if __name__.startswith("bokeh"):
     log.init()
     apps.view().servable(title=config.app.apps.title)
+
+    # Make sure models are read before users need them, using this session's
+    # access token if the server could not read them at startup
+    pn.state.onload(lambda: background.run(state.warm_models))
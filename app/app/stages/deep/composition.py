@@ -1,5 +1,8 @@
 """Second stage: Composition"""
 
+# Standard library imports
+import functools
+
 # Third party imports
 import panel as pn
 import param
@@ -8,9 +11,10 @@ import pyplugs
 # Geo:N:G imports
 from app import config
 from app.assets import panes
+from app.assets import preview
 from app.assets import state
 from geong_common import config as geong_config
-from geong_common import readers
+from geong_common.data import compiled
 from geong_common.data import net_gross
 
 # Find name of app and stage
@@ -48,10 +52,10 @@ class Model(param.Parameterized):
         super().__init__()
 
         self.report_from_set_up = report_from_set_up
-        self._state = state.get_user_state().setdefault(APP, {})
         self._initial_filter_classes = initial_values["filter_classes"]
         for building_block_type, value in initial_values["composition"].items():
             setattr(self, building_block_type.replace(" ", "_").lower(), value)
+        self.estimate_net_gross()
 
     @property
     def total(self):
@@ -81,6 +85,7 @@ class Model(param.Parameterized):
     @param.output(param.Dict)
     def report_from_composition(self):
         """Store user input to the final report"""
+        self.estimate_net_gross()
         return {
             **self.report_from_set_up,
             "weights": {
@@ -88,15 +93,17 @@ class Model(param.Parameterized):
             },
         }
 
-    @param.depends(*ALL_ELEMENTS, watch=True)
+    def building_block_coefficients(self):
+        """Compile the model for previewing N:G in the browser"""
+        return compiled.building_block_coefficients(
+            model=state.get_model(APP), filter_classes=self._initial_filter_classes
+        )
+
     def estimate_net_gross(self):
+        """Calculate N:G with the full model, previewed in the browser until then"""
         if self.total == 100:
-            if "model" not in self._state:
-                self._state["model"] = readers.read_model(
-                    reader=config.app.apps.reader, dataset=APP
-                )
             self.net_gross = net_gross.calculate_deep_net_gross(
-                model=self._state["model"],
+                model=state.get_model(APP),
                 composition={
                     **self._initial_filter_classes,
                     "building_block_type": {
@@ -113,26 +120,34 @@ class Model(param.Parameterized):
 class View:
     """Define the look and feel of the stage"""
 
-    next_stage_button = panes.next_stage_button(APP)
+    next_stage_button = panes.next_stage_button(
+        APP, prepare=functools.partial(state.get_model, APP)
+    )
 
     def panel(self):
-        sliders = [
-            panes.element_slider(getattr(self.param, element))
+        sliders = {
+            getattr(self.param, element).label: panes.element_slider(
+                getattr(self.param, element)
+            )
             for element in ALL_ELEMENTS
-        ]
+        }
+        number = pn.indicators.Number.from_param(
+            self.param.net_gross,
+            format="{value:.0f}%",
+            nan_format="...",
+            default_color="red",
+            colors=[(100, "black")],
+        )
+        preview.link_building_blocks(
+            number, sliders, coefficients=self.building_block_coefficients()
+        )
 
         return pn.Column(
             panes.headline(CFG.label, popup_label="deep_composition"),
             pn.Row(
-                pn.Column(*sliders, sizing_mode="stretch_width"),
+                pn.Column(*sliders.values(), sizing_mode="stretch_width"),
                 pn.Column(
-                    pn.indicators.Number.from_param(
-                        self.param.net_gross,
-                        format="{value:.0f}%",
-                        nan_format="...",
-                        default_color="red",
-                        colors=[(100, "black")],
-                    ),
+                    number,
                     pn.layout.Spacer(height=20),
                     pn.Row(panes.previous_stage_button(APP), self.next_stage_button),
                 ),
@@ -10,8 +10,10 @@ import pyplugs
 
 # Geo:N:G imports
 from app.assets import panes
+from app.assets import preview
 from app.assets import state
 from geong_common import config as geong_config
+from geong_common.data import compiled
 from geong_common.data import net_gross
 
 # Find name of app and stage
@@ -96,7 +98,6 @@ class Model(param.Parameterized):
 
         # Set up other parameters
         self.model_result = None
-        self._state = state.get_user_state().setdefault(APP, {})
         self.report_from_composition = report_from_composition
         self.estimate_net_gross()
 
@@ -104,6 +105,7 @@ class Model(param.Parameterized):
     @param.output(param.Dict)
     def report_from_filter_classes(self):
         """Store user input to the final report"""
+        self.estimate_net_gross()
         param_values = dict(self.param.get_param_values())
 
         params = {}
@@ -122,7 +124,7 @@ class Model(param.Parameterized):
                     )
 
         model_result = (
-            self.model_result.groupby("building_block_type")
+            self.model_result.groupby("building_block_type", observed=True)
             .agg({"net_gross": "mean", "bb_pct": "max", "result": "sum"})
             .assign(
                 element_net_gross=lambda df: 100
@@ -151,10 +153,26 @@ class Model(param.Parameterized):
 
         return params
 
-    @param.depends(*ALL_PARAMS, watch=True)
+    def filter_class_table(self):
+        """Compile the model for previewing N:G in the browser"""
+        return compiled.filter_class_table(
+            model=state.get_model(APP),
+            building_block_weights=self.report_from_composition["weights"],
+            filter_classes={
+                building_block_type: {
+                    filter_class: [
+                        label for label in values if not label.startswith("Ignore ")
+                    ]
+                    for filter_class, values in filter_classes.values()
+                }
+                for building_block_type, filter_classes in FILTER_CLASS_PARAMS.items()
+            },
+        )
+
     def estimate_net_gross(self):
+        """Calculate N:G with the full model, previewed in the browser until then"""
         self.model_result = net_gross.calculate_deep_net_gross_model(
-            model=self._state["model"],
+            model=state.get_model(APP),
             composition={
                 "building_block_type": self.report_from_composition["weights"],
                 **self.filter_class_model_input(),
@@ -189,27 +207,39 @@ class View:
         )
 
     def panel(self):
+        divisions = {
+            (building_block_type, filter_class): self.division_slider(
+                building_block_type, filter_class
+            )
+            for building_block_type, filter_classes in FILTER_CLASS_PARAMS.items()
+            for filter_class in filter_classes
+        }
+        number = pn.indicators.Number.from_param(
+            self.param.net_gross,
+            format="{value:.0f}%",
+            nan_format="...",
+            default_color="red",
+            colors=[(100, "black")],
+        )
+        preview.link_filter_classes(
+            number, list(divisions.values()), table=self.filter_class_table()
+        )
+
         return pn.Row(
             pn.layout.HSpacer(),
             pn.Column(
-                self.division_slider("Lobe", "Spatial Position"),
-                self.division_slider("Lobe", "Confinement"),
-                self.division_slider("Channel Fill", "Spatial Position"),
+                divisions["Lobe", "Spatial Position"],
+                divisions["Lobe", "Confinement"],
+                divisions["Channel Fill", "Spatial Position"],
             ),
             pn.Column(
-                self.division_slider("Lobe", "Bed Type"),
-                self.division_slider("Lobe", "Archetypes"),
-                self.division_slider("Channel Fill", "Archetypes"),
+                divisions["Lobe", "Bed Type"],
+                divisions["Lobe", "Archetypes"],
+                divisions["Channel Fill", "Archetypes"],
             ),
             pn.layout.HSpacer(),
             pn.Column(
-                pn.indicators.Number.from_param(
-                    self.param.net_gross,
-                    format="{value:.0f}%",
-                    nan_format="...",
-                    default_color="red",
-                    colors=[(100, "black")],
-                ),
+                number,
                 pn.layout.Spacer(height=20),
                 pn.Row(panes.previous_stage_button(APP), panes.next_stage_button(APP)),
             ),
@@ -1,7 +1,7 @@
 """Fifth stage: Report"""
 
 # Standard library imports
-import io
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
 # Third party imports
@@ -11,9 +11,9 @@ import pyplugs
 
 # Geo:N:G imports
 from app import config
+from app.assets import jobs
 from app.assets import panes
 from app.assets import state
-from geong_common import reports
 from geong_common.log import logger
 
 # Find name of app and stage
@@ -43,6 +43,15 @@ class Model(param.Parameterized):
             definition_order=False,
         )
         self.scenarios = self._state["scenarios"].copy()
+        self.report_button = pn.widgets.Button(
+            name="Create report", button_type="primary"
+        )
+        self.report_button.on_click(self.create_report)
+        self.report_status = pn.pane.Str("")
+        self.download_button = pn.widgets.FileDownload(
+            name="Download report", button_type="success", visible=False
+        )
+        self._report_path = None
 
     @property
     def data(self):
@@ -57,25 +66,58 @@ class Model(param.Parameterized):
             ],
         }
 
-    @param.depends("geox_id")
-    def download_report_button(self):
-        """Button for downloading report"""
-        return pn.widgets.FileDownload(
-            name="Download report",
-            button_type="success",
-            callback=self.download_report,
-            filename=self._report_cfg.replace("file_name", **self.data),
+    STATUS_TEXT = {
+        "queued": "Waiting for a free report worker ...",
+        "running": "Creating report ...",
+        "done": "",
+        "failed": "Could not create the report. Please try again.",
+    }
+
+    def create_report(self, *event):
+        """Render the final report in a worker process"""
+        data = self.data
+        self.report_button.disabled = True
+        self.download_button.visible = False
+        try:
+            job = jobs.submit(
+                jobs.render_report, CFG.report, data, directory=jobs.report_directory()
+            )
+        except BrokenProcessPool as e:
+            logger.error(f"Could not create report: {e!r}")
+            self.report_button.disabled = False
+            self.show_report_status("failed")
+            return
+        jobs.poll(
+            job,
+            on_status=self.show_report_status,
+            then=lambda job: self.report_created(job, data),
         )
 
-    def download_report(self, *event):
-        """Generate and download final report"""
-        report_stream = io.BytesIO()
-        reports.generate(
-            self._report_cfg.generator,
-            template_url=self._report_cfg.template,
-            cfg=self._report_cfg,
-            data=self.data,
-            output_path=report_stream,
+    def show_report_status(self, status):
+        """Show the status of the report job"""
+        self.report_status.object = self.STATUS_TEXT[status]
+
+    def report_created(self, job, data):
+        """Offer the report for download when the job is done"""
+        self.report_button.disabled = False
+        if jobs.status(job) != "done":
+            logger.error(f"Could not create report: {job.exception()!r}")
+            return
+
+        # Remove the previous report of this session, and the last one when the
+        # session ends
+        if self._report_path is None:
+            pn.state.on_session_destroyed(
+                lambda session_context: jobs.remove_report(self._report_path)
+            )
+        else:
+            jobs.remove_report(self._report_path)
+        self._report_path = job.result()
+
+        # Setting the file also sets the file name to the name of the file
+        self.download_button.file = self._report_path
+        self.download_button.param.set_param(
+            filename=self._report_cfg.replace("file_name", **data), visible=True
         )
 
         try:
@@ -90,10 +132,6 @@ class Model(param.Parameterized):
         # Clear scenarios from state
         self._state["scenarios"].clear()
 
-        # Reset report byte stream to start before passing it back
-        report_stream.seek(0)
-        return report_stream
-
 
 class View:
     """Define the look and feel of the stage"""
@@ -104,8 +142,10 @@ class View:
             self.scenario_selector,
             pn.Row(
                 pn.widgets.TextInput.from_param(self.param.geox_id),
-                self.download_report_button,
+                self.report_button,
+                self.download_button,
             ),
+            self.report_status,
             sizing_mode="stretch_width",
         )
 
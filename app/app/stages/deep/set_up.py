@@ -8,12 +8,23 @@ import pyplugs
 # Geo:N:G imports
 from app import config
 from app.assets import panes
+from app.assets import state
 from geong_common import readers
 from geong_common.data import composition
 
 # Find name of app and stage
 *_, PACKAGE, APP, STAGE = __name__.split(".")
 
+# Filter classes calculated for each building block type
+FILTER_CLASSES = (
+    ("Channel Fill", "architectural_style"),
+    ("Channel Fill", "relative_strike_position"),
+    ("Lobe", "architectural_style"),
+    ("Lobe", "confinement"),
+    ("Lobe", "conventional_facies_vs_hebs"),
+    ("Lobe", "spatial_position"),
+)
+
 
 class Model(param.Parameterized):
     """Data defining this stage"""
@@ -47,32 +58,41 @@ class Model(param.Parameterized):
             "systems": {"fan": "Fan System", "channel": "Channel System"},
         }[self.stratigraphic_scale][self.gross_geomorphology]
 
+    # Elements read for the current answers, reused when moving to the next stage
+    _elements = None
+
+    def read_elements(self):
+        """Read elements matching the answers, reuse them if answers are unchanged"""
+        query = {
+            "base_table": self.stratigraphic_scale,
+            "columns": ["building_block_type"] + sorted({c for _, c in FILTER_CLASSES}),
+            "building_block_type": self.building_blocks_by_table(),
+            "descriptive_reservoir_quality": self.reservoir_quality,
+        }
+        if self._elements is None or self._elements[0] != query:
+            elements = readers.read_elements(
+                reader=config.app.apps.reader, dataset=APP, **query
+            )
+            self._elements = (query, elements)
+        return self._elements[1]
+
+    def prepare_next_stage(self):
+        """Read data needed by the next stage, called in the background"""
+        self.read_elements()
+        state.get_model(APP)
+
     # Output passed on to the next stages
     @param.output(param.Dict)
     def initial_values(self):
         """Calculate initial values for the next stages by contacting the API"""
-        elements = readers.read_elements(
-            reader=config.app.apps.reader,
-            dataset=APP,
-            base_table=self.stratigraphic_scale,
-            building_block_type=self.building_blocks_by_table(),
-            descriptive_reservoir_quality=self.reservoir_quality,
-        )
+        elements = self.read_elements()
 
         return {
             "composition": composition.calculate_composition_in_group(
                 elements=elements, column="building_block_type"
             ),
             "filter_classes": composition.calculate_filter_classes(
-                elements=elements,
-                filter_classes=(
-                    ("Channel Fill", "architectural_style"),
-                    ("Channel Fill", "relative_strike_position"),
-                    ("Lobe", "architectural_style"),
-                    ("Lobe", "confinement"),
-                    ("Lobe", "conventional_facies_vs_hebs"),
-                    ("Lobe", "spatial_position"),
-                ),
+                elements=elements, filter_classes=FILTER_CLASSES
             ),
         }
 
@@ -106,7 +126,7 @@ class View:
             panes.multiple_choice(self.param.stratigraphic_scale),
             panes.multiple_choice(self.param.reservoir_quality),
             pn.layout.Spacer(height=20),
-            panes.next_stage_button(APP),
+            panes.next_stage_button(APP, prepare=self.prepare_next_stage),
             sizing_mode="stretch_width",
         )
 
@@ -10,7 +10,6 @@ from app import config
 from app.assets import panes
 from app.assets import state
 from geong_common import config as geong_config
-from geong_common import readers
 from geong_common.data import net_gross
 from geong_common.log import logger
 
@@ -66,7 +65,6 @@ class Model(param.Parameterized):
         # Initialize parameter values
         self.report_from_set_up = report_from_set_up
         self.model_result = None
-        self._state = state.get_user_state().setdefault(APP, {})
         self.element_widgets = self.layout_element_widgets()
         self.visible_elements = {}
 
@@ -187,12 +185,8 @@ class Model(param.Parameterized):
     @param.depends("element_names", *ALL_ELEMENTS, *ALL_QUALITIES, watch=True)
     def estimate_net_gross(self):
         if self.total == 100:
-            if "model" not in self._state:
-                self._state["model"] = readers.read_model(
-                    reader=config.app.apps.reader, dataset=APP
-                )
             self.model_result = net_gross.calculate_shallow_net_gross_model(
-                model=self._state["model"],
+                model=state.get_model(APP),
                 composition={
                     self.param.params(k).label: v
                     for k, v in self.param.get_param_values()
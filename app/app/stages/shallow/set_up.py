@@ -8,6 +8,7 @@ import pyplugs
 # Geo:N:G imports
 from app import config
 from app.assets import panes
+from app.assets import state
 from geong_common import readers
 from geong_common.data import composition
 
@@ -52,17 +53,34 @@ class Model(param.Parameterized):
         label="What is the anticipated N:G quality bracket?",
     )
 
+    # Elements read for the current answers, reused when moving to the next stage
+    _elements = None
+
+    def read_elements(self):
+        """Read elements matching the answers, reuse them if answers are unchanged"""
+        query = {
+            "base_table": self.stratigraphic_scale,
+            "columns": ["building_block_type"],
+            "building_block_type": self.depositional_setting,
+            "descriptive_reservoir_quality": self.reservoir_quality,
+        }
+        if self._elements is None or self._elements[0] != query:
+            elements = readers.read_elements(
+                reader=config.app.apps.reader, dataset=APP, **query
+            )
+            self._elements = (query, elements)
+        return self._elements[1]
+
+    def prepare_next_stage(self):
+        """Read data needed by the next stage, called in the background"""
+        self.read_elements()
+        state.get_model(APP)
+
     # Output passed on to the next stages
     @param.output(param.Dict)
     def initial_values(self):
         """Calculate initial values for the next stages by contacting the API"""
-        elements = readers.read_elements(
-            reader=config.app.apps.reader,
-            dataset=APP,
-            base_table=self.stratigraphic_scale,
-            building_block_type=self.depositional_setting,
-            descriptive_reservoir_quality=self.reservoir_quality,
-        )
+        elements = self.read_elements()
         group_composition = composition.calculate_composition_in_group(
             elements=elements,
             column="building_block_type",
@@ -105,7 +123,7 @@ class View:
             panes.multiple_choice(self.param.stratigraphic_scale),
             panes.multiple_choice(self.param.reservoir_quality),
             pn.layout.Spacer(height=20),
-            panes.next_stage_button(APP),
+            panes.next_stage_button(APP, prepare=self.prepare_next_stage),
             sizing_mode="stretch_width",
         )
 
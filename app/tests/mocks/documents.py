@@ -0,0 +1,55 @@
+"""Mock out a Bokeh document served to a session
+
+Callbacks scheduled on the document are recorded, and only run when a test asks
+for them, like the server would between user events.
+"""
+
+# Standard library imports
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+# Third party imports
+import bokeh.document
+import panel as pn
+
+
+class Document(bokeh.document.Document):
+    """Served Bokeh document, running scheduled callbacks when asked"""
+
+    def __init__(self):
+        super().__init__()
+        session_context = SimpleNamespace(id="session", request=None)
+        self._session_context = lambda: session_context
+        self.callbacks = []
+        self.scheduled = threading.Event()
+
+    def add_next_tick_callback(self, callback):
+        self.callbacks.append(callback)
+        self.scheduled.set()
+        return callback
+
+    def add_timeout_callback(self, callback, timeout_milliseconds):
+        return self.add_next_tick_callback(callback)
+
+    def remove_timeout_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def run_callbacks(self):
+        """Run scheduled callbacks, waiting for callbacks from other threads"""
+        assert self.scheduled.wait(timeout=5)
+        self.scheduled.clear()
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+@contextmanager
+def served_document():
+    """Pretend to serve a document"""
+    document = Document()
+    pn.state.curdoc = document
+    try:
+        yield document
+    finally:
+        pn.state.curdoc = None
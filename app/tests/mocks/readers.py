@@ -12,6 +12,7 @@ import pandas as pd
 # Geo:N:G imports
 from geong_common.data import composition
 from geong_common.data import models
+from geong_common.exceptions import TableChangedError
 
 DATA_DIR = pathlib.Path(__file__).resolve().parent
 
@@ -21,20 +22,68 @@ def read_all(reader, dataset, table):
     return pd.read_csv(DATA_DIR / f"simplified_{table}.csv")
 
 
-def read_filtered(reader, dataset, table, **filters):
+def read_filtered(reader, dataset, table, columns=None, **filters):
     """Mock for calling read_filtered() without contacting the API"""
     unfiltered = read_all(reader, dataset=dataset, table=table)
-    return models.filter_data(unfiltered, filters)
+    return models.filter_data(unfiltered, filters, columns=columns)
 
 
-def read_elements(reader, dataset, base_table, **filters):
+def read_page(
+    reader,
+    dataset,
+    table,
+    columns=None,
+    sort=(),
+    offset=0,
+    limit=None,
+    version=None,
+    **filters,
+):
+    """Mock for calling read_page() without contacting the API"""
+    if version is not None and version != read_version(reader, dataset, table):
+        raise TableChangedError(table=f"{dataset}/{table}", version=version)
+    data = read_filtered(
+        reader, dataset=dataset, table=table, columns=columns, **filters
+    )
+    if sort:
+        data = data.sort_values(
+            [key.lstrip("-") for key in sort],
+            ascending=[not key.startswith("-") for key in sort],
+            kind="stable",
+        )
+    stop = None if limit is None else offset + limit
+    return data.iloc[offset:stop], len(data)
+
+
+def read_elements(reader, dataset, base_table, columns=None, **filters):
     """Mock for calling read_elements() without contacting the API"""
     # Filter to get wells
-    wells = read_filtered(reader, dataset=dataset, table=base_table, **filters)
-    elements = read_all(reader, dataset=dataset, table="elements")
-    return composition.combine_scale_and_elements(base_table, wells, elements)
+    well_columns, element_columns = composition.columns_for_elements(
+        base_table, columns
+    )
+    wells = read_filtered(
+        reader, dataset=dataset, table=base_table, columns=well_columns, **filters
+    )
+    elements = read_filtered(
+        reader, dataset=dataset, table="elements", columns=element_columns
+    )
+    return composition.combine_scale_and_elements(
+        base_table, wells, elements, columns=columns
+    )
 
 
 def read_model(reader, dataset):
     """Mock for calling read_model() without contacting the API"""
     return pd.read_csv(DATA_DIR / "simplified_models.csv")
+
+
+def read_versioned_model(reader, dataset, version=None):
+    """Mock for calling read_versioned_model() without contacting the API"""
+    if version == "mock":
+        return version, None
+    return "mock", read_model(reader, dataset)
+
+
+def read_version(reader, dataset, table):
+    """Mock for calling read_version() without contacting the API"""
+    return "mock"
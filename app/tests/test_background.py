@@ -0,0 +1,58 @@
+"""Test running slow work in the background"""
+
+# Standard library imports
+import threading
+
+# Third party imports
+import panel as pn
+import pytest
+
+# Geo:N:G imports
+from app.assets import background
+from geong_common import sessions
+
+from .mocks import documents
+
+
+@pytest.fixture
+def document():
+    """Pretend to serve a document"""
+    with documents.served_document() as document:
+        yield document
+
+
+def test_work_is_done_directly_without_server():
+    calls = []
+    background.run(lambda: calls.append("work"), then=lambda: calls.append("then"))
+
+    assert calls == ["work", "then"]
+
+
+def test_work_is_done_on_other_thread(document):
+    calls = []
+
+    def work():
+        calls.append((threading.current_thread(), sessions.current_document()))
+
+    pane = pn.pane.Markdown()
+    background.run(work, then=lambda: calls.append("then"), loading=[pane])
+    assert pane.loading
+
+    document.run_callbacks()
+    (thread, work_document), then = calls
+    assert thread is not threading.current_thread()
+    assert work_document is document
+    assert then == "then"
+    assert not pane.loading
+
+
+def test_then_is_called_after_error(document):
+    calls = []
+
+    def work():
+        raise ValueError("Unavailable")
+
+    background.run(work, then=lambda: calls.append("then"))
+    document.run_callbacks()
+
+    assert calls == ["then"]
@@ -0,0 +1,138 @@
+"""Test batch runs of the deep marine workflow"""
+
+# Standard library imports
+from unittest import mock
+
+# Third party imports
+import pandas as pd
+import pptx
+import pytest
+import typer
+from typer.testing import CliRunner
+
+# Geo:N:G imports
+from app import batch
+from app.stages.deep import set_up
+from geong_common.data import net_gross
+
+from .mocks import readers
+
+SCENARIOS_CSV = """\
+scenario_name,geox_id,gross_geomorphology,stratigraphic_scale,reservoir_quality,\
+porosity_modifier,weights.Lobe,weights.Channel Fill,weights.Overbank,\
+filter_classes.Lobe.spatial_position.Zone1,filter_classes.Lobe.spatial_position.Zone2,\
+filter_classes.Lobe.confinement.ignore
+Given,X1,Fan Shaped,complexes,Good 65-85% NG,5,50,30,20,40,60,true
+Initial,X2,channel,systems,Moderate 30-65% NG,,,,,,,
+"""
+
+
+@pytest.fixture(autouse=True)
+def mock_readers():
+    batch.initial_values.cache_clear()
+    with mock.patch.object(batch, "readers", readers):
+        yield
+    batch.initial_values.cache_clear()
+
+
+@pytest.fixture
+def scenario_path(tmp_path):
+    path = tmp_path / "scenarios.csv"
+    path.write_text(SCENARIOS_CSV)
+    return path
+
+
+def test_set_up_answers_match_app():
+    for question, (label, answers) in batch.SET_UP.items():
+        assert set_up.Model.param[question].label == label
+        assert set_up.Model.param[question].names == answers
+
+
+def test_read_csv_scenarios(scenario_path):
+    given, initial = batch.read_scenarios(scenario_path)
+
+    assert given["gross_geomorphology"] == "fan"
+    assert given["weights"] == {"Lobe": 50, "Channel Fill": 30, "Overbank": 20}
+    assert given["filter_classes"]["Lobe"]["spatial_position"] == {
+        "Zone1": 40,
+        "Zone2": 60,
+    }
+    assert "weights" not in initial
+
+
+def test_read_toml_scenarios(tmp_path):
+    path = tmp_path / "scenarios.toml"
+    path.write_text(
+        '[[scenario]]\ngross_geomorphology = "fan"\nstratigraphic_scale = "systems"\n'
+        'reservoir_quality = "Poor <30% NG"\n[scenario.weights]\nLobe = 100\n'
+    )
+    (scenario,) = batch.read_scenarios(path)
+
+    assert scenario["scenario_name"] == "Scenario 1"
+    assert scenario["weights"] == {"Lobe": 100}
+
+
+def test_unknown_answer(tmp_path):
+    path = tmp_path / "scenarios.csv"
+    path.write_text(SCENARIOS_CSV.replace("Fan Shaped", "Fan"))
+
+    with pytest.raises(ValueError, match="gross_geomorphology"):
+        batch.read_scenarios(path)
+
+
+def test_weights_must_add_to_100(scenario_path):
+    given, _ = batch.read_scenarios(scenario_path)
+    given["weights"]["Lobe"] = 60
+
+    with pytest.raises(ValueError, match="110"):
+        batch.scenario_composition(given)
+
+
+def test_evaluate_matches_model(scenario_path):
+    scenarios = batch.read_scenarios(scenario_path)
+    compositions = [batch.scenario_composition(s) for s in scenarios]
+    results = batch.evaluate(scenarios, compositions, batch_size=1)
+
+    model = readers.read_model("mock", "deep")
+    for result, composition in zip(results, compositions):
+        assert result["net_gross"] == pytest.approx(
+            net_gross.calculate_deep_net_gross(model=model, composition=composition)
+        )
+    assert results[0]["porosity_modifier"] == min(5, results[0]["net_gross"])
+    assert results[0]["lobe_confinement"] == pytest.approx(
+        {"Confined": 100 / 3, "Unconfined": 100 / 3, "Weakly Confined": 100 / 3}
+    )
+    assert sum(results[1]["weights"].values()) == 100
+
+
+def test_cli_writes_results_and_reports(scenario_path, tmp_path):
+    cli = typer.Typer()
+    cli.command()(batch.parse_cli)
+    result = CliRunner().invoke(
+        cli,
+        [
+            str(scenario_path),
+            "--results",
+            str(tmp_path / "results.csv"),
+            "--reports",
+            str(tmp_path / "reports"),
+            "--workers",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    results = pd.read_csv(tmp_path / "results.csv")
+    assert list(results.scenario_name) == ["Given", "Initial"]
+    assert results.net_gross_modified.tolist() == pytest.approx(
+        (results.net_gross - results.porosity_modifier).tolist()
+    )
+
+    report_paths = sorted((tmp_path / "reports").glob("*.pptx"))
+    assert [path.name.split("_")[0] for path in report_paths] == ["X1", "X2"]
+    titles = [
+        slide.shapes.title.text
+        for slide in pptx.Presentation(report_paths[0]).slides
+        if slide.shapes.title is not None
+    ]
+    assert "Given" in titles
@@ -1,13 +1,19 @@
 """Test functionality of Deep Water workflow"""
 
 # Standard library imports
+from concurrent.futures.process import BrokenProcessPool
 from unittest import mock
 
 # Third party imports
+import panel as pn
 import pytest
 
 # Geo:N:G imports
 from app import stages
+from app.assets import jobs
+from app.assets import state
+from geong_common.data import compiled
+from geong_common.data import net_gross
 
 from .mocks import readers
 
@@ -57,7 +63,15 @@ STAGES = {
                 },
             },
         },
-        "report_from_composition": {},
+        "report_from_composition": {
+            "weights": {
+                "Lobe": 50,
+                "Channel Fill": 30,
+                "Overbank": 20,
+                "MTD": 0,
+                "Drape": 0,
+            },
+        },
         "net_gross": 30,
     },
     "result": {
@@ -91,7 +105,7 @@ STAGES = {
 }
 
 
-@mock.patch("app.stages.deep.composition.readers", readers)
+@mock.patch("app.assets.state.readers", readers)
 def get_stage(stage):
     """Get and initialize one stage"""
     stage_obj = stages.get_stage(APP, stage)
@@ -194,3 +208,109 @@ def test_output_from_result():
 
     expected_net_gross = 30
     assert stage.net_gross == pytest.approx(expected_net_gross)
+
+
+def test_elements_prepared_for_next_stage_are_reused():
+    """Test that elements read in the background are not read again"""
+    stage = get_stage("set_up")
+    stage.gross_geomorphology = "channel"
+    stage.stratigraphic_scale = "complexes"
+    stage.reservoir_quality = "Moderate 30-65% NG"
+
+    read_elements = mock.Mock(wraps=readers.read_elements)
+    with mock.patch.object(readers, "read_elements", read_elements), mock.patch(
+        "app.stages.deep.set_up.readers", readers
+    ), mock.patch("app.assets.state.readers", readers):
+        stage.prepare_next_stage()
+        stage.initial_values()
+        stage.reservoir_quality = "Poor <30% NG"
+        stage.initial_values()
+
+    assert read_elements.call_count == 2
+
+
+@pytest.fixture
+def filter_classes():
+    """Filter classes stage with its widgets, counting N:G evaluations"""
+    with mock.patch("app.assets.state.readers", readers):
+        stage = get_stage("filter_classes")
+        layout = stage.panel()
+        calculate = mock.Mock(wraps=net_gross.calculate_deep_net_gross_model)
+        with mock.patch.object(net_gross, "calculate_deep_net_gross_model", calculate):
+            yield stage, layout, calculate
+
+
+def test_no_evaluation_when_spinner_changes(filter_classes):
+    stage, _, calculate = filter_classes
+    stage.lobe_confinement_confined = 10
+
+    assert calculate.call_count == 0
+    assert stage.lobe_confinement_confined == 10
+    assert (
+        stage.lobe_confinement_confined
+        + stage.lobe_confinement_unconfined
+        + stage.lobe_confinement_weaklyconfined
+    ) == 100
+
+
+def test_no_evaluation_when_slider_is_dragged(filter_classes):
+    stage, layout, calculate = filter_classes
+    slider = layout.select(pn.widgets.IntRangeSlider)[0]
+    for end in range(40, 60):
+        slider.value = (20, end)
+
+    assert calculate.call_count == 0
+    assert (
+        stage.lobe_spatial_zone1,
+        stage.lobe_spatial_zone2,
+        stage.lobe_spatial_zone3,
+    ) == (20, 39, 41)
+
+
+def test_report_evaluates_model(filter_classes):
+    stage, _, calculate = filter_classes
+    stage.lobe_conventional_conventionalturbidites = 40
+    stage.report_from_filter_classes()
+
+    assert calculate.call_count == 1
+    assert stage.lobe_conventional_hybrideventbeds == 60
+
+
+def test_preview_matches_model(filter_classes):
+    """Test that the values sent to the browser give the N:G of the model"""
+    stage, layout, _ = filter_classes
+    stage.lobe_spatial_zone1 = 20
+    stage.lobe_conventional_conventionalturbidites = 40
+    stage.chan_architectural_ignore = True
+    stage.estimate_net_gross()
+
+    slider = layout.select(pn.widgets.IntRangeSlider)[0]
+    args = pn.links.Callback.registry[slider][0].args
+    divisions = [
+        args[f"divisions_{idx}"] for idx in range(len(args["table"]["filter_classes"]))
+    ]
+    weights = [
+        (
+            [d.value, 100 - d.value]
+            if isinstance(d.value, int)
+            else [d.value[0], d.value[1] - d.value[0], 100 - d.value[1]]
+        )
+        for d in divisions
+    ]
+    ignored = [args[f"ignores_{idx}"].value for idx in range(len(divisions))]
+
+    assert compiled.evaluate_filter_class_table(
+        args["table"], weights, ignored
+    ) == pytest.approx(stage.net_gross)
+
+
+def test_report_can_be_retried_when_workers_fail():
+    user_state = {APP: {"scenarios": {}}}
+    with mock.patch.object(state, "get_user_state", return_value=user_state):
+        stage = stages.get_stage(APP, "report")(scenario_names=[])
+    submit = mock.Mock(side_effect=BrokenProcessPool("No workers"))
+    with mock.patch.object(jobs, "submit", submit):
+        stage.create_report()
+
+    assert not stage.report_button.disabled
+    assert stage.report_status.object == stage.STATUS_TEXT["failed"]
@@ -0,0 +1,127 @@
+"""Test exports from the data viewer"""
+
+# Standard library imports
+import shutil
+import zipfile
+from unittest import mock
+
+# Third party imports
+import pandas as pd
+import pytest
+
+# Geo:N:G imports
+from app import config
+from app.assets import exports
+
+from .mocks import readers
+
+COLUMNS = ["building_block_type", "ng_vsh40_pct"]
+
+
+@pytest.fixture
+def read_page(monkeypatch, tmp_path):
+    """Read pages of seven rows with the mock reader, export to a fresh directory
+
+    The version of the table is changed by setting the return value of
+    readers.read_version.
+    """
+    monkeypatch.setattr(exports, "_directory", tmp_path)
+    monkeypatch.setitem(config.app.exports.data, "chunk_rows", 7)
+    read_page = mock.Mock(wraps=readers.read_page)
+    read_version = mock.Mock(return_value="mock")
+    monkeypatch.setattr(readers, "read_version", read_version)
+    with mock.patch.multiple(
+        exports.readers, read_page=read_page, read_version=read_version
+    ):
+        yield read_page
+
+
+@pytest.fixture
+def expected():
+    """The elements table, sorted like in the data viewer"""
+    elements = readers.read_all(None, "deep", "elements").loc[:, COLUMNS]
+    return elements.sort_values("ng_vsh40_pct", ascending=False, kind="stable")
+
+
+@pytest.mark.parametrize(
+    "file_format, read_file",
+    [("csv", pd.read_csv), ("parquet", pd.read_parquet)],
+)
+def test_export_matches_table(read_page, expected, file_format, read_file):
+    path = exports.export("deep", "elements", COLUMNS, file_format)
+    exported = read_file(path)
+
+    assert path.suffix == f".{file_format}"
+    assert read_page.call_count == 3
+    pd.testing.assert_frame_equal(
+        exported, expected.reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_excel_export_has_all_rows(read_page, expected):
+    path = exports.export("deep", "elements", COLUMNS, "xlsx")
+    with zipfile.ZipFile(path) as xlsx:
+        sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+
+    assert read_page.call_count == 3
+    assert sheet.count("<row ") == len(expected) + 1
+
+
+def test_export_is_reused(read_page):
+    first = exports.export("deep", "elements", COLUMNS, "csv")
+    second = exports.export("deep", "elements", COLUMNS, "csv")
+
+    assert second == first
+    assert read_page.call_count == 3
+
+
+def test_export_of_new_version_replaces_old(read_page):
+    first = exports.export("deep", "elements", COLUMNS, "csv")
+    other_columns = exports.export("deep", "elements", COLUMNS[::-1], "csv")
+    assert first.exists()
+
+    readers.read_version.return_value = "new"
+    second = exports.export("deep", "elements", COLUMNS, "csv")
+
+    assert second != first
+    assert not first.exists()
+    assert not other_columns.exists()
+    assert sorted(path.name for path in second.parent.iterdir()) == [second.name]
+
+
+def test_export_starts_over_when_table_changes(read_page, expected):
+    def change_table(*args, **kwargs):
+        if read_page.call_count == 2:
+            readers.read_version.return_value = "new"
+        return readers.read_page(*args, **kwargs)
+
+    read_page.side_effect = change_table
+    path = exports.export("deep", "elements", COLUMNS, "csv")
+
+    versions = [c.kwargs["version"] for c in read_page.call_args_list]
+    assert versions == ["mock", "mock", "new", "new", "new"]
+    assert exports._hash("new") in path.name
+    pd.testing.assert_frame_equal(
+        pd.read_csv(path), expected.reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_removed_export_is_exported_again(read_page):
+    old = exports.export("deep", "elements", COLUMNS, "csv")
+    readers.read_version.return_value = "new"
+    new = exports.export("deep", "elements", COLUMNS, "csv")
+    content = exports.read_export(old, "deep", "elements", COLUMNS, "csv")
+
+    assert not old.exists()
+    assert content == new.read_bytes()
+    assert read_page.call_count == 6
+
+
+def test_temporary_export_directory_is_removed_at_exit(monkeypatch):
+    monkeypatch.setattr(exports, "_directory", None)
+    monkeypatch.setitem(config.app.exports.data, "path", "")
+    with mock.patch.object(exports.atexit, "register") as register:
+        directory = exports.export_directory()
+    shutil.rmtree(directory)
+
+    register.assert_called_once_with(shutil.rmtree, directory, ignore_errors=True)
@@ -0,0 +1,49 @@
+"""Test jobs run in worker processes"""
+
+# Standard library imports
+import operator
+import shutil
+from unittest import mock
+
+# Geo:N:G imports
+from app import config
+from app.assets import jobs
+
+
+def test_job_result_is_passed_on():
+    statuses, results = [], []
+    job = jobs.submit(operator.add, 20, 22)
+    jobs.poll(job, on_status=statuses.append, then=lambda job: results.append(job))
+
+    assert statuses == ["done"]
+    assert results == [job]
+    assert job.result() == 42
+
+
+def test_failed_job_is_reported():
+    statuses = []
+    job = jobs.submit(operator.truediv, 1, 0)
+    jobs.poll(job, on_status=statuses.append, then=lambda job: None)
+
+    assert statuses == ["failed"]
+    assert isinstance(job.exception(), ZeroDivisionError)
+
+
+def test_remove_report(tmp_path):
+    path = tmp_path / "report.pptx"
+    path.write_bytes(b"report")
+    jobs.remove_report(str(path))
+    jobs.remove_report(str(path))
+    jobs.remove_report(None)
+
+    assert not path.exists()
+
+
+def test_temporary_report_directory_is_removed_at_exit(monkeypatch):
+    monkeypatch.setattr(jobs, "_directory", None)
+    monkeypatch.setitem(config.app.jobs.data, "path", "")
+    with mock.patch.object(jobs.atexit, "register") as register:
+        directory = jobs.report_directory()
+    shutil.rmtree(directory)
+
+    register.assert_called_once_with(shutil.rmtree, directory, ignore_errors=True)
@@ -0,0 +1,83 @@
+"""Test tables read one page at a time"""
+
+# Standard library imports
+import functools
+from unittest import mock
+
+# Third party imports
+import panel as pn
+import pytest
+
+# Geo:N:G imports
+from app.assets import paging
+
+from .mocks import readers
+
+
+@pytest.fixture
+def read_page():
+    """Count reads of pages of the elements table"""
+    return mock.Mock(
+        wraps=functools.partial(
+            readers.read_page,
+            None,
+            "deep",
+            "elements",
+            columns=["building_block_type", "ng_vsh40_pct"],
+        )
+    )
+
+
+@pytest.fixture
+def table(read_page):
+    """A table showing five rows per page, sorted by N:G"""
+    return paging.PagedTabulator(
+        read_page, sorters=[{"field": "ng_vsh40_pct", "dir": "desc"}], page_size=5
+    )
+
+
+def test_panel_version_is_supported():
+    assert pn.__version__.startswith(paging.PANEL_VERSIONS)
+
+
+def test_only_one_page_is_read(table, read_page):
+    model = table.get_root()
+
+    read_page.assert_called_once_with(sort=["-ng_vsh40_pct"], offset=0, limit=5)
+    assert len(table.value) == 5
+    assert list(model.source.data["ng_vsh40_pct"]) == [98.0, 96.2, 92.5, 89.7, 86.8]
+    assert model.max_page == 4
+
+
+def test_page_is_read_when_page_changes(table, read_page):
+    model = table.get_root()
+    table.page = 2
+
+    read_page.assert_called_with(sort=["-ng_vsh40_pct"], offset=5, limit=5)
+    assert read_page.call_count == 2
+    assert list(model.source.data["ng_vsh40_pct"]) == list(table.value.ng_vsh40_pct)
+
+
+def test_page_is_read_when_sorting_changes(table, read_page):
+    model = table.get_root()
+    table.sorters = [{"field": "building_block_type", "dir": "asc"}]
+
+    read_page.assert_called_with(sort=["building_block_type"], offset=0, limit=5)
+    assert read_page.call_count == 2
+    assert model.source.data["building_block_type"][0] == "Channel Fill"
+
+
+def test_page_is_kept_when_read_fails(table, read_page):
+    model = table.get_root()
+    first_page = table.value
+    read_page.side_effect = ConnectionError("API is down")
+    table.page = 2
+
+    assert table.value is first_page
+    assert list(model.source.data["ng_vsh40_pct"]) == list(first_page.ng_vsh40_pct)
+
+    read_page.side_effect = None
+    table.page = 3
+    table.page = 2
+    assert read_page.call_count == 4
+    assert table.value is not first_page
@@ -0,0 +1,45 @@
+"""Test that the app starts quickly
+
+Most of the import time is spent importing Panel, which is needed to serve the
+app. Other slow libraries should only be imported when first used. The import
+time is recorded in the test report. It is checked against the budget when the
+CHECK_IMPORT_TIME environment variable is set, with the budget multiplied by its
+value to allow for slower machines. The unit test workflow sets it.
+"""
+
+# Third party imports
+import pytest
+
+# Seconds allowed for importing app.main on a developer machine, about three times
+# the time it takes today
+BUDGET = 4.0
+
+# Libraries that are slow to import, and not needed to start the app
+LAZY_MODULES = [
+    "azure.storage.blob",
+    "opencensus",
+    "pptx",
+    "statsmodels",
+    "xlsxwriter",
+]
+
+
+@pytest.fixture(scope="module")
+def app_import(import_time):
+    return import_time("app.main")
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_slow_libraries_are_imported_lazily(app_import, module):
+    _, imported = app_import
+    assert module not in imported
+
+
+def test_import_time_is_recorded(app_import, record_property):
+    seconds, _ = app_import
+    record_property("import_time", seconds)
+
+
+def test_import_time_within_budget(app_import, import_time_factor):
+    seconds, _ = app_import
+    assert seconds < BUDGET * import_time_factor
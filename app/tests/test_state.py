@@ -0,0 +1,96 @@
+"""Test state shared between sessions"""
+
+# Standard library imports
+from unittest import mock
+
+# Third party imports
+import pytest
+from bokeh.document import Document
+
+# Geo:N:G imports
+from app import config
+from app.assets import state
+from geong_common import sessions
+from geong_common.exceptions import APIResponseError
+
+from .mocks import readers
+
+
+@pytest.fixture
+def read_model():
+    """Count reads of models, and clear the shared models"""
+    state.get_shared_state().pop("models", None)
+    state._server_checks.clear()
+    read_versioned_model = mock.Mock(wraps=readers.read_versioned_model)
+    with mock.patch.object(state.readers, "read_versioned_model", read_versioned_model):
+        yield read_versioned_model
+    state.get_shared_state().pop("models", None)
+    state._server_checks.clear()
+
+
+def test_model_is_shared(read_model):
+    first = state.get_model("deep")
+    second = state.get_model("deep")
+
+    assert second is first
+    assert read_model.call_count == 1
+
+
+def test_model_is_revalidated(read_model, monkeypatch):
+    monkeypatch.setitem(config.app.models.data, "revalidate_interval", 0)
+    first = state.get_model("deep")
+    second = state.get_model("deep")
+
+    assert second is first
+    assert read_model.call_count == 2
+    assert read_model.call_args.kwargs["version"] == "mock"
+
+
+def test_current_model_used_when_revalidation_fails(read_model, monkeypatch):
+    monkeypatch.setitem(config.app.models.data, "revalidate_interval", 0)
+    first = state.get_model("deep")
+    read_model.side_effect = ConnectionError("API is down")
+
+    assert state.get_model("deep") is first
+
+
+def test_each_session_checks_model(read_model):
+    first = state.get_model("deep")
+    with sessions.for_document(Document()):
+        second = state.get_model("deep")
+        third = state.get_model("deep")
+
+    assert second is first
+    assert third is first
+    assert read_model.call_count == 2
+    assert read_model.call_args.kwargs["version"] == "mock"
+
+
+def test_model_not_shared_with_unauthorized_session(read_model):
+    state.get_model("deep")
+    read_model.side_effect = APIResponseError(
+        user_message="No access", status_code=403, reason="Forbidden"
+    )
+
+    with sessions.for_document(Document()), pytest.raises(APIResponseError):
+        state.get_model("deep")
+
+
+def test_session_loses_model_when_unauthorized(read_model, monkeypatch):
+    monkeypatch.setitem(config.app.models.data, "revalidate_interval", 0)
+    with sessions.for_document(Document()):
+        state.get_model("deep")
+        read_model.side_effect = APIResponseError(
+            user_message="No access", status_code=403, reason="Forbidden"
+        )
+        state.get_model("deep")  # Current model, while checking in the background
+
+        with pytest.raises(APIResponseError):
+            state.get_model("deep")
+
+
+def test_warm_models(read_model):
+    state.warm_models()
+
+    datasets = {c.kwargs["dataset"] for c in read_model.call_args_list}
+    assert datasets == {"deep", "shallow"}
@@ -26,6 +26,7 @@ geong.update_from_env(
     {
         "LOG_LEVEL": ("log", "console", "level"),
         "JSON_LOGS": ("log", "console", "json_logs"),
+        "TRACE_PATH": ("tracing", "path"),
     },
     converters={"JSON_LOGS": "bool"},
 )
@@ -0,0 +1,204 @@
+"""Cache dataframes within a memory budget
+
+Entries are measured with their deep memory usage when they are added, and the
+least recently used entries are evicted to keep the total size within the
+budget. Entries larger than the whole budget are not cached.
+
+Dataframes, series, numpy arrays and indexed tables are measured, as well as
+tuples, lists and dictionaries of them. Other values are measured with
+`sys.getsizeof()`. Indexes of indexed tables are counted as they are built: the
+entry holding the table is measured again, and other entries are evicted if the
+cache has grown past the budget. Dataframes memory-mapped from shared snapshots
+are counted in full, even though their memory may be shared with other processes.
+"""
+
+# Standard library imports
+import functools
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Geo:N:G imports
+from geong_common.data.indexed import IndexedTable
+from geong_common.log import logger
+
+
+class CacheStats(NamedTuple):
+    """Current size of a cache, and counts since it was created"""
+
+    name: str
+    size_bytes: int
+    max_bytes: int
+    entries: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class FrameCache:
+    """Least recently used cache of dataframes, limited by memory usage
+
+    The optional on_change callback is called with the current stats after
+    entries are added or removed, for instance to update metrics.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        name: str = "frames",
+        on_change: Optional[Callable[[CacheStats], None]] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.name = name
+        self.on_change = on_change
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._size_bytes = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Add a value, evicting the least recently used values if necessary"""
+        nbytes = memory_usage(value)
+        with self._lock:
+            self._remove(key)
+            if nbytes > self.max_bytes:
+                logger.warning(
+                    f"Not caching {key} in {self.name}: {nbytes} bytes is more "
+                    f"than the budget of {self.max_bytes} bytes"
+                )
+            else:
+                self._entries[key] = (value, nbytes)
+                self._size_bytes += nbytes
+                self._evict()
+                for table in _indexed_tables(value):
+                    table.on_resize(functools.partial(self.resize, key, value))
+            stats = self.stats()
+        self._notify(stats)
+
+    def resize(self, key: Hashable, value: Any) -> None:
+        """Measure an entry again after its value has grown, evict if necessary
+
+        Nothing is done if the key no longer holds the given value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not value:
+                return
+            nbytes = memory_usage(value)
+            self._entries[key] = (value, nbytes)
+            self._size_bytes += nbytes - entry[1]
+            self._evict()
+            stats = self.stats()
+        self._notify(stats)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value from the cache, and return it"""
+        with self._lock:
+            value = self._remove(key, default)
+            stats = self.stats()
+        self._notify(stats)
+        return value
+
+    def clear(self) -> None:
+        """Remove all values from the cache"""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+            stats = self.stats()
+        self._notify(stats)
+
+    def stats(self) -> CacheStats:
+        """Current size of the cache, and counts since it was created"""
+        return CacheStats(
+            name=self.name,
+            size_bytes=self._size_bytes,
+            max_bytes=self.max_bytes,
+            entries=len(self._entries),
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+        )
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._entries))
+
+    def _evict(self):
+        """Evict least recently used entries until within budget, lock must be held"""
+        while self._size_bytes > self.max_bytes:
+            evicted_key, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_bytes
+            self._evictions += 1
+            logger.info(
+                f"Evicted {evicted_key} from {self.name}, "
+                f"{self._size_bytes} of {self.max_bytes} bytes used"
+            )
+
+    def _remove(self, key, default=None):
+        """Remove one entry, the lock must be held"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self._size_bytes -= entry[1]
+        return entry[0]
+
+    def _notify(self, stats):
+        if self.on_change is not None:
+            self.on_change(stats)
+
+
+def memory_usage(value: Any) -> int:
+    """Number of bytes used by a value, including the objects it refers to"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, IndexedTable):
+        return value.data_nbytes + value.index_nbytes()
+    if isinstance(value, (tuple, list)):
+        return sum(memory_usage(item) for item in value)
+    if isinstance(value, dict):
+        return sum(memory_usage(k) + memory_usage(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _indexed_tables(value: Any) -> Iterator[IndexedTable]:
+    """Indexed tables in a value, found like memory_usage() measures them"""
+    if isinstance(value, IndexedTable):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _indexed_tables(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _indexed_tables(item)
@@ -0,0 +1,169 @@
+"""Compile models to coefficients, so that N:G can be previewed in the browser
+
+The deep N:G estimate is linear in the weight of each building block type, and
+in the weight of each filter class value. A model is therefore compiled once per
+stage, to coefficients that are sent to the browser, where the N:G is updated
+as users move sliders without contacting the server. The server still calculates
+the N:G with the full model when the user moves to the next stage.
+
+The evaluate_...() functions mirror the calculations done in the browser, and
+are used to check that they match the calculations in net_gross.py. The same
+coefficients are used by evaluate_compositions() to calculate the N:G of many
+scenarios at once, for instance in batch runs.
+"""
+
+# Standard library imports
+from typing import Dict
+from typing import List
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Geo:N:G imports
+from geong_common.data import net_gross
+
+
+def building_block_coefficients(model, filter_classes) -> Dict[str, float]:
+    """Coefficients of each building block type for fixed filter classes
+
+    The N:G is the sum of each building block weight, in percent, times its
+    coefficient.
+    """
+    building_block_types = model.loc[:, "building_block_type"].unique()
+    unit_weights = {
+        building_block_type: 1 for building_block_type in building_block_types
+    }
+    model_result = net_gross.calculate_deep_net_gross_model(
+        model=model,
+        composition={**filter_classes, "building_block_type": unit_weights},
+    )
+    return {
+        str(building_block_type): float(result)
+        for building_block_type, result in model_result.groupby(
+            "building_block_type", observed=True
+        )["result"]
+        .sum()
+        .items()
+    }
+
+
+def evaluate_building_blocks(coefficients, weights) -> float:
+    """Calculate N:G from building block weights, like the browser does"""
+    if sum(weights.values()) != 100:
+        return float("nan")
+    return sum(
+        weight * coefficients.get(building_block_type, 0)
+        for building_block_type, weight in weights.items()
+    )
+
+
+def filter_class_table(model, building_block_weights, filter_classes) -> dict:
+    """Coefficients of each model row, and codes of their filter class values
+
+    Filter classes are given as lists of values for each filter class of each
+    building block type, in the order used by the sliders. Codes index into
+    these lists. Values not in a list get the code len(values), and weight 0.
+    Missing values get the code -1, and are not weighted.
+    """
+    coefficients = model.loc[:, "net_gross"] * [
+        building_block_weights[building_block_type]
+        for building_block_type in model.loc[:, "building_block_type"]
+    ]
+    table = {"coefficients": coefficients.astype(float).tolist(), "filter_classes": []}
+    for building_block_type, classes in filter_classes.items():
+        is_block = (
+            model.loc[:, "building_block_type"] == building_block_type
+        ).to_numpy()
+        rows = [int(row) for row in is_block.nonzero()[0]]
+        for filter_class, values in classes.items():
+            column = model.loc[is_block, filter_class]
+            table["filter_classes"].append(
+                {
+                    "building_block_type": building_block_type,
+                    "filter_class": filter_class,
+                    "values": list(values),
+                    "num_values": len([v for v in column.unique() if v]),
+                    "rows": rows,
+                    "codes": _codes(column, values),
+                }
+            )
+    return table
+
+
+def evaluate_filter_class_table(table, weights, ignored) -> float:
+    """Calculate N:G from filter class weights, like the browser does
+
+    Weights and ignored flags are given for each filter class in the table.
+    """
+    ratios = list(table["coefficients"])
+    for filter_class, class_weights, is_ignored in zip(
+        table["filter_classes"], weights, ignored
+    ):
+        for row, code in zip(filter_class["rows"], filter_class["codes"]):
+            if is_ignored:
+                ratios[row] /= filter_class["num_values"]
+            elif code >= 0:
+                weight = class_weights[code] if code < len(class_weights) else 0
+                ratios[row] *= weight / 100
+    return sum(ratios)
+
+
+def evaluate_compositions(model, compositions) -> pd.DataFrame:
+    """Calculate the N:G contribution of each building block type for many scenarios
+
+    Compositions are given in the format used by calculate_deep_net_gross_model()
+    in net_gross.py, and are evaluated together with array operations. Returns one
+    row for each composition and one column for each building block type. The sum
+    of each row is the N:G of the composition.
+    """
+    building_block_types = model.loc[:, "building_block_type"].astype(str).to_numpy()
+    labels, label_codes = np.unique(building_block_types, return_inverse=True)
+    building_block_weights = np.array(
+        [
+            [composition["building_block_type"][label] for label in labels]
+            for composition in compositions
+        ],
+        dtype=float,
+    ).reshape(len(compositions), len(labels))
+    ratios = building_block_weights[:, label_codes] * model.loc[
+        :, "net_gross"
+    ].to_numpy(dtype=float)
+
+    for building_block_type in ("Channel Fill", "Lobe"):
+        is_block = building_block_types == building_block_type
+        filter_classes = dict.fromkeys(
+            filter_class
+            for composition in compositions
+            for filter_class in composition.get(building_block_type, {})
+        )
+        for filter_class in filter_classes:
+            column = model.loc[is_block, filter_class]
+            values = list(column.unique())
+            num_values = len([v for v in values if v])
+
+            # The last column is used for missing values, which are not weighted
+            factors = np.ones((len(compositions), len(values) + 1))
+            for idx, composition in enumerate(compositions):
+                weights = composition.get(building_block_type, {}).get(filter_class)
+                if weights is None:
+                    continue
+                ignores = [v for k, v in weights.items() if k.startswith("Ignore ")]
+                if ignores and ignores[0]:
+                    factors[idx, :] = 1 / num_values
+                else:
+                    factors[idx, :-1] = [weights.get(v, 0) / 100 for v in values]
+            ratios[:, is_block] *= factors[:, _codes(column, values)]
+
+    order = list(dict.fromkeys(building_block_types))
+    return pd.DataFrame(
+        {label: ratios[:, building_block_types == label].sum(axis=1) for label in order}
+    )
+
+
+def _codes(column, values) -> List[int]:
+    """Index of each value in a list of values"""
+    positions = {value: idx for idx, value in enumerate(values)}
+    return [
+        -1 if pd.isna(value) else positions.get(value, len(values)) for value in column
+    ]
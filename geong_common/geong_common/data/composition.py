@@ -11,7 +11,7 @@ def calculate_composition_in_group(elements, column, threshold=0):
     """Calculate composition of elements in a given column"""
     logger.info(f"Calculate {column} composition based on {len(elements)} elements")
     return (
-        elements.groupby(column)
+        elements.groupby(column, observed=True)
         .size()
         .to_frame("col_count")
         .assign(ratio=lambda df: 100 * df.col_count / (df.col_count.sum() or 1))
@@ -36,8 +36,12 @@ def calculate_quality_in_group(all_elements, elements, column):
     quality_col = "descriptive_reservoir_quality"
     logger.info(f"Calculate {column} quality based on {len(elements)} elements")
 
-    distribution = all_elements.groupby([quality_col, column]).size().unstack()
-    group_distribution = elements.groupby([quality_col, column]).size().unstack()
+    distribution = (
+        all_elements.groupby([quality_col, column], observed=True).size().unstack()
+    )
+    group_distribution = (
+        elements.groupby([quality_col, column], observed=True).size().unstack()
+    )
 
     return (group_distribution / distribution).idxmax().dropna().to_dict()
 
@@ -57,16 +61,34 @@ def calculate_filter_classes(elements, filter_classes):
     return composition
 
 
-def combine_scale_and_elements(scale_table, wells, elements):
+# Columns in the elements table identifying the parent complex or system
+PARENT_COLUMNS = {
+    "complexes": "parent_complex_identifier",
+    "systems": "parent_system_identifier",
+}
+
+
+def columns_for_elements(scale_table, columns):
+    """Find columns to read from the scale and elements tables
+
+    Returns the columns needed from the systems or complexes table and from the
+    elements table to combine them into a table with the given columns. None
+    means that all columns are needed.
+    """
+    if columns is None:
+        return None, None
+
+    parent = PARENT_COLUMNS[scale_table]
+    return ["unique_id"], list(dict.fromkeys([*columns, parent]))
+
+
+def combine_scale_and_elements(scale_table, wells, elements, columns=None):
     """Combine systems or complexes table with elements"""
-    parents = {
-        "complexes": "parent_complex_identifier",
-        "systems": "parent_system_identifier",
-    }
-    return wells.merge(
+    combined = wells.merge(
         elements,
         how="left",
         left_on="unique_id",
-        right_on=parents[scale_table],
+        right_on=PARENT_COLUMNS[scale_table],
         suffixes=("_table", ""),
     )
+    return combined if columns is None else combined.loc[:, list(columns)]
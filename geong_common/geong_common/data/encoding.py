@@ -0,0 +1,132 @@
+"""Encode and decode tables sent between the API and the app
+
+Tables can be sent either as JSON, using the split orientation known from pandas,
+or as a binary Arrow IPC stream. The media type is negotiated using the HTTP
+Accept header.
+"""
+
+# Standard library imports
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+
+# Third party imports
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+
+# Media types supported when encoding tables
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Accept header used by clients preferring the binary format
+ACCEPT_ARROW = f"{ARROW}, {JSON};q=0.9"
+
+
+def negotiate(accept: Optional[str], default: str = JSON) -> str:
+    """Choose a media type based on the given Accept header
+
+    Wildcards and missing headers give the default media type. Quality values
+    (q=...) are respected, ties are broken by the order in the header.
+    """
+    if not accept:
+        return default
+
+    quality_by_type: Dict[str, float] = {}
+    for media_range in accept.split(","):
+        media_type, *params = [p.strip() for p in media_range.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in ("*/*", "application/*"):
+            media_type = default
+        if media_type in (JSON, ARROW) and quality > 0:
+            quality_by_type.setdefault(media_type, quality)
+
+    if not quality_by_type:
+        return default
+    return max(quality_by_type, key=quality_by_type.get)
+
+
+def encode(data: pd.DataFrame, media_type: str) -> bytes:
+    """Encode a dataframe using the given media type"""
+    if media_type == ARROW:
+        return encode_arrow(data)
+    return encode_json(data)
+
+
+def decode(content: bytes, media_type: str) -> pd.DataFrame:
+    """Decode a dataframe, the media type may include parameters like charset"""
+    if media_type.partition(";")[0].strip() == ARROW:
+        return decode_arrow(content)
+    return decode_json(content)
+
+
+def encode_json(data: pd.DataFrame) -> bytes:
+    """Encode a dataframe as JSON in the split orientation
+
+    Columns are converted one at a time and rows are zipped together, instead of
+    going through DataFrame.to_dict(). The rows are written by orjson, which uses
+    the shortest exact representation of floats, so they are decoded to the same
+    values. The pandas encoder rounds them to at most 15 decimals. Missing values,
+    including NaN, are written as null.
+    """
+    rows = zip(*[_json_values(values) for _, values in data.items()])
+    return orjson.dumps(
+        {
+            "columns": data.columns.tolist(),
+            "index": data.index.tolist(),
+            "data": list(rows),
+        },
+        default=_json_default,
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def _json_values(values: pd.Series) -> Sequence[Any]:
+    """Values of a column that orjson can write, with None for missing values
+
+    Numbers are converted from the NumPy buffer in one go, orjson writes NaN as
+    null. Other columns are only converted to objects when they have missing
+    values, as orjson does not know pandas' missing value markers.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biuf":
+        return values.to_numpy().tolist()
+    if not values.hasnans:
+        return values.to_numpy()
+    return values.astype(object).where(values.notna(), None).to_numpy()
+
+
+def _json_default(value: Any) -> Any:
+    """Represent values not known by orjson, dates in ISO format"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def decode_json(content: bytes) -> pd.DataFrame:
+    """Decode a dataframe from JSON in the split orientation"""
+    return pd.DataFrame(**orjson.loads(content))
+
+
+def encode_arrow(data: pd.DataFrame) -> bytes:
+    """Encode a dataframe as an Arrow IPC stream"""
+    table = pa.Table.from_pandas(data)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_arrow(content: bytes) -> pd.DataFrame:
+    """Decode a dataframe from an Arrow IPC stream"""
+    return pa.ipc.open_stream(content).read_all().to_pandas()
@@ -0,0 +1,261 @@
+"""Tables with per-column indexes, used to filter cached data
+
+An index maps each distinct value in a column to the positions of the rows having
+that value. Building an index costs one pass over the column, while looking up
+values costs time proportional to the number of matching rows. Indexes are built
+the first time a column is filtered on, and live as long as the table. Callbacks
+registered with `IndexedTable.on_resize()` are called when the indexes grow, so
+that caches can measure the table again.
+"""
+
+# Standard library imports
+import functools
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Geo:N:G imports
+from geong_common.data import models
+
+
+class ColumnIndex:
+    """Positions of rows for each distinct value in one column
+
+    Row positions are ordered by value, so that the rows having one value, or a
+    range of values, form a contiguous slice. Missing values are placed first.
+    """
+
+    def __init__(
+        self, values: pd.Series, on_resize: Optional[Callable[[], None]] = None
+    ) -> None:
+        try:
+            codes, uniques = pd.factorize(values, sort=True)
+            self.is_sorted = True
+        except TypeError:
+            # Values of mixed types can not be sorted, range lookups are not used
+            codes, uniques = pd.factorize(values, sort=False)
+            self.is_sorted = False
+
+        self.values = values
+        self.uniques = pd.Index(uniques)
+        self.order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes + 1, minlength=len(self.uniques) + 1)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._sorted: Dict[bool, Tuple[np.ndarray, np.ndarray]] = {}
+        self.on_resize = on_resize
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the index, not counting the indexed values"""
+        uniques_nbytes = self.uniques.memory_usage(deep=True)
+        sorted_nbytes = sum(
+            ranks.nbytes + order.nbytes for ranks, order in self._sorted.values()
+        )
+        return int(
+            self.order.nbytes + self.offsets.nbytes + uniques_nbytes + sorted_nbytes
+        )
+
+    def ranks(self, descending: bool = False) -> np.ndarray:
+        """Rank of each row when sorting by value, rows with equal values share rank
+
+        Missing values are ranked last, like in pandas' sort_values().
+        """
+        return self._sort(descending)[0]
+
+    def sorted_positions(self, descending: bool = False) -> np.ndarray:
+        """Positions of all rows sorted by value, equal values in table order"""
+        return self._sort(descending)[1]
+
+    def _sort(self, descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate ranks and sort order the first time they are needed"""
+        if descending not in self._sorted:
+            if not self.is_sorted:
+                raise TypeError(f"Values in {self.values.name!r} can not be sorted")
+            num_uniques = len(self.uniques)
+            group_ranks = np.arange(-1, num_uniques)
+            if descending:
+                group_ranks = num_uniques - 1 - group_ranks
+            group_ranks[0] = num_uniques
+            ranks = np.empty(len(self.order), dtype=np.int64)
+            ranks[self.order] = np.repeat(group_ranks, np.diff(self.offsets))
+            self._sorted[descending] = (ranks, np.argsort(ranks, kind="stable"))
+            if self.on_resize is not None:
+                self.on_resize()
+        return self._sorted[descending]
+
+    def lookup(self, predicate: str, value: Any) -> np.ndarray:
+        """Find positions of the rows satisfying the predicate, in any order"""
+        if predicate == "eq":
+            return self._positions(self.uniques.get_indexer([value])[0])
+        if predicate == "in":
+            # Repeated values would otherwise repeat their rows
+            codes = np.unique(self.uniques.get_indexer(pd.Index(value)))
+            return np.concatenate(
+                [self._positions(code) for code in codes] + [self.order[:0]]
+            )
+        if predicate == "ne":
+            code = self.uniques.get_indexer([value])[0]
+            if code < 0:
+                return self.order
+            return np.concatenate(
+                [
+                    self.order[: self.offsets[code + 1]],
+                    self.order[self.offsets[code + 2] :],
+                ]
+            )
+        if self.is_sorted and not _is_unordered_categorical(self.values.dtype):
+            side = "left" if predicate in ("lt", "ge") else "right"
+            bound = self.uniques.searchsorted(value, side=side)
+            first, last = (
+                (0, bound) if predicate in ("lt", "le") else (bound, len(self.uniques))
+            )
+            return self.order[self.offsets[first + 1] : self.offsets[last + 1]]
+
+        # Fall back to comparing all values, unordered categoricals raise TypeError
+        mask = models.PREDICATES[predicate](self.values, value)
+        return np.flatnonzero(mask.to_numpy())
+
+    def _positions(self, code: int) -> np.ndarray:
+        """Positions of rows with the given code, no rows for unknown codes"""
+        if code < 0:
+            return self.order[:0]
+        return self.order[self.offsets[code + 1] : self.offsets[code + 2]]
+
+
+def _is_unordered_categorical(dtype: Any) -> bool:
+    """Unordered categoricals can be sorted, but not compared with < or >"""
+    return isinstance(dtype, pd.CategoricalDtype) and not dtype.ordered
+
+
+class IndexedTable:
+    """A dataframe with per-column indexes for fast filtering
+
+    The dataframe should not be changed after the table is created, as the
+    indexes would then be out of date.
+    """
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.data = data
+        self._indexes: Dict[str, ColumnIndex] = {}
+        self._lock = threading.Lock()
+        self._resize_callbacks: List[Callable[[], None]] = []
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def index(self, column: str) -> ColumnIndex:
+        """Get the index of one column, build it if necessary"""
+        index = self._indexes.get(column)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(column)
+                is_built = index is None
+                if is_built:
+                    index = self._indexes[column] = ColumnIndex(
+                        self.data.loc[:, column], on_resize=self._resized
+                    )
+            if is_built:
+                self._resized()
+        return index
+
+    @functools.cached_property
+    def data_nbytes(self) -> int:
+        """Memory used by the dataframe, measured once as it does not change"""
+        return int(self.data.memory_usage(deep=True).sum())
+
+    def index_nbytes(self) -> int:
+        """Memory used by the indexes that have been built"""
+        return sum(index.nbytes for index in list(self._indexes.values()))
+
+    def on_resize(self, callback: Callable[[], None]) -> None:
+        """Call a function each time an index, or the ranks of one, are built"""
+        self._resize_callbacks.append(callback)
+
+    def _resized(self) -> None:
+        """Tell listeners that the indexes use more memory"""
+        for callback in list(self._resize_callbacks):
+            callback()
+
+    def build_indexes(self, columns: Iterable[str]) -> None:
+        """Build indexes up front, columns not in the table are skipped"""
+        for column in columns:
+            if column in self.data.columns:
+                self.index(column)
+
+    def filter(
+        self, filters: Dict[str, Any], columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Filter the table, using the same filters as models.filter_data()
+
+        The positions of rows matching each filter are looked up in the indexes
+        and intersected, without comparing every row in the table.
+        """
+        positions = self._filter_positions(filters)
+        return self._take(slice(None) if positions is None else positions, columns)
+
+    def page(
+        self,
+        filters: Dict[str, Any],
+        columns: Optional[Sequence[str]] = None,
+        sort: Sequence[str] = (),
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[pd.DataFrame, int]:
+        """Filter and sort the table, and get one page of it
+
+        Sort keys are column names, prefixed with - for descending order. Rows are
+        ordered using the ranks kept by the indexes, and only the rows on the page
+        are copied. Returns the page and the total number of matching rows.
+        """
+        positions = self._filter_positions(filters)
+        keys = [
+            (key[1:], True) if key.startswith("-") else (key, False) for key in sort
+        ]
+        if positions is None and len(keys) == 1:
+            column, descending = keys[0]
+            positions = self.index(column).sorted_positions(descending)
+        elif keys:
+            if positions is None:
+                positions = np.arange(len(self.data))
+            ranks = [self.index(c).ranks(d)[positions] for c, d in reversed(keys)]
+            positions = positions[np.lexsort(ranks)]
+
+        total = len(self.data) if positions is None else len(positions)
+        rows = slice(offset, None if limit is None else offset + limit)
+        return (
+            self._take(rows if positions is None else positions[rows], columns),
+            total,
+        )
+
+    def _filter_positions(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Sorted positions of rows matching all filters, None without filters"""
+        positions = None
+        for key, value in filters.items():
+            column, predicate = models.parse_filter(key)
+            index = self.index(column)
+            value = models.coerce_filter_value(
+                self.data.dtypes[column], predicate, value
+            )
+            matches = index.lookup(predicate, value)
+            positions = (
+                np.sort(matches)
+                if positions is None
+                else np.intersect1d(positions, matches, assume_unique=True)
+            )
+        return positions
+
+    def _take(self, rows, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        """Select rows by position, and optionally columns by name"""
+        if columns is None:
+            return self.data.iloc[rows]
+        return self.data.iloc[rows, [self.data.columns.get_loc(c) for c in columns]]
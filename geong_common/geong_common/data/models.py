@@ -1,40 +1,119 @@
 # Standard library imports
 import itertools
+import operator
+from typing import Any
 from typing import Dict
+from typing import Optional
+from typing import Sequence
 
 # Third party imports
+import numpy as np
 import pandas as pd
-from statsmodels.genmod.families.family import Binomial
-from statsmodels.genmod.generalized_linear_model import GLM
 
 # Geo:N:G imports
 from geong_common import config
 
+# Predicates available as suffixes on filter keys, like depth__lt=1000
+PREDICATES = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "in": lambda values, allowed: values.isin(allowed),
+}
 
-def filter_data(data, filters: Dict[str, str]):
-    """Filter data in a DataFrame based on the given filters"""
-    for column, value in filters.items():
-        data = data.loc[data.loc[:, column] == value]
-    return data
+
+def filter_data(data, filters: Dict[str, Any], columns: Optional[Sequence[str]] = None):
+    """Filter data in a DataFrame based on the given filters
+
+    Filter keys are column names, optionally followed by a predicate, like
+    `column__in`, `column__ne` or `column__lt`. Plain column names test for
+    equality. Values for `__in` are lists or comma-separated strings. String
+    values are converted to numbers when filtering numeric columns.
+
+    All filters are combined into one mask before selecting rows. If columns are
+    given, only those columns are returned.
+    """
+    masks = [_mask(data, key, value) for key, value in filters.items()]
+    rows = np.logical_and.reduce(masks) if masks else slice(None)
+    return data.loc[rows, slice(None) if columns is None else list(columns)]
+
+
+def parse_filter(key):
+    """Split a filter key into a column name and a predicate"""
+    column, _, predicate = key.partition("__")
+    predicate = predicate or "eq"
+    if predicate not in PREDICATES:
+        raise KeyError(f"Unknown predicate {predicate!r} in filter {key!r}")
+    return column, predicate
+
+
+def coerce_filter_value(dtype, predicate, value):
+    """Convert a filter value to match a column with the given dtype
+
+    Values for `__in` are lists or comma-separated strings. String values are
+    converted to numbers when filtering numeric columns.
+    """
+    if predicate == "in":
+        if isinstance(value, str):
+            value = value.split(",")
+        return [_coerce(dtype, v) for v in value]
+    return _coerce(dtype, value)
+
+
+def _mask(data, key, value):
+    """Evaluate one filter on the data"""
+    column, predicate = parse_filter(key)
+    values = data.loc[:, column]
+    value = coerce_filter_value(values.dtype, predicate, value)
+    return PREDICATES[predicate](values, value).to_numpy()
+
+
+def _coerce(dtype, value):
+    """Convert string values from query parameters to numbers for numeric columns"""
+    if isinstance(value, str) and pd.api.types.is_numeric_dtype(dtype):
+        return pd.to_numeric(value)
+    return value
 
 
 def _train(elements, model_cfg):
-    """Construct one model per building block type"""
+    """Construct one model per building block type
+
+    statsmodels is imported here, as it is slow to import and only needed when
+    models are calculated.
+    """
+    # Third party imports
+    from statsmodels.genmod.families.family import Binomial
+    from statsmodels.genmod.generalized_linear_model import GLM
+
     models = {}
     target = model_cfg.target
     for model in model_cfg.sections:
         # Construct model formula from configuration
         terms = " + ".join(["1"] + [f"C({f})" for f in model.factors])
 
-        # Train model
+        # Train model, on categories present for this building block type only
+        data = filter_data(elements, {model_cfg.label_column: model.label})
         models[model.label] = GLM.from_formula(
             f"{target} ~ {terms}",
             family=Binomial(),
-            data=filter_data(elements, {model_cfg.label_column: model.label}),
+            data=_remove_unused_categories(data),
         ).fit(scale="X2")
     return models
 
 
+def _remove_unused_categories(data):
+    """Remove categories without data, so they don't become terms in the model"""
+    categories = {
+        column: values.cat.remove_unused_categories()
+        for column, values in data.items()
+        if isinstance(values.dtype, pd.CategoricalDtype)
+    }
+    return data.assign(**categories)
+
+
 def _get_combinations(model_cfg):
     """Construct all combinations of factors for all models"""
     factors = sorted(set.union(*[set(s.factors) for s in model_cfg.sections]))
@@ -0,0 +1,50 @@
+"""Normalize data types of tables when they are read
+
+Columns listed as categorical in the schema configuration are stored as pandas
+categoricals. Numeric columns are downcast when no information is lost: integers
+to the smallest integer type holding all values, and floats to float32 when every
+value is exactly representable.
+"""
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Geo:N:G imports
+from geong_common import config
+
+
+def normalize(data: pd.DataFrame, schema=None) -> pd.DataFrame:
+    """Convert columns of a table to the data types given by the schema"""
+    schema = config.geong.schema if schema is None else schema
+    categorical = set(schema.categorical)
+
+    converted = {}
+    for column, values in data.items():
+        if column in categorical:
+            if pd.api.types.is_object_dtype(values.dtype):
+                converted[column] = values.astype("category")
+        elif schema.downcast:
+            downcast_values = downcast(values)
+            if downcast_values is not values:
+                converted[column] = downcast_values
+
+    if not converted:
+        return data
+    return pd.DataFrame(
+        {column: converted.get(column, values) for column, values in data.items()},
+        index=data.index,
+    )
+
+
+def downcast(values: pd.Series) -> pd.Series:
+    """Store numeric values in a smaller type, if no information is lost"""
+    if values.dtype == np.int64 or values.dtype == np.int32:
+        return pd.to_numeric(values, downcast="integer")
+    if values.dtype == np.float64:
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(
+            as_float32.to_numpy(dtype=np.float64), values.to_numpy(), equal_nan=True
+        ):
+            return as_float32
+    return values
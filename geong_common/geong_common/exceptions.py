@@ -41,3 +41,22 @@ class APIResponseError(GeongError):
     def __init__(self, *, user_message, status_code, reason):
         log_message = f"{status_code} API Error: {reason}"
         super().__init__(user_message=user_message, log_message=log_message)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class TableChangedError(GeongError):
+    """A table changed while it was read in pages
+
+    Attributes:
+        table: name of the table
+        version: version of the table that was being read
+    """
+
+    def __init__(self, *, table, version):
+        super().__init__(
+            user_message="The data changed while it was read. Please try again.",
+            log_message=f"{table} is no longer at version {version}",
+        )
+        self.table = table
+        self.version = version
@@ -1,21 +1,61 @@
 """Utility functions for handling text"""
 
 # Standard library imports
+import hashlib
 import pathlib
 import re
+import threading
 from dataclasses import dataclass
 from importlib import resources
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import Tuple
 from typing import Union
 
-# Third party imports
-import requests
-
 # Geo:N:G imports
 from geong_common.log import logger
 
+if TYPE_CHECKING:
+    # Third party imports
+    import requests
+
 # RegExp used to recognize URLs
 RE_URL_PROTOCOL = re.compile(r"https?://.+")
 
+# Sessions are kept per thread to reuse connections
+_local = threading.local()
+
+# Content read by read_versioned(), keyed by URL or path. Values are the version,
+# the content and the headers used to revalidate the content.
+_versioned: Dict[str, Tuple[str, bytes, dict]] = {}
+
+
+def http_get(url: str, headers: dict = None, **request_args) -> "requests.Response":
+    """Send a GET request, advertising compressed content encodings
+
+    The response body is decoded transparently by requests, which is imported on
+    first use as it is slow to import.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = _new_session()
+
+    return session.get(url, headers=headers, **request_args)
+
+
+def _new_session() -> "requests.Session":
+    """Session advertising the content encodings that can be decoded
+
+    These include zstd if zstandard is installed.
+    """
+    # Third party imports
+    import requests
+    from urllib3.util import make_headers
+
+    session = requests.Session()
+    session.headers.update(make_headers(accept_encoding=True))
+    return session
+
 
 @dataclass
 class URL:
@@ -78,7 +118,7 @@ class URL:
     def read_bytes(self):
         """Read the contents from the URL as bytes"""
         if self._bytes is None:
-            response = requests.get(self.url)
+            response = http_get(self.url)
             if response:
                 self._bytes = response.content
             else:
@@ -104,3 +144,41 @@ def get_url_or_asset(
         # Try to read from the assets directory if no http/https protocol is given
         with resources.path(local_assets, "") as assets:
             return assets.joinpath(path, *path_parts)
+
+
+def read_versioned(path: Union[URL, pathlib.Path]) -> Tuple[str, bytes]:
+    """Read the contents of a file or URL, together with the version of the contents
+
+    Contents are cached, and only read again when they have changed. Files are
+    checked by modification time and size. URLs are checked with conditional
+    requests, using the ETag or Last-Modified headers of the previous response.
+    """
+    key = str(path)
+    cached_version, cached_content, revalidate = _versioned.get(key, (None, b"", {}))
+    if not isinstance(path, URL):
+        stat = path.stat()
+        version = f"{stat.st_mtime_ns}-{stat.st_size}"
+        if version != cached_version:
+            _versioned[key] = (version, path.read_bytes(), {})
+        return _versioned[key][:2]
+
+    response = http_get(path.url, headers=revalidate)
+    if response.status_code == 304 and cached_version is not None:
+        return cached_version, cached_content
+    if not response:
+        logger.error(
+            f"GET request to {path.url} returned "
+            f"{response.status_code} {response.reason}"
+        )
+        return "missing", f"Missing file: {path.name}".encode()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag is not None:
+        version, revalidate = etag, {"If-None-Match": etag}
+    elif last_modified is not None:
+        version, revalidate = last_modified, {"If-Modified-Since": last_modified}
+    else:
+        version, revalidate = hashlib.sha256(response.content).hexdigest(), {}
+    _versioned[key] = (version, response.content, revalidate)
+    return version, response.content
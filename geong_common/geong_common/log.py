@@ -11,7 +11,6 @@ import sys
 # Third party imports
 from loguru import logger
 from loguru._logger import Level
-from opencensus.ext.azure.log_exporter import AzureLogHandler
 from pyconfs import Configuration
 
 # Geo:N:G imports
@@ -21,6 +20,10 @@ from geong_common.config.validators import get_azure_settings
 
 class AzureProxyHandler(logging.Handler):
     def __init__(self, connection_string, context, environment):
+        # opencensus is slow to import, and only needed when logging to Azure
+        # Third party imports
+        from opencensus.ext.azure.log_exporter import AzureLogHandler
+
         super().__init__()
         self._handler = AzureLogHandler(connection_string=connection_string)
         self.context = context
@@ -1,14 +1,32 @@
 """Readers that can read data
 
-Each reader should register four functions with the following signatures:
+Each reader should register seven functions with the following signatures:
 
 - read_all(dataset, table)
-- read_filtered(dataset, table, **filters)
-- read_elements(dataset, base_table, **filters)
+- read_filtered(dataset, table, columns=None, **filters)
+- read_page(dataset, table, columns=None, sort=(), offset=0, limit=None,
+            version=None, **filters)
+- read_elements(dataset, base_table, columns=None, **filters)
 - read_model(dataset)
+- read_versioned_model(dataset, version=None)
+- read_version(dataset, table)
 
 All functions should return pandas dataframes. If there are no results, they
-should return an empty dataframe with the expected columns.
+should return an empty dataframe with the expected columns. The exceptions are:
+
+- read_page() returns a tuple of one page of the sorted data and the total number
+  of rows matching the filters. If a version is given, TableChangedError is
+  raised if the table no longer has that version, so that pages read one by one
+  come from the same version of the table.
+- read_versioned_model() returns a tuple of the current version of the models and
+  the models, where the models are None if the given version is still current.
+- read_version() returns the current version of a table as a string.
+
+Sort keys are column names, prefixed with - for descending order.
+
+Filters are passed on to `geong_common.data.models.filter_data()`, and may use
+predicates like `column__in`, `column__ne`, `column__lt` or `column__ge`. If
+columns are given, only those columns are read.
 """
 
 # Third party imports
@@ -23,18 +41,66 @@ def read_all(reader, dataset, table):
     return _read(reader, func="read_all", dataset=dataset, table=table)
 
 
-def read_filtered(reader, dataset, table, **filters):
+def read_filtered(reader, dataset, table, columns=None, **filters):
     """Proxy for calling read_filtered() with the underlying reader"""
-    return _read(reader, func="read_filtered", dataset=dataset, table=table, **filters)
+    return _read(
+        reader,
+        func="read_filtered",
+        dataset=dataset,
+        table=table,
+        columns=columns,
+        **filters,
+    )
 
 
-def read_elements(reader, dataset, base_table, **filters):
+def read_page(
+    reader,
+    dataset,
+    table,
+    columns=None,
+    sort=(),
+    offset=0,
+    limit=None,
+    version=None,
+    **filters,
+):
+    """Proxy for calling read_page() with the underlying reader"""
+    return _read(
+        reader,
+        func="read_page",
+        dataset=dataset,
+        table=table,
+        columns=columns,
+        sort=sort,
+        offset=offset,
+        limit=limit,
+        version=version,
+        **filters,
+    )
+
+
+def read_elements(reader, dataset, base_table, columns=None, **filters):
     """Proxy for calling read_elements() with the underlying reader"""
     return _read(
-        reader, func="read_elements", dataset=dataset, base_table=base_table, **filters
+        reader,
+        func="read_elements",
+        dataset=dataset,
+        base_table=base_table,
+        columns=columns,
+        **filters,
     )
 
 
 def read_model(reader, dataset):
     """Proxy for calling read_model() with the underlying reader"""
     return _read(reader, func="read_model", dataset=dataset)
+
+
+def read_versioned_model(reader, dataset, version=None):
+    """Proxy for calling read_versioned_model() with the underlying reader"""
+    return _read(reader, func="read_versioned_model", dataset=dataset, version=version)
+
+
+def read_version(reader, dataset, table):
+    """Proxy for calling read_version() with the underlying reader"""
+    return _read(reader, func="read_version", dataset=dataset, table=table)
@@ -1,16 +1,22 @@
 """Read data from the API"""
 
+# Standard library imports
+from urllib.parse import urlsplit
+
 # Third party imports
-import pandas as pd
-import panel as pn
 import pyplugs
-import requests
 
 # Geo:N:G imports
 from geong_common import config
+from geong_common import files
+from geong_common import sessions
+from geong_common import tracing
 from geong_common.data import composition
+from geong_common.data import encoding
+from geong_common.data import schema
 from geong_common.exceptions import APIResponseError
 from geong_common.exceptions import MissingAccessTokenError
+from geong_common.exceptions import TableChangedError
 from geong_common.log import logger
 
 # Read plugin configuration
@@ -25,24 +31,66 @@ def read_all(dataset, table):
 
 
 @pyplugs.register
-def read_filtered(dataset, table, **filters):
+def read_filtered(dataset, table, columns=None, **filters):
     """Read filtered data from the API, convert to pandas dataframe"""
+    params = {"filters": [f"{k}={_as_param(v)}" for k, v in filters.items()]}
+    if columns is not None:
+        params["columns"] = list(columns)
     return _read_from_api(
         request_url=CFG.url.replace("data", dataset=dataset, table=table),
-        params={"filters": [f"{k}={v}" for k, v in filters.items()]},
+        params=params,
     )
 
 
 @pyplugs.register
-def read_elements(dataset, base_table, **filters):
+def read_page(
+    dataset, table, columns=None, sort=(), offset=0, limit=None, version=None, **filters
+):
+    """Read one page of sorted data from the API, with the total number of rows
+
+    The version is sent in an If-Match header, and the API answers with 412
+    Precondition Failed if the table has changed.
+    """
+    params = {
+        "filters": [f"{k}={_as_param(v)}" for k, v in filters.items()],
+        "sort": list(sort),
+        "offset": offset,
+    }
+    if columns is not None:
+        params["columns"] = list(columns)
+    if limit is not None:
+        params["limit"] = limit
+    headers = {} if version is None else {"If-Match": version}
+    try:
+        response = _request_api(
+            CFG.url.replace("data", dataset=dataset, table=table),
+            params=params,
+            headers=headers,
+        )
+    except APIResponseError as e:
+        if e.status_code == 412:
+            raise TableChangedError(table=f"{dataset}/{table}", version=version)
+        raise
+    return _decode(response), int(response.headers["X-Total-Count"])
+
+
+@pyplugs.register
+def read_elements(dataset, base_table, columns=None, **filters):
     """Get elements satisfying filters on base table
 
     TODO: Move more of this functionality to the API to avoid calling the API twice
     """
     # Filter to get wells
-    wells = read_filtered(dataset=dataset, table=base_table, **filters)
-    elements = read_all(dataset=dataset, table="elements")
-    return composition.combine_scale_and_elements(base_table, wells, elements)
+    well_columns, element_columns = composition.columns_for_elements(
+        base_table, columns
+    )
+    wells = read_filtered(
+        dataset=dataset, table=base_table, columns=well_columns, **filters
+    )
+    elements = read_filtered(dataset=dataset, table="elements", columns=element_columns)
+    return composition.combine_scale_and_elements(
+        base_table, wells, elements, columns=columns
+    )
 
 
 @pyplugs.register
@@ -51,40 +99,92 @@ def read_model(dataset):
     return _read_from_api(CFG.url.replace("model", dataset=dataset))
 
 
+@pyplugs.register
+def read_versioned_model(dataset, version=None):
+    """Read the dataset models and their version, None if version is current
+
+    The version is the entity tag sent by the API. The API answers with 304 Not
+    Modified without sending the models if the given version is still current.
+    """
+    headers = {} if version is None else {"If-None-Match": version}
+    response = _request_api(CFG.url.replace("model", dataset=dataset), headers=headers)
+    new_version = response.headers.get("ETag")
+    if response.status_code == 304:
+        return new_version or version, None
+    return new_version, _decode(response)
+
+
+@pyplugs.register
+def read_version(dataset, table):
+    """Read the version of a table, the entity tag sent by the API"""
+    response = _request_api(
+        CFG.url.replace("data", dataset=dataset, table=table), params={"limit": 0}
+    )
+    return response.headers["ETag"]
+
+
+def _as_param(value):
+    """Represent a filter value as a query parameter, lists are comma-separated"""
+    if isinstance(value, (list, tuple, set)):
+        return ",".join(str(v) for v in value)
+    return value
+
+
 def _read_from_api(request_url, params: dict = None):
+    """Read one table from the API"""
+    return _decode(_request_api(request_url, params=params))
+
+
+def _decode(response):
+    """Convert to pandas dataframe, based on the format chosen by the API"""
+    return schema.normalize(
+        encoding.decode(
+            response.content, response.headers.get("Content-Type", encoding.JSON)
+        )
+    )
+
+
+def _request_api(request_url, params: dict = None, headers: dict = None):
     """Handle one request to the API"""
-    headers = [
+    token_headers = [
         "X-Forwarded-Access-Token",
         "X-Auth-Request-Access-Token",
     ]
     access_token = None
-    for h in headers:
-        access_token = pn.state.headers.get(h)
+    for h in token_headers:
+        access_token = sessions.headers().get(h)
         if access_token is not None:
             break
 
     if access_token is None:
         raise MissingAccessTokenError(
             user_message="Data service unavailable. Please try again later.",
-            log_message=f"Missing any of {headers} headers",
+            log_message=f"Missing any of {token_headers} headers",
         )
 
-    try:
-        session_id = pn.state.curdoc.session_context.id
-        if params is not None:
-            params["session_id"] = session_id
-        else:
-            params = {"session_id": session_id}
-    except AttributeError as e:
-        logger.error(f"SessionID not available: {e}")
+    session_id = sessions.session_id()
+    if session_id is None:
+        logger.error("SessionID not available")
+    elif params is not None:
+        params["session_id"] = session_id
+    else:
+        params = {"session_id": session_id}
 
     # Send a request to the API
     logger.debug(f"Sending GET {request_url} to API")
-    response = requests.get(
-        request_url,
-        params=params,
-        headers={"Authorization": f"bearer {access_token}"},
-    )
+    trace_name = f"GET {urlsplit(request_url).path}"
+    with tracing.trace_request(trace_name, session_id) as trace:
+        response = files.http_get(
+            request_url,
+            params=params,
+            headers={
+                "Authorization": f"bearer {access_token}",
+                "Accept": encoding.ACCEPT_ARROW,
+                **(headers or {}),
+            },
+        )
+        trace["server_timing"] = response.headers.get("Server-Timing", "")
+        trace["http.status_code"] = str(response.status_code)
 
     # Handle errors
     if not response:
@@ -93,6 +193,4 @@ def _read_from_api(request_url, params: dict = None):
             status_code=response.status_code,
             reason=response.reason,
         )
-
-    # Convert to pandas dataframe
-    return pd.DataFrame(**response.json())
+    return response
@@ -8,35 +8,58 @@ import pyplugs
 from geong_common import config
 from geong_common.data import composition
 from geong_common.data import models
+from geong_common.data import schema
+from geong_common.data.cache import FrameCache
+from geong_common.data.indexed import IndexedTable
+from geong_common.exceptions import TableChangedError
 from geong_common.log import logger
 
 # Read plugin configuration
 *_, PACKAGE, PLUGIN = __name__.split(".")
 CFG = config.geong[PACKAGE][PLUGIN]
 
+# Tables read from file, keyed by path
+_TABLES = FrameCache(max_bytes=CFG.cache_bytes, name="local_tables")
+
 
 @pyplugs.register
 def read_all(dataset, table):
     """Read all data from the API, convert to pandas dataframe"""
-    return _read_from_json(
-        CFG.path.replace("data", dataset=dataset, table=table, converter="path")
-    )
+    return _read_indexed(dataset=dataset, table=table).data.copy()
 
 
 @pyplugs.register
-def read_filtered(dataset, table, **filters):
+def read_filtered(dataset, table, columns=None, **filters):
     """Read filtered data from the API, convert to pandas dataframe"""
-    unfiltered = read_all(dataset=dataset, table=table)
-    return models.filter_data(unfiltered, filters)
+    return _read_indexed(dataset=dataset, table=table).filter(filters, columns=columns)
+
+
+@pyplugs.register
+def read_page(
+    dataset, table, columns=None, sort=(), offset=0, limit=None, version=None, **filters
+):
+    """Read one page of sorted data, with the total number of rows"""
+    if version is not None and version != read_version(dataset=dataset, table=table):
+        raise TableChangedError(table=f"{dataset}/{table}", version=version)
+    return _read_indexed(dataset=dataset, table=table).page(
+        filters, columns=columns, sort=sort, offset=offset, limit=limit
+    )
 
 
 @pyplugs.register
-def read_elements(dataset, base_table, **filters):
+def read_elements(dataset, base_table, columns=None, **filters):
     """Get elements satisfying filters on base table"""
     # Filter to get wells
-    wells = read_filtered(dataset=dataset, table=base_table, **filters)
-    elements = read_all(dataset=dataset, table="elements")
-    return composition.combine_scale_and_elements(base_table, wells, elements)
+    well_columns, element_columns = composition.columns_for_elements(
+        base_table, columns
+    )
+    wells = read_filtered(
+        dataset=dataset, table=base_table, columns=well_columns, **filters
+    )
+    elements = read_filtered(dataset=dataset, table="elements", columns=element_columns)
+    return composition.combine_scale_and_elements(
+        base_table, wells, elements, columns=columns
+    )
 
 
 @pyplugs.register
@@ -46,7 +69,37 @@ def read_model(dataset):
     return models.calculate(elements=elements, dataset=dataset)
 
 
+@pyplugs.register
+def read_versioned_model(dataset, version=None):
+    """Read the dataset models and their version, None if version is current
+
+    The version is the modification time of the elements file.
+    """
+    new_version = read_version(dataset=dataset, table="elements")
+    if new_version == version:
+        return version, None
+    return new_version, read_model(dataset=dataset)
+
+
+@pyplugs.register
+def read_version(dataset, table):
+    """Read the version of a table, the modification time of its file"""
+    path = CFG.path.replace("data", dataset=dataset, table=table, converter="path")
+    return str(path.stat().st_mtime_ns)
+
+
+def _read_indexed(dataset, table):
+    """Read one table and wrap it for indexed filtering, cached until it changes"""
+    path = CFG.path.replace("data", dataset=dataset, table=table, converter="path")
+    mtime = path.stat().st_mtime_ns
+    cached_mtime, indexed_table = _TABLES.get(path, (None, None))
+    if cached_mtime != mtime:
+        indexed_table = IndexedTable(_read_from_json(path))
+        _TABLES.put(path, (mtime, indexed_table))
+    return indexed_table
+
+
 def _read_from_json(path):
     """Read from one JSON file"""
     logger.debug(f"Reading JSON from {path}")
-    return pd.read_json(path.read_text(), orient="split")
+    return schema.normalize(pd.read_json(path.read_text(), orient="split"))
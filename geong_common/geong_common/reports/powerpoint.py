@@ -1,14 +1,25 @@
-"""Create a PowerPoint report"""
+"""Create a PowerPoint report
+
+Templates are read and parsed once, and kept while the template files are
+unchanged. Each report starts from a copy of the parsed template presentation.
+
+Reports may contain many similar slides, one set for each scenario. Work that is
+the same for all of them, like looking up placeholder positions in the layouts
+and writing the workbooks embedded in charts, is done once and reused.
+"""
 
 # Standard library imports
+import copy
 import functools
 import io
+import threading
 
 # Third party imports
 import pptx
 import pyplugs
 from pptx.chart.data import ChartData
 from pptx.enum import chart as pptx_charts
+from pptx.opc.packuri import PackURI
 from pyconfs import Configuration
 
 # Geo:N:G imports
@@ -19,25 +30,86 @@ from geong_common import files
 call = functools.partial(pyplugs.call, __package__, PLUGIN)
 content_types = functools.partial(pyplugs.funcs, __package__, PLUGIN)
 
+# Parsed templates, keyed by template URL. Values are the versions of the template
+# files, the template configuration and the template presentation.
+_templates = {}
+_templates_lock = threading.Lock()
+
 
 @pyplugs.register
 def generate_powerpoint(template_url, cfg, data, output_path):
     """Generate PowerPoint report from data based on cfg. Store to output_path"""
-    template = files.get_url_or_asset(template_url, local_assets="geong_common.assets")
-    template_cfg = Configuration.from_str(template.read_text(), format="toml")
-    template_ppt = (template.parent / template_cfg.replace("template")).read_bytes()
+    template_cfg, template_prs = read_template(template_url)
 
-    prs = pptx.Presentation(io.BytesIO(template_ppt))
+    prs = copy.deepcopy(template_prs)
+    package = prs.part.package
+    package.next_partname = _PartNames(package)
     add_slides(prs, template_cfg, cfg, data)
     prs.save(output_path)
 
 
-def add_slides(prs, template, cfg, data):
-    """Generate slides and insert them into the prs PowerPoint document"""
+def read_template(template_url):
+    """Read and parse a template, reuse it while the template files are unchanged
+
+    Returns the template configuration and the template presentation. The
+    presentation is shared, and should be copied before it is changed.
+    """
+    template = files.get_url_or_asset(template_url, local_assets="geong_common.assets")
+    with _templates_lock:
+        versions, template_cfg, template_prs = _templates.get(
+            template_url, ((None, None, None), None, None)
+        )
+        cfg_version, cfg_bytes = files.read_versioned(template)
+        if cfg_version != versions[0]:
+            template_cfg = Configuration.from_str(cfg_bytes.decode(), format="toml")
+
+        ppt_path = template.parent / template_cfg.replace("template")
+        ppt_version, ppt_bytes = files.read_versioned(ppt_path)
+        if (str(ppt_path), ppt_version) != versions[1:]:
+            template_prs = pptx.Presentation(io.BytesIO(ppt_bytes))
+
+        _templates[template_url] = (
+            (cfg_version, str(ppt_path), ppt_version),
+            template_cfg,
+            template_prs,
+        )
+        return template_cfg, template_prs
+
+
+class _PartNames:
+    """Find names for new parts, like charts, in a PowerPoint package
+
+    Used instead of OpcPackage.next_partname(), which looks through all parts of
+    the package for each new part. That makes reports with many charts slow. Here
+    the names in use are collected once, and new names are counted upwards.
+    """
+
+    def __init__(self, package):
+        self._used = {str(part.partname) for part in package.iter_parts()}
+        self._next = {}
+
+    def __call__(self, tmpl):
+        """Next unused part name matching tmpl, like /ppt/charts/chart%d.xml"""
+        number = self._next.get(tmpl, 1)
+        while tmpl % number in self._used:
+            number += 1
+        self._next[tmpl] = number + 1
+        self._used.add(tmpl % number)
+        return PackURI(tmpl % number)
+
+
+def add_slides(prs, template, cfg, data, positions=None):
+    """Generate slides and insert them into the prs PowerPoint document
+
+    Positions of placeholders are looked up in the layouts once, and reused for
+    the same placeholders on later slides, like the slides of each scenario.
+    """
+    positions = {} if positions is None else positions
     for slide_cfg in cfg.slide:
         if "nested" in slide_cfg:
+            nested_cfg = cfg[slide_cfg.nested.cfg]
             for single_data in data[slide_cfg.nested["data"]]:
-                add_slides(prs, template, cfg[slide_cfg.nested.cfg], single_data)
+                add_slides(prs, template, nested_cfg, single_data, positions)
             continue
 
         layout_name = template.layouts.get(slide_cfg.layout, slide_cfg.layout)
@@ -68,12 +140,25 @@ def add_slides(prs, template, cfg, data):
             if isinstance(content, str) and content.startswith("ref:"):
                 content = cfg.content[info.type][info.content[4:]]
 
-            call(
-                func=func,
-                placeholder=slide.placeholders[ph_cfg[placeholder]],
-                content=content,
-                data=data,
-            )
+            slide_placeholder = slide.placeholders[ph_cfg[placeholder]]
+            if info.type != "text":
+                _set_position(
+                    slide_placeholder, positions, (layout_name, ph_cfg[placeholder])
+                )
+            call(func=func, placeholder=slide_placeholder, content=content, data=data)
+
+
+def _set_position(placeholder, positions, key):
+    """Set the position of a placeholder explicitly, reusing earlier positions
+
+    Without an explicit position, python-pptx looks up the position inherited from
+    the layout each time a chart, picture or table is inserted.
+    """
+    attributes = ("left", "top", "width", "height")
+    if key not in positions:
+        positions[key] = [getattr(placeholder, attr) for attr in attributes]
+    for attr, value in zip(attributes, positions[key]):
+        setattr(placeholder, attr, value)
 
 
 @pyplugs.register
@@ -91,19 +176,18 @@ def add_picture(placeholder, content, data):
 @pyplugs.register
 def add_chart(placeholder, content, data):
     """Add chart to placeholder"""
-    # Create a common index
-    categories = []
-    for col in content["data"]:
-        for key in data[col]:
-            if key not in categories:
-                categories.append(key)
+    categories = _common_index(data, content["data"])
 
     # Add chart data
-    chart = ChartData()
+    series = [
+        (series_name, tuple(data[col][cat] for cat in categories))
+        for series_name, col in zip(content["series_names"], content["data"])
+    ]
+    chart = _ChartData()
     chart.categories = categories
-    for series_name, col in zip(content["series_names"], content["data"]):
-        values = [data[col][cat] for cat in categories]
+    for series_name, values in series:
         chart.add_series(series_name, values)
+    chart.key = (tuple(categories), tuple(series))
 
     # Insert chart
     chart = placeholder.insert_chart(
@@ -116,6 +200,35 @@ def add_chart(placeholder, content, data):
     chart.legend.include_in_layout = False
 
 
+class _ChartData(ChartData):
+    """Chart data sharing embedded workbooks between charts with the same data
+
+    Each chart embeds an Excel workbook with its data. Writing the workbook is
+    the slowest part of adding a chart, and the same data are often shown on
+    several slides or reports.
+    """
+
+    key = None
+
+    @property
+    def xlsx_blob(self):
+        """Workbook with the chart data, reused for charts with the same key"""
+        if self.key is None:
+            return super().xlsx_blob
+        return _chart_workbook(self.key)
+
+
+@functools.lru_cache(maxsize=256)
+def _chart_workbook(key):
+    """Write the workbook for chart data with the given categories and series"""
+    categories, series = key
+    chart = ChartData()
+    chart.categories = categories
+    for series_name, values in series:
+        chart.add_series(series_name, values)
+    return chart.xlsx_blob
+
+
 @pyplugs.register
 def add_table(placeholder, content, data):
     """Add table to placeholder"""
@@ -128,35 +241,51 @@ def add_table(placeholder, content, data):
 
 
 def _add_horisontal_table(placeholder, content, data):
-    """Add horisontal table to placeholder"""
-    # Create a common index
-    index_names = []
-    for col in content["data"]:
-        for key in data[col]:
-            if key not in index_names:
-                index_names.append(key)
-
-    # Set up column names
-    column_names = [content["index_name"]] + content["column_names"]
-
-    # Add table with headers
-    table = placeholder.insert_table(
-        rows=len(index_names) + 1, cols=len(column_names)
-    ).table
-    for idx, column_name in enumerate(column_names):
-        table.cell(0, idx).text = column_name
-    for idx, index_name in enumerate(index_names, start=1):
-        table.cell(idx, 0).text = index_name
-
-    # Add data to table
-    for col_idx, (col, fmt) in enumerate(
-        zip(content["data"], content["formats"]), start=1
-    ):
-        for row_idx, row in enumerate(index_names, start=1):
-            if row not in data[col]:
+    """Add horisontal table to placeholder
+
+    Cells are filled directly in the table XML, which is much faster than setting
+    the text of each cell through python-pptx.
+    """
+    index_names = _common_index(data, content["data"])
+    column_names = [content["index_name"]] + list(content["column_names"])
+    columns = [
+        (data[col], fmt) for col, fmt in zip(content["data"], content["formats"])
+    ]
+
+    rows = [column_names]
+    for index_name in index_names:
+        row = [index_name]
+        for values, fmt in columns:
+            if index_name not in values:
+                row.append("")
                 continue
-            value = data[col][row]
-            table.cell(row_idx, col_idx).text = fmt.format(value) if fmt else str(value)
+            value = values[index_name]
+            row.append(fmt.format(value) if fmt else str(value))
+        rows.append(row)
+
+    # Add table, and fill in the text of the cells
+    tbl = placeholder.insert_table(rows=len(rows), cols=len(column_names)).table._tbl
+    for tr, row in zip(tbl.tr_lst, rows):
+        for tc, text in zip(tr.tc_lst, row):
+            if text:
+                _set_cell_text(tc, text)
+
+
+def _set_cell_text(tc, text):
+    """Set the text of an empty table cell, given as an <a:tc> element"""
+    txBody = tc.get_or_add_txBody()
+    for p in txBody.p_lst[1:]:
+        txBody.remove(p)
+    lines = str(text).split("\n")
+    p = txBody.p_lst[0] if txBody.p_lst else txBody.add_p()
+    p.add_r().text = lines[0]
+    for line in lines[1:]:
+        txBody.add_p().add_r().text = line
+
+
+def _common_index(data, columns):
+    """Keys of the given data columns, in order of first appearance"""
+    return list(dict.fromkeys(key for col in columns for key in data[col]))
 
 
 def _add_vertical_table(placeholder, content, data):
@@ -0,0 +1,52 @@
+"""Find the Panel session that work is done for
+
+Panel finds the current session through the Bokeh document being served, which
+is only known on the server thread. Work moved to other threads, like reading
+from the API, runs inside `for_document()` so that it uses the headers and
+session ID of the session that started it, and never those of another session
+served at the same time.
+"""
+
+# Standard library imports
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from typing import Optional
+
+# Third party imports
+import panel as pn
+
+_local = threading.local()
+
+
+@contextmanager
+def for_document(document) -> Iterator[None]:
+    """Do work on this thread for the session of the given document"""
+    previous = getattr(_local, "document", None)
+    _local.document = document
+    try:
+        yield
+    finally:
+        _local.document = previous
+
+
+def current_document():
+    """The document of the current session, if any"""
+    document = getattr(_local, "document", None)
+    if document is not None:
+        return document
+    return pn.state.curdoc
+
+
+def headers() -> dict:
+    """Headers of the request that opened the current session"""
+    session_context = getattr(current_document(), "session_context", None)
+    if session_context is None:
+        return {}
+    return session_context.request.headers
+
+
+def session_id() -> Optional[str]:
+    """ID of the current session, if any"""
+    session_context = getattr(current_document(), "session_context", None)
+    return None if session_context is None else session_context.id
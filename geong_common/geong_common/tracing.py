@@ -0,0 +1,176 @@
+"""Record traces of requests from the app to the API
+
+Each request is stored as a span in the Zipkin v2 JSON format, one span per line
+in a local trace file. Spans share a trace ID derived from the session ID, so all
+requests from one session can be found together. The phases reported by the API
+in its Server-Timing header are recorded as child spans, together with the
+network time, which is the round-trip time not spent inside the API.
+
+Tracing is disabled unless a trace file is configured in `tracing.path`. Requests
+are then not timed, and no spans are created.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import pathlib
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+# Geo:N:G imports
+from geong_common import config
+
+# Categories of the phases reported by the API
+CATEGORIES = {
+    "jwt_verify": "auth",
+    "obo": "auth",
+    "blob_properties": "storage",
+    "blob_download": "storage",
+    "snapshot_load": "storage",
+    "json_parse": "compute",
+    "filter_data": "compute",
+    "models_calculate": "compute",
+    "serialization": "compute",
+}
+
+_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    """Check if a trace file is configured"""
+    return bool(config.geong.tracing.path)
+
+
+@contextmanager
+def trace_request(name: str, session_id: Optional[str]) -> Iterator[Dict[str, str]]:
+    """Time a request made inside the context, and record its spans
+
+    Set `server_timing` in the yielded dictionary to the Server-Timing header of
+    the response, other keys are recorded as tags. Nothing is timed or recorded
+    when tracing is disabled, or when the request fails with an exception.
+    """
+    details: Dict[str, str] = {}
+    if not is_enabled():
+        yield details
+        return
+
+    start, timer = time.time(), time.perf_counter()
+    yield details
+    round_trip = time.perf_counter() - timer
+    server_timing = details.pop("server_timing", "")
+    record(request_spans(name, session_id, start, round_trip, server_timing, details))
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse a Server-Timing header into durations in milliseconds"""
+    timings = {}
+    for metric in header.split(","):
+        name, *params = [p.strip() for p in metric.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def trace_id(session_id: Optional[str]) -> str:
+    """Trace ID shared by all spans in a session"""
+    if not session_id:
+        return secrets.token_hex(16)
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+
+
+def request_spans(
+    name: str,
+    session_id: Optional[str],
+    start: float,
+    round_trip: float,
+    server_timing: str = "",
+    tags: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    """Create spans for one request to the API
+
+    Start is a Unix timestamp and round-trip time is in seconds. The API does not
+    report when each phase started, so child spans are laid out one after the
+    other, starting after half of the network time.
+    """
+    span_trace_id = trace_id(session_id)
+    parent_id = secrets.token_hex(8)
+    timestamp = int(start * 1_000_000)
+    duration = int(round_trip * 1_000_000)
+    common_tags = {"session_id": session_id or "", **(tags or {})}
+    spans = [
+        _span(span_trace_id, parent_id, None, name, timestamp, duration, common_tags)
+    ]
+
+    timings = parse_server_timing(server_timing)
+    server_total = int(1000 * timings.pop("total", sum(timings.values())))
+    network = max(duration - server_total, 0)
+    spans.append(
+        _span(
+            span_trace_id,
+            secrets.token_hex(8),
+            parent_id,
+            "network",
+            timestamp,
+            network,
+            {**common_tags, "category": "network"},
+        )
+    )
+
+    offset = timestamp + network // 2
+    for phase, milliseconds in timings.items():
+        phase_duration = int(1000 * milliseconds)
+        spans.append(
+            _span(
+                span_trace_id,
+                secrets.token_hex(8),
+                parent_id,
+                phase,
+                offset,
+                phase_duration,
+                {**common_tags, "category": CATEGORIES.get(phase, "other")},
+            )
+        )
+        offset += phase_duration
+    return spans
+
+
+def record(spans: List[Dict]) -> None:
+    """Append spans to the trace file, if tracing is enabled"""
+    if not is_enabled():
+        return
+
+    lines = "".join(json.dumps(span) + "\n" for span in spans)
+    with _lock:
+        with pathlib.Path(config.geong.tracing.path).open(
+            mode="a", encoding="utf-8"
+        ) as fid:
+            fid.write(lines)
+
+
+def _span(trace, span_id, parent_id, name, timestamp, duration, tags):
+    """Represent one span in the Zipkin v2 format"""
+    span = {
+        "traceId": trace,
+        "id": span_id,
+        "name": name,
+        "timestamp": timestamp,
+        "duration": duration,
+        "localEndpoint": {"serviceName": config.geong.tracing.service_name},
+        "tags": tags,
+    }
+    if parent_id is None:
+        span["kind"] = "CLIENT"
+    else:
+        span["parentId"] = parent_id
+    return span
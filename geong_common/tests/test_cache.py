@@ -0,0 +1,95 @@
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Geo:N:G imports
+from geong_common.data.cache import FrameCache
+from geong_common.data.cache import memory_usage
+from geong_common.data.indexed import IndexedTable
+
+
+def frame(num_rows):
+    return pd.DataFrame({"key": [f"val{idx}" for idx in range(num_rows)]})
+
+
+@pytest.fixture
+def frame_size():
+    return memory_usage(frame(100))
+
+
+def test_memory_usage_is_deep():
+    data = frame(100)
+
+    assert memory_usage(data) == data.memory_usage(deep=True).sum()
+    assert memory_usage(data) > data.memory_usage(deep=False).sum()
+    assert memory_usage(("version", data)) > memory_usage(data)
+    assert memory_usage(np.zeros(10)) == 80
+
+
+def test_memory_usage_counts_built_indexes():
+    table = IndexedTable(frame(100))
+    without_indexes = memory_usage(table)
+    table.build_indexes(["key"])
+
+    assert memory_usage(table) > without_indexes
+
+
+def test_building_indexes_evicts_within_budget(frame_size):
+    cache = FrameCache(max_bytes=3 * frame_size)
+    cache.put("first", frame(100))
+    table = IndexedTable(frame(100))
+    cache.put("table", ("version", table))
+    assert list(cache) == ["first", "table"]
+
+    table.build_indexes(["key"])
+    assert cache.stats().size_bytes == memory_usage(("version", table))
+
+    table.index("key").ranks(descending=True)
+    table.index("key").ranks(descending=False)
+    assert list(cache) == ["table"]
+    assert cache.stats().size_bytes == memory_usage(("version", table))
+    assert cache.stats().size_bytes <= cache.max_bytes
+
+
+def test_least_recently_used_is_evicted(frame_size):
+    cache = FrameCache(max_bytes=2 * frame_size)
+    cache.put("first", frame(100))
+    cache.put("second", frame(100))
+    cache.get("first")
+    cache.put("third", frame(100))
+
+    assert list(cache) == ["first", "third"]
+    assert cache.stats().evictions == 1
+    assert cache.stats().size_bytes == 2 * frame_size
+
+
+def test_replacing_entry_updates_size(frame_size):
+    cache = FrameCache(max_bytes=10 * frame_size)
+    cache.put("key", frame(100))
+    cache.put("key", frame(100))
+
+    assert cache.stats().size_bytes == frame_size
+    assert len(cache) == 1
+
+
+def test_too_large_entry_is_not_cached(frame_size):
+    cache = FrameCache(max_bytes=frame_size)
+    cache.put("small", frame(100))
+    cache.put("large", frame(1000))
+
+    assert "large" not in cache
+    assert "small" in cache
+
+
+def test_stats_are_reported():
+    changes = []
+    cache = FrameCache(max_bytes=1_000_000, name="test", on_change=changes.append)
+    cache.put("key", frame(10))
+    cache.get("key")
+    cache.get("missing")
+    cache.pop("key")
+
+    assert len(changes) == 2
+    assert changes[0].entries == 1
+    assert cache.stats() == (changes[-1].name, 0, 1_000_000, 0, 1, 1, 0)
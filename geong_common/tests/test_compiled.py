@@ -0,0 +1,122 @@
+"""Test models compiled to coefficients for previewing N:G"""
+
+# Standard library imports
+import pathlib
+
+# Third party imports
+import pandas as pd
+import pytest
+
+# Geo:N:G imports
+from geong_common import config
+from geong_common.data import compiled
+from geong_common.data import net_gross
+from geong_common.data.models import calculate_from_config
+
+WEIGHTS = {"Lobe": 50, "Channel Fill": 30, "Overbank": 20, "MTD": 0, "Drape": 0}
+
+
+@pytest.fixture(scope="module")
+def model():
+    data = pd.read_csv(
+        pathlib.Path(__file__).resolve().parent / "simplified_elements.csv"
+    )
+    return calculate_from_config(data, config.geong.models.deep)
+
+
+@pytest.fixture
+def filter_classes():
+    """Values of each filter class, in the order used by sliders"""
+    models_config = config.geong.models.deep
+    return {
+        building_block.label: {
+            filter_class: list(building_block[filter_class]["values"])
+            for filter_class in building_block.factors
+        }
+        for _, building_block in models_config.section_items
+        if building_block.factors
+    }
+
+
+def composition(filter_classes, weights, ignored):
+    """Composition in the format used by the full model calculation"""
+    classes = [
+        (building_block_type, filter_class, values)
+        for building_block_type, classes in filter_classes.items()
+        for filter_class, values in classes.items()
+    ]
+    result = {"building_block_type": WEIGHTS}
+    for (building_block_type, filter_class, values), class_weights, is_ignored in zip(
+        classes, weights, ignored
+    ):
+        result.setdefault(building_block_type, {})[filter_class] = {
+            **dict(zip(values, class_weights)),
+            f"Ignore {filter_class}": is_ignored,
+        }
+    return result
+
+
+def test_building_block_coefficients(model, filter_classes):
+    weights = [[20, 30, 50], [0, 100, 0], [40, 60], [100, 0], [10, 20, 70], [0, 50, 50]]
+    classes = composition(filter_classes, weights, ignored=[False] * len(weights))
+    coefficients = compiled.building_block_coefficients(
+        model, {k: v for k, v in classes.items() if k != "building_block_type"}
+    )
+
+    assert compiled.evaluate_building_blocks(coefficients, WEIGHTS) == pytest.approx(
+        net_gross.calculate_deep_net_gross(model=model, composition=classes)
+    )
+
+
+def test_building_blocks_not_adding_to_100():
+    assert pd.isna(compiled.evaluate_building_blocks({"Lobe": 0.5}, {"Lobe": 90}))
+
+
+@pytest.mark.parametrize(
+    "weights, ignored",
+    [
+        (
+            [[20, 30, 50], [0, 100, 0], [40, 60], [100, 0], [10, 20, 70], [0, 50, 50]],
+            [False, False, False, False, False, False],
+        ),
+        (
+            [[20, 30, 50], [0, 100, 0], [40, 60], [100, 0], [10, 20, 70], [0, 50, 50]],
+            [True, False, True, False, False, True],
+        ),
+        (
+            [[100, 0, 0], [0, 0, 100], [0, 100], [50, 50], [0, 0, 100], [30, 30, 40]],
+            [False, True, False, False, True, False],
+        ),
+    ],
+)
+def test_filter_class_table(model, filter_classes, weights, ignored):
+    table = compiled.filter_class_table(model, WEIGHTS, filter_classes)
+
+    assert compiled.evaluate_filter_class_table(
+        table, weights, ignored
+    ) == pytest.approx(
+        net_gross.calculate_deep_net_gross(
+            model=model, composition=composition(filter_classes, weights, ignored)
+        )
+    )
+
+
+def test_evaluate_compositions(model, filter_classes):
+    weights = [[20, 30, 50], [0, 100, 0], [40, 60], [100, 0], [10, 20, 70], [0, 50, 50]]
+    compositions = [
+        composition(filter_classes, weights, ignored=[False] * 6),
+        composition(filter_classes, weights, ignored=[True, False, True] * 2),
+        {"building_block_type": {**WEIGHTS, "Lobe": 30, "Drape": 20}},
+    ]
+    contributions = compiled.evaluate_compositions(model, compositions)
+
+    assert list(contributions.columns) == list(
+        model.loc[:, "building_block_type"].unique()
+    )
+    for (_, row), classes in zip(contributions.iterrows(), compositions):
+        expected = (
+            net_gross.calculate_deep_net_gross_model(model=model, composition=classes)
+            .groupby("building_block_type", observed=True)["result"]
+            .sum()
+        )
+        assert row.to_dict() == pytest.approx(expected.to_dict())
@@ -0,0 +1,88 @@
+"""Test encoding of tables sent between the API and the app"""
+
+# Standard library imports
+import json
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Geo:N:G imports
+from geong_common.data import encoding
+
+
+@pytest.fixture
+def table():
+    return pd.DataFrame(
+        {
+            "building_block_type": ["Lobe", "Channel Fill", "Lobe"],
+            "ng_vsh40_pct": [12.345678901234, np.nan, 100.0],
+            "unique_id": [1, 2, 3],
+        },
+        index=[4, 7, 9],
+    )
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        (None, encoding.JSON),
+        ("", encoding.JSON),
+        ("*/*", encoding.JSON),
+        ("text/html", encoding.JSON),
+        (encoding.ARROW, encoding.ARROW),
+        (encoding.ACCEPT_ARROW, encoding.ARROW),
+        (f"{encoding.JSON}, {encoding.ARROW}", encoding.JSON),
+        (f"{encoding.JSON};q=0.5, {encoding.ARROW}", encoding.ARROW),
+        (f"{encoding.ARROW};q=0, */*", encoding.JSON),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert encoding.negotiate(accept) == expected
+
+
+@pytest.mark.parametrize("media_type", [encoding.JSON, encoding.ARROW])
+def test_roundtrip(table, media_type):
+    content = encoding.encode(table, media_type)
+    actual = encoding.decode(content, media_type)
+
+    pd.testing.assert_frame_equal(actual, table)
+
+
+def test_json_is_split_orientation(table):
+    content = encoding.encode_json(table.fillna(0))
+
+    assert pd.read_json(content.decode(), orient="split").equals(table.fillna(0))
+
+
+def test_json_floats_are_exact():
+    table = pd.DataFrame({"value": [0.1 + 0.2, 1 / 3, 1.2345678901234567e-5, np.nan]})
+    actual = encoding.decode_json(encoding.encode_json(table))
+
+    assert actual["value"].tolist()[:3] == table["value"].tolist()[:3]
+    assert np.isnan(actual["value"].iloc[3])
+
+
+def test_decode_ignores_media_type_parameters(table):
+    content = encoding.encode_json(table)
+    actual = encoding.decode(content, f"{encoding.JSON}; charset=utf-8")
+
+    pd.testing.assert_frame_equal(actual, table)
+
+
+def test_json_missing_values_are_null():
+    table = pd.DataFrame(
+        {
+            "name": ["Lobe", None],
+            "date": pd.to_datetime(["2021-06-01", None]),
+            "count": pd.array([1, None], dtype="Int64"),
+            "value": [np.inf, np.nan],
+        }
+    )
+    content = encoding.encode_json(table)
+
+    assert json.loads(content)["data"] == [
+        ["Lobe", "2021-06-01T00:00:00", 1, None],
+        [None, None, None, None],
+    ]
@@ -0,0 +1,64 @@
+# Standard library imports
+import os
+from unittest import mock
+
+# Third party imports
+import pytest
+
+# Geo:N:G imports
+from geong_common import files
+
+
+class Response:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.reason = ""
+
+    def __bool__(self):
+        return self.status_code < 400
+
+
+@pytest.fixture
+def http_get(monkeypatch):
+    """Serve one URL with an ETag, answering 304 if the ETag matches"""
+    content = {"etag": '"v1"', "content": b"first"}
+
+    def get(url, headers=None, **request_args):
+        if (headers or {}).get("If-None-Match") == content["etag"]:
+            return Response(304)
+        return Response(200, content["content"], {"ETag": content["etag"]})
+
+    http_get = mock.Mock(side_effect=get)
+    monkeypatch.setattr(files, "http_get", http_get)
+    monkeypatch.setattr(files, "_versioned", {})
+    return http_get, content
+
+
+def test_read_versioned_file_is_reread_when_changed(tmp_path, monkeypatch):
+    monkeypatch.setattr(files, "_versioned", {})
+    path = tmp_path / "template.toml"
+    path.write_text("first")
+    first_version, first = files.read_versioned(path)
+    assert files.read_versioned(path) == (first_version, first)
+
+    path.write_text("second")
+    os.utime(path, ns=(0, 0))
+    second_version, second = files.read_versioned(path)
+
+    assert (first, second) == (b"first", b"second")
+    assert second_version != first_version
+
+
+def test_read_versioned_url_is_revalidated(http_get):
+    http_get, content = http_get
+    url = files.URL("https://example.com/template.toml")
+    assert files.read_versioned(url) == ('"v1"', b"first")
+    assert files.read_versioned(url) == ('"v1"', b"first")
+
+    content.update(etag='"v2"', content=b"second")
+    assert files.read_versioned(url) == ('"v2"', b"second")
+    assert http_get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
@@ -52,3 +52,46 @@ def test_filter_select_one_row(data_multiple):
 def test_filter_select_one_row_multiple_keys(data_multiple):
     result = filter_data(data_multiple, {"key0": "val00", "key1": "val10"})
     assert (result.to_numpy() == np.array([["val00", "val10"]])).all()
+
+
+@pytest.fixture()
+def data_numeric():
+    return pd.DataFrame.from_dict(
+        {"key": ["val0", "val1", "val2", "val3"], "num": [10, 20, 30, 40]}
+    )
+
+
+@pytest.mark.parametrize(
+    ("filters", "expected"),
+    [
+        ({"key__in": ["val0", "val2"]}, ["val0", "val2"]),
+        ({"key__in": "val1,val3"}, ["val1", "val3"]),
+        ({"key__ne": "val0"}, ["val1", "val2", "val3"]),
+        ({"num__lt": 30}, ["val0", "val1"]),
+        ({"num__le": "30"}, ["val0", "val1", "val2"]),
+        ({"num__gt": "30"}, ["val3"]),
+        ({"num__ge": 20, "num__lt": 40}, ["val1", "val2"]),
+        ({"num__in": "10,40"}, ["val0", "val3"]),
+        ({"num": "20"}, ["val1"]),
+        ({"key__in": ["val0", "val1"], "num__ne": 10}, ["val1"]),
+    ],
+)
+def test_filter_predicates(data_numeric, filters, expected):
+    result = filter_data(data_numeric, filters)
+    assert result.key.to_list() == expected
+
+
+def test_filter_unknown_predicate(data_numeric):
+    with pytest.raises(KeyError):
+        filter_data(data_numeric, {"num__between": "10,20"})
+
+
+def test_filter_columns(data_numeric):
+    result = filter_data(data_numeric, {"key": "val1"}, columns=["num"])
+    assert result.columns.to_list() == ["num"]
+    assert result.num.to_list() == [20]
+
+
+def test_filter_unknown_column_in_projection(data_numeric):
+    with pytest.raises(KeyError):
+        filter_data(data_numeric, {}, columns=["unknown_key"])
@@ -0,0 +1,141 @@
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Geo:N:G imports
+from geong_common.data.indexed import IndexedTable
+from geong_common.data.models import filter_data
+
+
+@pytest.fixture()
+def data():
+    return pd.DataFrame.from_dict(
+        {
+            "key": ["val2", "val0", None, "val1", "val0", "val2"],
+            "num": [30, 10, 20, np.nan, 10, 40],
+            "mixed": ["a", 1, "b", 2, "a", 1],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"key": "val0"},
+        {"key": "missing_value"},
+        {"key__in": ["val0", "val2"]},
+        {"key__in": "val1,missing_value"},
+        {"key__in": []},
+        {"key__in": "val0,val0"},
+        {"key__in": ["val2", "val0", "val2"], "num__ge": 30},
+        {"key__ne": "val0"},
+        {"key__ne": "missing_value"},
+        {"num__lt": 30},
+        {"num__le": "30"},
+        {"num__gt": 10},
+        {"num__ge": "10", "num__lt": 40},
+        {"num__gt": 100},
+        {"num": "10", "key": "val0"},
+        {"key__in": ["val0", "val2"], "num__ne": 10},
+        {"mixed": "a"},
+        {"mixed__ne": 1},
+    ],
+)
+def test_indexed_filter_matches_filter_data(data, filters):
+    expected = filter_data(data, filters)
+    result = IndexedTable(data).filter(filters)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+@pytest.mark.parametrize("filters", [{"key__lt": "val1"}, {"key__ge": "val1"}])
+def test_indexed_range_filter_on_categorical(data, filters, ordered):
+    data["key"] = pd.Categorical(data["key"], ordered=ordered)
+    try:
+        expected = filter_data(data, filters)
+    except TypeError as error:
+        with pytest.raises(TypeError, match=str(error)):
+            IndexedTable(data).filter(filters)
+        assert not ordered
+    else:
+        result = IndexedTable(data).filter(filters)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_indexed_filter_columns(data):
+    result = IndexedTable(data).filter({"key": "val2"}, columns=["num"])
+    assert result.columns.to_list() == ["num"]
+    assert result.num.to_list() == [30, 40]
+
+
+def test_indexed_filter_unknown_key(data):
+    with pytest.raises(KeyError):
+        IndexedTable(data).filter({"unknown_key": ""})
+
+
+def test_indexed_filter_unknown_column_in_projection(data):
+    with pytest.raises(KeyError):
+        IndexedTable(data).filter({}, columns=["unknown_key"])
+
+
+def test_index_is_built_once(data):
+    table = IndexedTable(data)
+    table.filter({"key": "val0"})
+    index = table.index("key")
+    table.filter({"key__in": ["val1", "val2"]})
+
+    assert table.index("key") is index
+    assert "num" not in table._indexes
+
+
+def test_build_indexes_skips_unknown_columns(data):
+    table = IndexedTable(data)
+    table.build_indexes(["key", "unknown_key"])
+
+    assert list(table._indexes) == ["key"]
+
+
+@pytest.mark.parametrize(
+    "filters, sort",
+    [
+        ({}, []),
+        ({}, ["num"]),
+        ({}, ["-num"]),
+        ({}, ["key", "-num"]),
+        ({}, ["-key", "num"]),
+        ({"key__ne": "val1"}, ["-num"]),
+        ({"num__ge": 10}, ["key", "num"]),
+        ({"key": "missing_value"}, ["num"]),
+    ],
+)
+def test_page_matches_sort_values(data, filters, sort):
+    expected = filter_data(data, filters)
+    if sort:
+        expected = expected.sort_values(
+            [key.lstrip("-") for key in sort],
+            ascending=[not key.startswith("-") for key in sort],
+            kind="stable",
+        )
+    result, total = IndexedTable(data).page(filters, sort=sort)
+
+    assert total == len(expected)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_page_is_sliced_after_sorting(data):
+    table = IndexedTable(data)
+    first, total = table.page({}, columns=["num"], sort=["-num"], limit=2)
+    second, _ = table.page({}, columns=["num"], sort=["-num"], offset=2, limit=2)
+    last, _ = table.page({}, columns=["num"], sort=["-num"], offset=4)
+
+    assert total == 6
+    assert first.num.to_list() == [40, 30]
+    assert second.num.to_list() == [20, 10]
+    assert last.num.tolist()[0] == 10 and np.isnan(last.num.tolist()[1])
+
+
+def test_page_unknown_sort_key(data):
+    with pytest.raises(KeyError):
+        IndexedTable(data).page({}, sort=["-unknown_key"])
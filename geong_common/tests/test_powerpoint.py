@@ -0,0 +1,108 @@
+# Standard library imports
+from unittest import mock
+
+# Third party imports
+import pptx
+import pytest
+from pyconfs import Configuration
+
+# Geo:N:G imports
+from geong_common.reports import powerpoint
+
+REPORT_CFG = """
+[[slide]]
+layout = "title"
+title = "Report: {name}"
+"""
+
+SCENARIOS_CFG = """
+[[slide]]
+nested.cfg = "scenarios"
+nested.data = "scenarios"
+
+[scenarios]
+    [[scenarios.slide]]
+    layout = "chart_table"
+    title = "{name}"
+    chart.type = "chart"
+    chart.content.type = "column_clustered"
+    chart.content.series_names = ["Weight"]
+    chart.content.data = ["weights"]
+    table.type = "table"
+    table.content.index_name = "Element"
+    table.content.column_names = ["Weight", "N:G"]
+    table.content.data = ["weights", "net_gross"]
+    table.content.formats = ["{:.0f} %", ""]
+"""
+
+
+@pytest.fixture
+def parse_presentation(monkeypatch):
+    """Count how often template presentations are parsed"""
+    monkeypatch.setattr(powerpoint, "_templates", {})
+    parse = mock.Mock(wraps=pptx.Presentation)
+    with mock.patch.object(powerpoint.pptx, "Presentation", parse):
+        yield parse
+
+
+def test_template_is_parsed_once(parse_presentation, tmp_path):
+    cfg = Configuration.from_str(REPORT_CFG, format="toml")
+    for name in ["first", "second"]:
+        powerpoint.generate_powerpoint(
+            "templates/geong_pptx.toml",
+            cfg=cfg,
+            data={"name": name},
+            output_path=tmp_path / f"{name}.pptx",
+        )
+
+    _, template_prs = powerpoint.read_template("templates/geong_pptx.toml")
+    assert parse_presentation.call_count == 1
+
+    second = pptx.Presentation(tmp_path / "second.pptx")
+    assert len(template_prs.slides) == 0
+    assert [slide.shapes.title.text for slide in second.slides] == ["Report: second"]
+
+
+def test_scenario_slides(tmp_path):
+    cfg = Configuration.from_str(SCENARIOS_CFG, format="toml")
+    scenarios = [
+        {"name": "first", "weights": {"Lobe": 60, "MTD": 40}, "net_gross": {"Lobe": 1}},
+        {"name": "second", "weights": {"MTD": 100}, "net_gross": {"Drape": 2}},
+        {"name": "third", "weights": {"Lobe": 60, "MTD": 40}, "net_gross": {}},
+    ]
+    powerpoint.generate_powerpoint(
+        "templates/geong_pptx.toml",
+        cfg=cfg,
+        data={"scenarios": scenarios},
+        output_path=tmp_path / "scenarios.pptx",
+    )
+
+    slides = pptx.Presentation(tmp_path / "scenarios.pptx").slides
+    assert [slide.shapes.title.text for slide in slides] == ["first", "second", "third"]
+
+    tables = [
+        [[cell.text for cell in row.cells] for row in shape.table.rows]
+        for slide in slides
+        for shape in slide.shapes
+        if shape.has_table
+    ]
+    assert tables[0] == [
+        ["Element", "Weight", "N:G"],
+        ["Lobe", "60 %", "1"],
+        ["MTD", "40 %", ""],
+    ]
+    assert tables[1] == [
+        ["Element", "Weight", "N:G"],
+        ["MTD", "100 %", ""],
+        ["Drape", "", "2"],
+    ]
+
+    charts = [
+        shape.chart for slide in slides for shape in slide.shapes if shape.has_chart
+    ]
+    assert [list(chart.plots[0].categories) for chart in charts] == [
+        ["Lobe", "MTD"],
+        ["MTD"],
+        ["Lobe", "MTD"],
+    ]
+    assert len({chart.part.partname for chart in charts}) == 3
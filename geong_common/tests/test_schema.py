@@ -0,0 +1,109 @@
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+from pyconfs import Configuration
+
+# Geo:N:G imports
+from geong_common.data import schema
+from geong_common.data.indexed import IndexedTable
+from geong_common.data.models import calculate_from_config
+from geong_common.data.models import filter_data
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(
+        {
+            "type": ["type_1", "type_1", "type_1", "type_1", "type_2", "type_2"],
+            "key": ["A", "A", "B", "C", "", ""],
+            "name": ["one", "two", "three", "four", "five", "six"],
+            "count": [1, 2, 3, 4, 5, 300],
+            "whole": [1.0, 2.0, np.nan, 4.0, 5.0, 6.0],
+            "value": [0.1, 0.2, 0.2, 0.5, 0.7, 0.8],
+        }
+    )
+
+
+@pytest.fixture
+def data_schema():
+    return Configuration.from_str(
+        """
+        [schema]
+        categorical = ["type", "key", "missing"]
+        downcast    = true
+        """,
+        format="toml",
+    ).schema
+
+
+def test_normalize_dtypes(data, data_schema):
+    normalized = schema.normalize(data, data_schema)
+
+    assert normalized.dtypes.to_dict() == {
+        "type": "category",
+        "key": "category",
+        "name": object,
+        "count": np.int16,
+        "whole": np.float32,
+        "value": np.float64,
+    }
+    pd.testing.assert_frame_equal(normalized.astype(data.dtypes), data)
+
+
+def test_normalize_reduces_memory(data, data_schema):
+    normalized = schema.normalize(pd.concat([data] * 1000), data_schema)
+
+    assert normalized.memory_usage(deep=True).sum() * 2 < (
+        pd.concat([data] * 1000).memory_usage(deep=True).sum()
+    )
+
+
+def test_normalize_without_downcast(data, data_schema):
+    data_schema.update_entry("downcast", False)
+    normalized = schema.normalize(data, data_schema)
+
+    assert normalized.dtypes["count"] == np.int64
+    assert normalized.dtypes["key"] == "category"
+
+
+@pytest.mark.parametrize(
+    "filters", [{"type": "type_1"}, {"key__in": "A,C"}, {"key__ne": "A"}]
+)
+def test_filter_categorical(data, data_schema, filters):
+    normalized = schema.normalize(data, data_schema)
+    expected = filter_data(data, filters)
+
+    pd.testing.assert_frame_equal(
+        filter_data(normalized, filters).astype(data.dtypes), expected
+    )
+    pd.testing.assert_frame_equal(
+        IndexedTable(normalized).filter(filters).astype(data.dtypes), expected
+    )
+
+
+def test_model_ignores_unused_categories(data, data_schema):
+    model_cfg = Configuration.from_str(
+        """
+        [models]
+        target          = "value"
+        label_column    = "type"
+
+          [models.type_1]
+          label           = "type_1"
+          factors         = ["key"]
+
+            [models.type_1.key]
+            label           = "Key"
+            values          = ["A", "B", "C"]
+
+          [models.type_2]
+          label           = "type_2"
+          factors         = []
+        """,
+        format="toml",
+    ).models
+    expected = calculate_from_config(data, model_cfg)
+    result = calculate_from_config(schema.normalize(data, data_schema), model_cfg)
+
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,32 @@
+"""Tests for finding the current session"""
+
+# Standard library imports
+from types import SimpleNamespace
+
+# Geo:N:G imports
+from geong_common import sessions
+
+
+def document(session_id, headers):
+    """Stand-in for a served Bokeh document"""
+    request = SimpleNamespace(headers=headers)
+    return SimpleNamespace(
+        session_context=SimpleNamespace(id=session_id, request=request)
+    )
+
+
+def test_no_session():
+    assert sessions.headers() == {}
+    assert sessions.session_id() is None
+
+
+def test_for_document():
+    outer = document("outer", {"X-Token": "1"})
+    inner = document("inner", {"X-Token": "2"})
+
+    with sessions.for_document(outer):
+        with sessions.for_document(inner):
+            assert sessions.session_id() == "inner"
+            assert sessions.headers() == {"X-Token": "2"}
+        assert sessions.session_id() == "outer"
+    assert sessions.session_id() is None
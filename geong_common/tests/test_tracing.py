@@ -0,0 +1,89 @@
+# Standard library imports
+import json
+from unittest import mock
+
+# Third party imports
+import pytest
+
+# Geo:N:G imports
+from geong_common import config
+from geong_common import tracing
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("", {}),
+        ("total;dur=12.5", {"total": 12.5}),
+        (
+            "obo;dur=3.0, blob_download;dur=40, total;dur=50",
+            {"obo": 3.0, "blob_download": 40.0, "total": 50.0},
+        ),
+        ('cache;desc="Cache Read";dur=2.3, miss', {"cache": 2.3}),
+        ("broken;dur=abc", {}),
+    ],
+)
+def test_parse_server_timing(header, expected):
+    assert tracing.parse_server_timing(header) == expected
+
+
+def test_trace_id_is_stable_per_session():
+    assert tracing.trace_id("session") == tracing.trace_id("session")
+    assert tracing.trace_id("session") != tracing.trace_id("other")
+    assert len(tracing.trace_id("session")) == 32
+
+
+def test_request_spans():
+    spans = tracing.request_spans(
+        name="GET /model/deep",
+        session_id="session",
+        start=1_000.0,
+        round_trip=0.1,
+        server_timing="obo;dur=20, models_calculate;dur=50, total;dur=80",
+    )
+    parent, *children = spans
+    durations = {span["name"]: span["duration"] for span in children}
+    categories = {span["name"]: span["tags"]["category"] for span in children}
+
+    assert parent["duration"] == 100_000
+    assert all(span["parentId"] == parent["id"] for span in children)
+    assert all(span["traceId"] == parent["traceId"] for span in children)
+    assert durations == {"network": 20_000, "obo": 20_000, "models_calculate": 50_000}
+    assert categories == {
+        "network": "network",
+        "obo": "auth",
+        "models_calculate": "compute",
+    }
+
+
+def test_record_spans_to_file(tmp_path, monkeypatch):
+    trace_path = tmp_path / "trace.jsonl"
+    monkeypatch.setitem(config.geong.tracing.data, "path", str(trace_path))
+    tracing.record(
+        tracing.request_spans("GET /data", "session", start=1.0, round_trip=0.1)
+    )
+
+    spans = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["GET /data", "network"]
+
+
+def test_trace_request(tmp_path, monkeypatch):
+    trace_path = tmp_path / "trace.jsonl"
+    monkeypatch.setitem(config.geong.tracing.data, "path", str(trace_path))
+    with tracing.trace_request("GET /data", "session") as trace:
+        trace["server_timing"] = "blob_download;dur=10"
+        trace["http.status_code"] = "200"
+
+    spans = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["GET /data", "network", "blob_download"]
+    assert spans[0]["tags"]["http.status_code"] == "200"
+
+
+def test_nothing_is_traced_when_disabled(monkeypatch):
+    monkeypatch.setitem(config.geong.tracing.data, "path", "")
+    request_spans = mock.Mock()
+    monkeypatch.setattr(tracing, "request_spans", request_spans)
+    with tracing.trace_request("GET /data", "session") as trace:
+        trace["server_timing"] = "blob_download;dur=10"
+
+    request_spans.assert_not_called()
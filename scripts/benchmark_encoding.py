@@ -0,0 +1,71 @@
+"""Benchmark encodings of tables sent from the API to the app
+
+Measures serialize plus deserialize time and payload size for the elements table,
+comparing the original to_dict() based JSON with the fast JSON encoder and Arrow.
+The example table is repeated to simulate a larger dataset.
+"""
+
+# Standard library imports
+import json
+import pathlib
+import timeit
+
+# Third party imports
+import pandas as pd
+
+# Geo:N:G imports
+from geong_common import log
+from geong_common.data import encoding
+from geong_common.log import logger
+
+ELEMENTS_PATH = (
+    pathlib.Path(__file__).resolve().parent.parent
+    / "examples"
+    / "data"
+    / "deep"
+    / "elements.json"
+)
+REPEATS = [1, 100, 1000]
+NUMBER = 5
+
+
+def roundtrip(encoder, data):
+    """Serialize and deserialize data using the given encoder"""
+    _, decode = encoder(data)
+    return decode()
+
+
+def to_dict_json(data):
+    """Roundtrip through to_dict(), json.dumps() and response.json()"""
+    content = json.dumps(data.to_dict(orient="split")).encode("utf-8")
+    return content, lambda: pd.DataFrame(**json.loads(content))
+
+
+def fast_json(data):
+    """Roundtrip through the fast JSON encoder"""
+    content = encoding.encode_json(data)
+    return content, lambda: encoding.decode_json(content)
+
+
+def arrow(data):
+    """Roundtrip through an Arrow IPC stream"""
+    content = encoding.encode_arrow(data)
+    return content, lambda: encoding.decode_arrow(content)
+
+
+log.init()
+elements = pd.read_json(ELEMENTS_PATH.read_text(), orient="split")
+
+for repeat in REPEATS:
+    data = pd.concat([elements] * repeat, ignore_index=True)
+    logger.info(f"Elements table with {len(data)} rows")
+    for encoder in (to_dict_json, fast_json, arrow):
+        content, _ = encoder(data)
+        seconds = (
+            timeit.timeit("roundtrip(encoder, data)", number=NUMBER, globals=globals())
+            / NUMBER
+        )
+        logger.info(
+            f"  {encoder.__name__:<14} {1000 * seconds:8.1f} ms "
+            f"{len(content) / 1024:10.1f} kB"
+        )
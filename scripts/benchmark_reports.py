@@ -0,0 +1,96 @@
+"""Benchmark rendering of PowerPoint reports with many scenarios
+
+Renders the deep N:G report configured in the app, with 1, 10 and 50 scenarios
+of synthetic data. Weights vary between scenarios, as they do in real reports.
+The first report is not timed, as it reads and parses the template. Each
+repetition uses new data, so that no chart is reused from an earlier report.
+"""
+
+# Standard library imports
+import io
+import random
+import time
+from datetime import datetime
+
+# Geo:N:G imports
+from app import config
+from geong_common import log
+from geong_common import reports
+from geong_common.log import logger
+
+REPORT = "deep_net_gross_ppt"
+ELEMENTS = ["Lobe", "Channel Fill", "Overbank", "MTD", "Drape"]
+FILTER_CLASSES = {
+    "lobe_spatial": ["Proximal", "Medial", "Distal"],
+    "lobe_confinement": ["Confined", "Unconfined"],
+    "lobe_conventional": ["Conventional", "Hybrid", "Debrite"],
+    "lobe_architectural": ["Lobe Axis", "Lobe Off-Axis", "Lobe Fringe"],
+    "chan_relative": ["Channel Axis", "Channel Off-Axis", "Channel Margin"],
+    "chan_architectural": ["Amalgamated", "Layered", "Isolated"],
+}
+NUM_SCENARIOS = [1, 10, 50]
+REPEATS = 3
+
+
+def weights(rnd, labels):
+    """Random weights in percent, adding up to 100"""
+    values = [rnd.random() for _ in labels]
+    return {label: 100 * value / sum(values) for label, value in zip(labels, values)}
+
+
+def scenario(rnd, num):
+    """Synthetic data for one scenario"""
+    element_weights = weights(rnd, ELEMENTS)
+    element_net_gross = {element: rnd.uniform(10, 90) for element in ELEMENTS}
+    return {
+        "scenario_name": f"Scenario {num}",
+        "net_gross": rnd.uniform(10, 90),
+        "porosity_modifier": rnd.uniform(0, 10),
+        "net_gross_modified": rnd.uniform(10, 90),
+        "set_up": {f"Question {question}": "Answer" for question in range(6)},
+        "element_net_gross": element_net_gross,
+        "weights": element_weights,
+        "contribution": {
+            element: element_weights[element] * element_net_gross[element] / 100
+            for element in ELEMENTS
+        },
+        **{name: weights(rnd, labels) for name, labels in FILTER_CLASSES.items()},
+    }
+
+
+def report_data(num_scenarios, seed=0):
+    """Data for a report with the given number of scenarios"""
+    rnd = random.Random(seed)
+    return {
+        "date": datetime.now(),
+        "geox_id": "Benchmark",
+        "scenario_list": "\n".join(f"Scenario {num}" for num in range(num_scenarios)),
+        "scenarios": [scenario(rnd, num) for num in range(num_scenarios)],
+    }
+
+
+def render(data):
+    """Render the report to memory, returns the time used in seconds"""
+    start = time.perf_counter()
+    report_cfg = config.app.report[REPORT]
+    reports.generate(
+        report_cfg.generator,
+        template_url=report_cfg.template,
+        cfg=report_cfg,
+        data=data,
+        output_path=io.BytesIO(),
+    )
+    return time.perf_counter() - start
+
+
+log.init()
+render(report_data(1))
+
+seed = 0
+for num_scenarios in NUM_SCENARIOS:
+    times = []
+    for _ in range(REPEATS):
+        seed += 1
+        times.append(render(report_data(num_scenarios, seed=seed)))
+    seconds = min(times)
+    logger.info(f"Report with {num_scenarios:3d} scenarios {seconds:8.2f} s")